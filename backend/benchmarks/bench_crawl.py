@@ -0,0 +1,237 @@
+# bench_crawl.py
+# Throughput, fetch latency, CPU and memory of the crawl stages against a local synthetic site.
+# Run from backend/:  python -m benchmarks.bench_crawl --pages 2000 --latency-ms 10
+# Compare with an earlier run:  python -m benchmarks.bench_crawl --compare benchmarks/results/<file>.json
+# Database writes go to mongomock (pip install -r requirements-dev.txt) unless BENCH_MONGO_URI points at a real MongoDB.
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from urllib.parse import urlsplit
+from benchmarks.synthetic_site import add_spec_arguments, serve, spec_from_args
+from scraper.HostScheduler import HostScheduler
+
+SCENARIOS = ("sitemap", "crawler", "metadata", "pipeline")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# Metrics compared by --compare, and whether a higher value is better
+COMPARED = {"useful_pages": True, "pages_per_sec": True, "p50_fetch_ms": False, "p95_fetch_ms": False, "cpu_ms_per_page": False,
+            "peak_rss_mb": False}
+
+
+class RecordingScheduler(HostScheduler):
+    """HostScheduler that also keeps the latency of every request it paces."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.latencies = []
+
+    def release(self, host, latency, **kwargs):
+        self.latencies.append(latency)
+        super().release(host, latency, **kwargs)
+
+
+def percentile(values, share):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(share * len(ordered)), len(ordered) - 1)]
+
+
+def content_pages(urls):
+    """Distinct content pages (/p/<n>) among crawled URLs, as opposed to trap and utility pages."""
+    return len({url for url in urls if urlsplit(url).path.startswith("/p/") and not urlsplit(url).query})
+
+
+def bench_sitemap(base, transport, options):
+    from scraper.SitemapScraper import SitemapScraper
+    return len(SitemapScraper(base, transport=transport).get_sitemap_urls(f"{base}/sitemap.xml"))
+
+
+def bench_crawler(base, transport, options):
+    from scraper.InternalLinkCrawler import InternalLinkCrawler
+    from scraper.RobotsTxt import RobotsTxt
+    crawler = InternalLinkCrawler(base, concurrency=options["concurrency"], transport=transport,
+                                  robots=RobotsTxt(base, transport=transport))
+    found = crawler.crawl_internal_links(max_pages=options["max_pages"])
+    return {"pages": crawler.stats["fetched"], "found": len(found), "useful_pages": content_pages(found),
+            "unverified": len(crawler.unverified)}
+
+
+def bench_metadata(base, transport, options):
+    """Static tier of ScrapeRunner: plain HTTP fetch plus MetadataScraper extraction, no browser."""
+    from scraper.MetadataScraper import MetadataScraper
+    scraper = MetadataScraper(base, parser_backend=options["parser_backend"])
+    urls = iter([f"{base}/p/{n}" for n in range(min(options["pages"], options["max_pages"]))])
+    extracted = 0
+
+    async def worker(session):
+        nonlocal extracted
+        for url in urls:
+            response = await session.get(url)
+            if response.status_code == 200:
+                await scraper.extract_async(response.text, url)
+                extracted += 1
+
+    async def run():
+        async with transport.async_session() as session:
+            await asyncio.gather(*(worker(session) for _ in range(options["concurrency"])))
+
+    asyncio.run(run())
+    return extracted
+
+
+def bench_pipeline(base, transport, options):
+    """WebScraper.process_website end to end: robots.txt, sitemaps, crawl and MongoDB writes."""
+    from benchmarks.mongo_stand_in import bench_db_handler
+    from scraper.WebScraper import WebScraper
+    scraper = WebScraper(base, db_handler=bench_db_handler("benchsite"), transport=transport,
+                         crawl_concurrency=options["concurrency"], cache_dir="")
+    scraper.process_website()
+    return {"pages": len(scraper.scraped_urls), "useful_pages": content_pages(scraper.scraped_urls)}
+
+
+def run_scenario(name, base, options, results):
+    """Runs one scenario in this (fresh) process and reports its metrics through the `results` queue."""
+    from scraper.HttpTransport import HttpTransport
+    from scraper.utils.logger import configure_logging
+    # The log handler holds the real stdout, so the redirect below does not silence it
+    configure_logging(None if options["verbose"] else "WARNING")
+    scheduler = RecordingScheduler(max_concurrency=options["concurrency"])
+    transport = HttpTransport(scheduler=scheduler, max_connections_per_host=options["concurrency"])
+    scenario = globals()[f"bench_{name}"]
+
+    start_usage = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if options["verbose"] else devnull):
+        pages = scenario(base, transport, options)
+    extra = {}
+    if isinstance(pages, dict):  # Scenarios that also count the useful share of their pages
+        extra = pages
+        pages = extra.pop("pages")
+    elapsed = time.perf_counter() - start
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    transport.close()
+
+    cpu = (usage.ru_utime - start_usage.ru_utime) + (usage.ru_stime - start_usage.ru_stime)
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak_rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    latencies = scheduler.latencies
+    results.put({
+        "pages": pages,
+        "requests": len(latencies),
+        "elapsed": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 1) if elapsed else None,
+        "p50_fetch_ms": round(percentile(latencies, 0.5) * 1000, 2) if latencies else None,
+        "p95_fetch_ms": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        "cpu_ms_per_page": round(cpu * 1000 / pages, 3) if pages else None,
+        "peak_rss_mb": round(peak_rss / 1024 / 1024, 1),
+        **extra,
+    })
+
+
+def wait_for_metrics(process, results):
+    """Metrics of a scenario process, or None when it died without reporting any."""
+    while True:
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            if not process.is_alive():
+                return None
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(name, metrics):
+    useful = f" ({metrics['useful_pages']} content)" if "useful_pages" in metrics else ""
+    print(f"{name:<10} {metrics['pages']:7} pages{useful}  {metrics['pages_per_sec']:8} pages/sec  "
+          f"p50 {metrics['p50_fetch_ms']} ms  p95 {metrics['p95_fetch_ms']} ms  "
+          f"{metrics['cpu_ms_per_page']} CPU ms/page  {metrics['peak_rss_mb']} MiB peak")
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = json.load(file)
+    print(f"\n📊 Against {baseline_path} (commit {baseline.get('commit')}):")
+    for name, metrics in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        changes = []
+        for metric, higher_is_better in COMPARED.items():
+            old, new = before.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change < 0 if higher_is_better else change > 0
+            changes.append(f"{metric} {change:+.1%}{' ⚠️' if worse and abs(change) > 0.1 else ''}")
+        print(f"{name:<10} " + "  ".join(changes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl pipeline benchmark against a synthetic site")
+    add_spec_arguments(parser)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of {SCENARIOS}")
+    parser.add_argument("--max-pages", type=int, default=1000, help="page cap of the crawler and metadata scenarios")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent requests per scenario")
+    parser.add_argument("--parser-backend", default="auto", help="HtmlExtractor backend for the metadata scenario")
+    parser.add_argument("--output", help="results JSON path (default: benchmarks/results/crawl-<commit>-<time>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--verbose", action="store_true", help="keep the scrapers' own output")
+    args = parser.parse_args()
+
+    spec = spec_from_args(args)
+    server, base = serve(spec)
+    options = {"pages": args.pages, "max_pages": args.max_pages, "concurrency": args.concurrency,
+               "parser_backend": args.parser_backend, "verbose": args.verbose}
+    print(f"🌐 Synthetic site at {base}: {spec.pages} pages, fan-out {spec.fanout}, "
+          f"{spec.latency_ms} ms latency, {spec.error_rate:.0%} errors\n")
+
+    # One process per scenario, so peak RSS and CPU time belong to that scenario alone
+    context = multiprocessing.get_context("spawn")
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "site": asdict(spec),
+        "options": options,
+        "scenarios": {},
+    }
+    for name in args.scenarios.split(","):
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name}")
+        channel = context.Queue()
+        process = context.Process(target=run_scenario, args=(name, base, options, channel))
+        process.start()
+        metrics = wait_for_metrics(process, channel)
+        process.join()
+        if metrics is None:
+            print(f"❌ {name} failed (exit code {process.exitcode})")
+            continue
+        results["scenarios"][name] = metrics
+        report(name, metrics)
+    server.shutdown()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"crawl-{results['commit'] or 'nogit'}-{int(time.time())}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
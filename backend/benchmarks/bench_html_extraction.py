@@ -0,0 +1,100 @@
+# bench_html_extraction.py
+# Compares the previous BeautifulSoup extraction with the HtmlExtractor backends and checks they agree.
+# Run from backend/:  python -m benchmarks.bench_html_extraction --corpus path/to/saved_pages
+# Without --corpus a synthetic corpus of rendered-looking pages is generated.
+import argparse
+import glob
+import os
+import random
+import time
+from bs4 import BeautifulSoup
+from scraper.HtmlExtractor import HtmlExtractor, LXML_AVAILABLE
+
+
+def legacy_extract(html):
+    """What MetadataScraper.scrape and NavigationLinkFilter.get_dom_path computed before HtmlExtractor."""
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.string.strip() if soup.title and soup.title.string else None
+    meta_desc = soup.find("meta", attrs={"name": "description"})
+    meta_description = meta_desc["content"].strip() if meta_desc and meta_desc.has_attr("content") else None
+    canonical = soup.find("link", rel="canonical", href=True)
+    headings = {f"h{i}": len(soup.find_all(f"h{i}")) for i in range(1, 7)}
+
+    anchors = []
+    for a in soup.find_all("a", href=True):
+        path = []
+        element = a
+        while element and element.name:
+            path.insert(0, element.name)
+            element = element.parent
+        anchors.append((a["href"], " > ".join(path)))
+
+    return {
+        "title": title,
+        "meta_description": meta_description,
+        "canonical": canonical["href"].strip() if canonical else None,
+        "headings": headings,
+        "anchors": anchors,
+    }
+
+
+def synthetic_page(rng, index):
+    def links(count, prefix):
+        return "".join(f'<li><a href="/{prefix}/{rng.randint(0, 5000)}">Link {i}</a></li>' for i in range(count))
+
+    sections = "".join(
+        f"<section><h2>Section {s}</h2><p>{'Lorem ipsum dolor sit amet. ' * rng.randint(5, 40)}</p>"
+        f"<h3>Details</h3><div class=\"grid\"><ul>{links(rng.randint(5, 40), 'products')}</ul></div></section>"
+        for s in range(rng.randint(3, 12))
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>Page {index}</title>"
+        f'<meta name="description" content=" Description of page {index} ">'
+        f'<link rel="canonical" href="/page/{index}">'
+        f"<script>var x = '<a href=\"/not-a-link\">';</script></head><body>"
+        f"<header><nav><ul>{links(30, 'menu')}</ul></nav></header>"
+        f"<main><h1>Heading {index}</h1>{sections}</main>"
+        f"<footer><ul>{links(20, 'footer')}</ul><a href=\"https://external.example.org/\">Partner</a></footer>"
+        f"</body></html>"
+    )
+
+
+def load_corpus(path, size):
+    if path:
+        pages = []
+        for filename in sorted(glob.glob(os.path.join(path, "*.html")) + glob.glob(os.path.join(path, "*.htm"))):
+            with open(filename, encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+        return pages
+    rng = random.Random(42)
+    return [synthetic_page(rng, i) for i in range(size)]
+
+
+def timed(label, fn, pages, baseline=None):
+    start = time.perf_counter()
+    results = [fn(html) for html in pages]
+    elapsed = time.perf_counter() - start
+    speedup = f"  {baseline / elapsed:5.1f}x" if baseline else ""
+    print(f"{label:<28} {elapsed:8.3f}s  {len(pages) / elapsed:8.1f} pages/sec{speedup}")
+    return results, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTML extraction benchmark")
+    parser.add_argument("--corpus", help="directory of saved .html pages (e.g. dumps of page.content())")
+    parser.add_argument("--size", type=int, default=300, help="number of synthetic pages when no corpus is given")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus, args.size)
+    print(f"📚 {len(pages)} pages, {sum(map(len, pages)) / 1024 / 1024:.1f} MiB of HTML\n")
+
+    expected, baseline = timed("legacy bs4 (6x find_all)", legacy_extract, pages)
+    backends = ["bs4", "lxml"] if LXML_AVAILABLE else ["bs4"]
+    for backend in backends:
+        extractor = HtmlExtractor(backend)
+        results, _ = timed(f"HtmlExtractor[{backend}]", extractor.extract, pages, baseline)
+        mismatches = [i for i, (a, b) in enumerate(zip(expected, results)) if a != b]
+        if mismatches:
+            print(f"   ⚠️ {len(mismatches)} pages differ from the legacy output, first: #{mismatches[0]}")
+        else:
+            print("   ✅ identical output on every page")
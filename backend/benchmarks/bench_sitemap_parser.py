@@ -0,0 +1,109 @@
+# bench_sitemap_parser.py
+# Compares the streaming sitemap parser with the previous ET.fromstring parser.
+# Run from backend/:  python -m benchmarks.bench_sitemap_parser --urls 50000 --children 300
+import argparse
+import gzip
+import http.server
+import threading
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from scraper.SitemapScraper import SitemapScraper
+from scraper.HttpTransport import HttpTransport
+
+NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def build_urlset(count, pad=0):
+    """Builds a <urlset> with `count` URLs; `pad` lengthens each <loc> to reach realistic file sizes."""
+    suffix = "x" * pad
+    entries = "".join(
+        f"<url><loc>https://example.com/products/item-{i}-{suffix}</loc><lastmod>2024-01-01</lastmod></url>"
+        for i in range(count)
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{NAMESPACE}">{entries}</urlset>'.encode()
+
+
+def build_index(base_url, children):
+    entries = "".join(f"<sitemap><loc>{base_url}/child-{i}</loc></sitemap>" for i in range(children))
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="{NAMESPACE}">{entries}</sitemapindex>'.encode()
+
+
+def legacy_parse(content):
+    """The parser SitemapScraper used before streaming: whole document in memory, nested sitemaps by suffix."""
+    root = ET.fromstring(content)
+    namespace = f"{{{NAMESPACE}}}"
+    urls, nested = [], []
+    for elem in root.findall(f".//{namespace}loc"):
+        (nested if elem.text.endswith(".xml") else urls).append(elem.text)
+    return urls, nested
+
+
+def chunked(data, size=64 * 1024):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def measure(label, fn):
+    # Timed and traced in separate passes, tracemalloc slows allocation-heavy code down a lot
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<38} {count:>8} urls  {elapsed:7.3f}s  peak {peak / 1024 / 1024:8.2f} MiB")
+
+
+def bench_single_file(urls, pad):
+    plain = build_urlset(urls, pad)
+    gzipped = gzip.compress(plain)
+    print(f"\n📄 Single sitemap: {urls} URLs, {len(plain) / 1024 / 1024:.1f} MiB ({len(gzipped) / 1024 / 1024:.1f} MiB gzipped)")
+
+    scraper = SitemapScraper("https://example.com")
+    # Keep only a counter so the numbers reflect the parser itself, not a result list
+    measure("legacy ET.fromstring", lambda: len(legacy_parse(plain)[0]))
+    measure("streaming iterparse", lambda: sum(1 for _ in scraper.iterparse(chunked(plain))))
+    measure("legacy ET.fromstring (.xml.gz)", lambda: len(legacy_parse(gzip.decompress(gzipped))[0]))
+    measure("streaming iterparse (.xml.gz)", lambda: sum(1 for _ in scraper.iterparse(chunked(gzipped))))
+
+
+def bench_index(children, urls_per_child):
+    child = gzip.compress(build_urlset(urls_per_child))
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            body = index if self.path == "/sitemap.xml" else child
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    index = build_index(base_url, children)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"\n🗂️ Sitemap index: {children} gzipped children without .xml suffix, {urls_per_child} URLs each")
+    scraper = SitemapScraper(base_url, transport=HttpTransport())
+    measure("streaming index (records generator)", lambda: sum(1 for _ in scraper.iter_sitemap_records(f"{base_url}/sitemap.xml")))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sitemap parser benchmark")
+    parser.add_argument("--urls", type=int, default=50000)
+    parser.add_argument("--pad", type=int, default=800, help="extra characters per <loc> (800 gives ~50 MiB at 50k URLs)")
+    parser.add_argument("--children", type=int, default=300)
+    parser.add_argument("--urls-per-child", type=int, default=2000)
+    args = parser.parse_args()
+
+    bench_single_file(args.urls, args.pad)
+    bench_index(args.children, args.urls_per_child)
@@ -0,0 +1,79 @@
+# bench_url_dedupe.py
+# Memory and throughput of the crawler's seen-URL set: plain string set vs 64-bit fingerprints vs Bloom filter.
+# Run from backend/:  python -m benchmarks.bench_url_dedupe --urls 3000000
+import argparse
+import random
+import sys
+import time
+from scraper.FingerprintSet import FingerprintSet, BloomFilter, url_fingerprint
+from scraper.utils.normalize_url import normalize_url
+
+
+def synthetic_urls(count, duplicate_share, seed=42):
+    """Site-like absolute URLs; `duplicate_share` of them repeat an earlier one, as links do across pages."""
+    rng = random.Random(seed)
+    sections = ["blog", "products", "category", "docs", "help", "news", "shop", "tags"]
+    urls = []
+    for i in range(count):
+        if urls and rng.random() < duplicate_share:
+            urls.append(urls[rng.randrange(len(urls))])
+        else:
+            section = rng.choice(sections)
+            urls.append(f"https://www.example.com/{section}/{rng.randrange(10**6)}/item-{i}-{rng.randrange(10**4)}")
+    return urls
+
+
+def string_set_bytes(items):
+    return sys.getsizeof(items) + sum(sys.getsizeof(item) for item in items)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    return result, elapsed
+
+
+def report(label, count, elapsed, memory, unique):
+    print(f"{label:<24} {elapsed:7.2f}s  {count / elapsed / 1000:8.0f}k adds/sec  "
+          f"{memory / 1024 / 1024:8.1f} MiB  {memory / max(unique, 1):6.1f} B/URL")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="URL dedupe set benchmark")
+    parser.add_argument("--urls", type=int, default=2_000_000, help="number of URLs to add (duplicates included)")
+    parser.add_argument("--duplicates", type=float, default=0.3, help="share of URLs that repeat an earlier one")
+    parser.add_argument("--normalize-sample", type=int, default=200_000, help="URLs to run through normalize_url")
+    args = parser.parse_args()
+
+    urls = synthetic_urls(args.urls, args.duplicates)
+    print(f"📚 {len(urls):,} URLs, {args.duplicates:.0%} duplicates\n")
+
+    sample = urls[:args.normalize_sample]
+    _, elapsed = timed(lambda: [normalize_url(url) for url in sample])
+    print(f"{'normalize_url':<24} {elapsed:7.2f}s  {len(sample) / elapsed / 1000:8.0f}k URLs/sec\n")
+
+    def fill(seen):
+        return sum(1 for url in urls if seen.add(url))
+
+    strings = set()
+    _, elapsed = timed(lambda: [strings.add(url) for url in urls])
+    unique = len(strings)
+    report("set[str]", len(urls), elapsed, string_set_bytes(strings), unique)
+    del strings
+
+    fingerprints = set()
+    _, elapsed = timed(lambda: [fingerprints.add(url_fingerprint(url)) for url in urls])
+    report("set[fingerprint]", len(urls), elapsed, string_set_bytes(fingerprints), unique)
+    del fingerprints
+
+    exact = FingerprintSet(capacity=1024)
+    added, elapsed = timed(lambda: fill(exact))
+    report("FingerprintSet", len(urls), elapsed, exact.memory_bytes(), unique)
+    if added != unique:
+        print(f"   ⚠️ {unique - added} URLs lost to fingerprint collisions")
+
+    bloom = BloomFilter(capacity=unique, error_rate=0.001)
+    added, elapsed = timed(lambda: fill(bloom))
+    report("BloomFilter (0.1%)", len(urls), elapsed, bloom.memory_bytes(), unique)
+    print(f"   {unique - added} new URLs reported as seen ({(unique - added) / unique:.3%} false positives)")
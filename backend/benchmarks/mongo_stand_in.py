@@ -0,0 +1,58 @@
+# mongo_stand_in.py
+# MongoDBHandler for the benchmarks: a real server when BENCH_MONGO_URI is set, otherwise in-memory mongomock.
+import os
+from scraper.MongoDBHandler import MongoDBHandler
+
+STAND_IN_URI = "mongomock://benchmarks"
+
+
+class _BulkWriteResult:
+    def __init__(self):
+        self.upserted_count = 0
+        self.modified_count = 0
+
+
+class _MockCollection:
+    """
+    Wraps a mongomock collection and applies bulk_update's (filter, update, upsert) tuples one at a time:
+    mongomock's own bulk_write rejects the operation objects of current pymongo releases.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def bulk_update(self, updates, ordered=True):
+        result = _BulkWriteResult()
+        for query, update, upsert in updates:
+            outcome = self._collection.update_one(query, update, upsert=upsert)
+            result.upserted_count += outcome.upserted_id is not None
+            result.modified_count += outcome.modified_count
+        return result
+
+
+def bench_db_handler(website_name):
+    """A MongoDBHandler for `website_name`; with mongomock every call starts from an empty database."""
+    uri = os.getenv("BENCH_MONGO_URI")
+    if uri:
+        os.environ["MONGO_URI"] = uri
+        handler = MongoDBHandler(website_name)
+        handler.collection.database.client.drop_database(handler.collection.database.name)
+        MongoDBHandler._indexed.discard(handler.collection.full_name)
+        handler.ensure_indexes()
+        return handler
+
+    import mongomock  # Only needed without a real server
+    os.environ["MONGO_URI"] = STAND_IN_URI
+    with MongoDBHandler._lock:
+        # Seeding the shared client pool makes MongoDBHandler connect to mongomock
+        MongoDBHandler._clients[STAND_IN_URI] = mongomock.MongoClient()
+        MongoDBHandler._indexed.clear()
+    handler = MongoDBHandler(website_name)
+    handler.collection = _MockCollection(handler.collection)
+    handler.state_collection = _MockCollection(handler.state_collection)
+    handler.crawl_state_collection = _MockCollection(handler.crawl_state_collection)
+    handler.frontier_collection = _MockCollection(handler.frontier_collection)
+    return handler
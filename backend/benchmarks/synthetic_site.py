@@ -0,0 +1,225 @@
+# synthetic_site.py
+# Local HTTP server generating a deterministic synthetic website for the crawl benchmarks.
+# Serve one by hand from backend/:  python -m benchmarks.synthetic_site --pages 5000 --latency-ms 20
+import argparse
+import gzip
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("crawl index page site link audit content search rank product guide price review news help "
+         "team about contact blog docs service customer order report market data").split()
+
+
+@dataclass
+class SiteSpec:
+    pages: int = 2000  # Content pages, served at /p/<n>
+    fanout: int = 20  # Internal links per page, on top of the nav and a link to the next page
+    sitemap_depth: int = 1  # Levels of <sitemapindex> above the <urlset> files; 0 serves one urlset
+    sitemap_branching: int = 4  # Child sitemaps per index
+    gzip_sitemaps: bool = False  # Serve the urlset files as .xml.gz
+    latency_ms: float = 0.0  # Added to every response
+    latency_jitter: float = 0.5  # Latency varies uniformly by +/- this share
+    error_rate: float = 0.0  # Share of page requests answered with a 503
+    words: int = 300  # Body text length of a page
+    sitemap_coverage: float = 1.0  # Share of the pages listed in the sitemaps
+    traps: bool = False  # Link every page to an endless calendar, faceted search and a session-ID cart
+    seed: int = 42
+
+
+class SyntheticSite:
+    """
+    Builds the pages and sitemaps of a SiteSpec; every response depends only on the spec and the path,
+    except for the visitor tokens of the trap links.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.leaves = spec.sitemap_branching ** spec.sitemap_depth
+        self.nav = "".join(f'<li><a href="/p/{i}">{WORDS[i % len(WORDS)]}</a></li>' for i in range(min(8, spec.pages)))
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _rng(self, *key):
+        # String seeds are hashed with SHA-512, so pages are the same in every process and run
+        return random.Random(":".join(map(str, (self.spec.seed,) + key)))
+
+    def page(self, n):
+        spec = self.spec
+        rng = self._rng("page", n)
+        targets = [rng.randrange(spec.pages) for _ in range(spec.fanout)]
+        if n + 1 < spec.pages:
+            targets.append(n + 1)  # Keeps every page reachable from the homepage
+        links = "".join(f'<li><a href="/p/{t}">{WORDS[t % len(WORDS)]} {t}</a></li>' for t in targets)
+        if spec.traps:
+            links += (f'<li><a href="/calendar/2025/{n % 12 + 1}">Events</a></li>'
+                      f'<li><a href="/search?color={WORDS[n % 7]}">Shop by color</a></li>'
+                      f'<li><a href="/cart?visit={self._session()}">Cart</a></li>')
+        text = " ".join(rng.choice(WORDS) for _ in range(spec.words))
+        return (
+            f"<!DOCTYPE html><html><head><title>Page {n}</title>"
+            f'<meta name="description" content="Synthetic page {n}">'
+            f'<link rel="canonical" href="/p/{n}"></head><body>'
+            f'<header><nav><ul><li><a href="/">Home</a></li>{self.nav}</ul></nav></header>'
+            f"<main><h1>Page {n}</h1><h2>Overview</h2><p>{text}</p><h2>Related</h2><ul>{links}</ul></main>"
+            f'<footer><a href="/about">About</a> <a href="/contact">Contact</a></footer></body></html>'
+        ).encode()
+
+    def _session(self):
+        # A new visitor token in every response, like a site that tracks sessions in its URLs
+        return f"{random.getrandbits(128):032x}"
+
+    def _shell(self, title, body):
+        return (
+            f"<!DOCTYPE html><html><head><title>{title}</title></head><body>"
+            f'<header><nav><ul><li><a href="/">Home</a></li>{self.nav}</ul></nav></header>'
+            f"<main><h1>{title}</h1>{body}</main></body></html>"
+        ).encode()
+
+    def calendar(self, year, month):
+        """An events calendar with no events, whose previous/next links never end."""
+        before = (year, month - 1) if month > 1 else (year - 1, 12)
+        after = (year, month + 1) if month < 12 else (year + 1, 1)
+        return self._shell(f"Events {year}-{month:02d}", f'<p>No events.</p><a href="/calendar/{before[0]}/{before[1]}">'
+                           f'Previous</a> <a href="/calendar/{after[0]}/{after[1]}">Next</a>')
+
+    def search(self, query):
+        """Faceted search: every combination of filters is its own URL, listing the same few pages."""
+        filters = dict(param.partition("=")[::2] for param in query.split("&") if param)
+        rng = self._rng("search", query)
+        results = "".join(f'<li><a href="/p/{t}">Result {t}</a></li>'
+                          for t in (rng.randrange(self.spec.pages) for _ in range(5)))
+        refinements = []
+        for facet, values in (("color", WORDS[:7]), ("size", ("s", "m", "l", "xl")), ("sort", ("price", "rank", "new")),
+                              ("page", ("1", "2", "3"))):
+            for value in values:
+                refined = "&".join(f"{key}={val}" for key, val in sorted({**filters, facet: value}.items()))
+                refinements.append(f'<li><a href="/search?{refined}">{facet} {value}</a></li>')
+        return self._shell("Search", f"<ul>{results}</ul><ul>{''.join(refinements)}</ul>")
+
+    def homepage(self):
+        return self.page(0).replace(b"<title>Page 0</title>", b"<title>Home</title>", 1)
+
+    def listed(self, n):
+        return self.spec.sitemap_coverage >= 1 or self._rng("listed", n).random() < self.spec.sitemap_coverage
+
+    def sitemap(self, base, level, index):
+        """The sitemap node at `level` (0 is /sitemap.xml); leaves list every `self.leaves`-th page."""
+        ns = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+        if level < self.spec.sitemap_depth:
+            children = range(index * self.spec.sitemap_branching, (index + 1) * self.spec.sitemap_branching)
+            suffix = ".xml.gz" if self.spec.gzip_sitemaps and level + 1 == self.spec.sitemap_depth else ".xml"
+            entries = "".join(f"<sitemap><loc>{base}/sitemaps/{level + 1}-{child}{suffix}</loc></sitemap>"
+                              for child in children)
+            return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex {ns}>{entries}</sitemapindex>'.encode()
+        entries = "".join(f"<url><loc>{base}/p/{n}</loc><lastmod>2025-01-{n % 28 + 1:02d}</lastmod></url>"
+                          for n in range(index, self.spec.pages, self.leaves) if self.listed(n))
+        body = f'<?xml version="1.0" encoding="UTF-8"?><urlset {ns}>{entries}</urlset>'.encode()
+        return gzip.compress(body, 1) if self.spec.gzip_sitemaps and self.spec.sitemap_depth else body
+
+    def respond(self, path, base):
+        """Returns (status, content type, body) for a request path."""
+        path, _, query = path.split("#", 1)[0].partition("?")
+        if path == "/robots.txt":
+            return 200, "text/plain", f"User-agent: *\nDisallow: /private/\nSitemap: {base}/sitemap.xml\n".encode()
+        if path == "/sitemap.xml":
+            return 200, "application/xml", self.sitemap(base, 0, 0)
+        if path.startswith("/sitemaps/"):
+            level, index = path[len("/sitemaps/"):].split(".", 1)[0].split("-")
+            content_type = "application/gzip" if path.endswith(".gz") else "application/xml"
+            return 200, content_type, self.sitemap(base, int(level), int(index))
+        if path in ("/", ""):
+            return 200, "text/html; charset=utf-8", self.homepage()
+        if path.startswith("/p/") and path[3:].isdigit() and int(path[3:]) < self.spec.pages:
+            return 200, "text/html; charset=utf-8", self.page(int(path[3:]))
+        if self.spec.traps:
+            parts = path.split("/")
+            if len(parts) == 4 and parts[1] == "calendar" and parts[2].isdigit() and parts[3].isdigit():
+                return 200, "text/html; charset=utf-8", self.calendar(int(parts[2]), int(parts[3]))
+            if path == "/search":
+                return 200, "text/html; charset=utf-8", self.search(query)
+            if path == "/cart":
+                return 200, "text/html; charset=utf-8", self._shell("Cart", "<p>Your cart is empty.</p>")
+        return 404, "text/html", b"<html><head><title>Not found</title></head><body>Not found</body></html>"
+
+    def handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like a real server
+            disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                spec = site.spec
+                with site._lock:
+                    site.requests += 1
+                    failed = spec.error_rate and random.random() < spec.error_rate and self.path.startswith("/p/")
+                    site.errors += bool(failed)
+                if spec.latency_ms:
+                    jitter = 1 + random.uniform(-spec.latency_jitter, spec.latency_jitter)
+                    time.sleep(spec.latency_ms * jitter / 1000)
+                if failed:
+                    status, content_type, body = 503, "text/plain", b"unavailable"
+                else:
+                    status, content_type, body = site.respond(self.path, f"http://{self.headers['Host']}")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def serve(spec, host="127.0.0.1", port=0):
+    """Starts the site in a background thread; returns (server, base URL). Stop it with server.shutdown()."""
+    site = SyntheticSite(spec)
+    server = ThreadingHTTPServer((host, port), site.handler())
+    server.daemon_threads = True
+    server.site = site
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def add_spec_arguments(parser):
+    defaults = SiteSpec()
+    parser.add_argument("--pages", type=int, default=defaults.pages, help="content pages on the site")
+    parser.add_argument("--fanout", type=int, default=defaults.fanout, help="internal links per page")
+    parser.add_argument("--sitemap-depth", type=int, default=defaults.sitemap_depth, help="levels of sitemap indexes")
+    parser.add_argument("--sitemap-branching", type=int, default=defaults.sitemap_branching, help="child sitemaps per index")
+    parser.add_argument("--gzip-sitemaps", action="store_true", help="serve urlset files gzipped")
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="server latency per response")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="share of page requests that get a 503")
+    parser.add_argument("--words", type=int, default=defaults.words, help="body words per page")
+    parser.add_argument("--sitemap-coverage", type=float, default=defaults.sitemap_coverage,
+                        help="share of the pages listed in the sitemaps")
+    parser.add_argument("--traps", action="store_true", help="add calendar, faceted search and session-ID traps")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_args(args):
+    return SiteSpec(
+        pages=args.pages, fanout=args.fanout, sitemap_depth=args.sitemap_depth,
+        sitemap_branching=args.sitemap_branching, gzip_sitemaps=args.gzip_sitemaps,
+        latency_ms=args.latency_ms, error_rate=args.error_rate, words=args.words,
+        sitemap_coverage=args.sitemap_coverage, traps=args.traps, seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a synthetic website")
+    add_spec_arguments(parser)
+    parser.add_argument("--port", type=int, default=8800)
+    args = parser.parse_args()
+    server, base = serve(spec_from_args(args), port=args.port)
+    print(f"🌐 Serving {args.pages} pages at {base} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
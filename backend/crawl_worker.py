@@ -0,0 +1,67 @@
+# crawl_worker.py
+# Distributed crawl of one site: start it on as many hosts as needed, all pointing at the same MONGO_URI.
+# Seed once (fetches the sitemap and resets the shared frontier), then add workers anywhere:
+#   python crawl_worker.py https://example.com --seed --processes 4
+#   python crawl_worker.py https://example.com --processes 8        (on another host)
+import argparse
+import multiprocessing
+from urllib.parse import urlparse
+from scraper.CrawlWorker import CrawlWorker
+from scraper.HttpTransport import HttpTransport
+from scraper.MongoDBHandler import MongoDBHandler
+from scraper.RobotsTxt import RobotsTxt
+from scraper.SharedFrontier import SharedFrontier, SharedPacing
+from scraper.WebScraper import WebScraper
+from scraper.utils.get_website_name import get_website_name
+from scraper.utils.logger import get_logger
+
+# Under "scraper", so it shares the handler and level of the package's loggers
+logger = get_logger("scraper.crawl_worker")
+
+
+def build_worker(args):
+    db_handler = MongoDBHandler(get_website_name(args.domain))
+    transport = HttpTransport(max_connections_per_host=args.concurrency)
+    robots = RobotsTxt(args.domain, transport=transport)
+    delay = robots.get_crawl_delay()
+    if delay:
+        # Requests claim their slot in MongoDB, so every process on every host keeps to the one Crawl-delay
+        host = urlparse(args.domain).netloc
+        pacing = SharedPacing(db_handler.pacing_collection, host, delay)
+        transport.scheduler.set_crawl_delay(host, delay, shared_pacing=pacing)
+    frontier = SharedFrontier(db_handler.frontier_collection, max_pages=args.max_pages)
+    return CrawlWorker(args.domain, frontier, db_handler, transport=transport, robots=robots,
+                       batch_size=args.batch_size, lease_seconds=args.lease_seconds, concurrency=args.concurrency)
+
+
+def run_worker(args):
+    build_worker(args).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed crawl worker")
+    parser.add_argument("domain")
+    parser.add_argument("--seed", action="store_true", help="start a new crawl: save sitemap URLs, reset and seed the frontier")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to run on this host")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent fetches per process")
+    parser.add_argument("--batch-size", type=int, default=50, help="URLs leased at a time")
+    parser.add_argument("--lease-seconds", type=int, default=60, help="lease length, renewed by heartbeats")
+    parser.add_argument("--max-pages", type=int, default=100_000, help="approximate URL cap across all workers")
+    args = parser.parse_args()
+
+    if args.seed:
+        scraper = WebScraper(args.domain, checkpoint=None)
+        scraper.save_sitemap_urls()
+        frontier = SharedFrontier(scraper.db_handler.frontier_collection, max_pages=args.max_pages)
+        frontier.reset()
+        frontier.add([scraper.link_crawler.domain])
+        logger.info("🌱 Frontier seeded for %s", args.domain)
+
+    # Spawned, not forked: the seeding above leaves MongoClient and HTTP connection pools open, which a forked
+    # child would inherit mid-use. Each spawned worker builds its own in build_worker
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=run_worker, args=(args,)) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
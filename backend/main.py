@@ -1,17 +1,25 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from scraper.WebScraper import WebScraper 
 from fastapi.middleware.cors import CORSMiddleware
-from scraper.ContentScraper import ContentScraper
-import io
-import csv
-from fastapi.responses import Response
+from scraper.ContentScraper import ScrapeRunner
+from scraper.JobManager import JobManager
+from scraper.MongoDBHandler import MongoDBHandler
+from scraper.DataExporter import DataExporter, EXPORT_FORMATS
+from scraper.SharedFrontier import SharedFrontier
+from scraper.utils.get_website_name import get_website_name
+from scraper.utils.metrics import render_metrics
+import asyncio
+import os
+from fastapi.responses import Response, StreamingResponse
 class WebScraperAPI:
     """A class-based FastAPI app that manages the web scraping process."""
 
     def __init__(self):
         self.app = FastAPI(title="Web Scraper API", version="1.0")
         self.scrapers = {}  # Dictionary to store WebScraper instances
-        self.content_scrapers = {}  # Dictionary to store ContentScraper instances
+        self.content_scrapers = {}  # Dictionary to store ScrapeRunner instances
+        # Scrapes run as background jobs; the cap bounds how many run at once across all domains
+        self.jobs = JobManager(max_workers=int(os.getenv("SCRAPER_MAX_JOBS", "4")))
         self.app.add_middleware(  # Add CORS middleware
             CORSMiddleware,
             allow_origins=["*"],
@@ -30,35 +38,85 @@ class WebScraperAPI:
             return {"message": "Welcome to the Web Scraper API!"}
 
         @self.app.post("/scrape/")
-        def scrape_website(domain: str):
+        def scrape_website(domain: str, resume: bool = False):
             # Create WebScraper only if not already existing
             if domain not in self.scrapers:
                 self.scrapers[domain] = WebScraper(domain)
 
-            # Now run the scrape
+            # Queue the scrape; a crawl already queued or running for the domain is returned instead
             scraper = self.scrapers[domain]
-            scraper.process_website()
-            return {"message": f"Scraping started for {domain}"}
+            job = self.jobs.submit("scrape", domain, lambda job: scraper.process_website(resume=resume, progress=job.progress))
+            return {"message": f"Scraping started for {domain}", "job_id": job.id, "status": job.status}
 
         
         @self.app.post("/scrape-content/")
-        def scrape_content(domain: str):
+        def scrape_content(domain: str, incremental: bool = False):
             """
             1) Make sure there's a WebScraper for the domain.
-            2) Pass its db_handler into ContentScraper.
-            3) Let ContentScraper process.
+            2) Queue a ScrapeRunner job sharing its db_handler.
+            3) Jobs for one domain run in order, so this waits for a queued /scrape/ job.
             """
             if domain not in self.scrapers:
                 return {"error": f"No WebScraper found for {domain}; run /scrape/ first."}
 
-            # If we haven't created a ContentScraper yet, do it now
-            if domain not in self.content_scrapers:
-                db_handler = self.scrapers[domain].db_handler
-                self.content_scrapers[domain] = ContentScraper(domain, db_handler=db_handler)
+            scraper = self.scrapers[domain]
+
+            def run(job):
+                # Built when the job starts, so it sees the URLs stored by the crawl before it.
+                # Sharing the transport keeps one politeness scheduler (and Crawl-delay) per domain.
+                runner = ScrapeRunner(domain, incremental=incremental, db_handler=scraper.db_handler, transport=scraper.transport)
+                self.content_scrapers[domain] = runner
+                asyncio.run(runner.run(progress=job.progress))
+
+            job = self.jobs.submit("scrape-content", domain, run)
+            return {"message": f"Content scraping started for {domain}", "job_id": job.id, "status": job.status}
+
+        @self.app.get("/transport-stats/")
+        def get_transport_stats(domain: str):
+            """Connection reuse and the per-host request rates the scheduler has settled on."""
+            if domain not in self.scrapers:
+                return {"error": "Domain not found. Run /scrape/ first."}
+            return self.scrapers[domain].get_transport_stats()
+
+        @self.app.get("/link-graph/")
+        def get_link_graph(domain: str, sort_by: str = "pagerank", limit: int = 100, orphans_only: bool = False):
+            """Link graph summary plus per-page internal link count, outlinks, click depth, PageRank and orphan flag."""
+            if domain not in self.scrapers:
+                return {"error": "Domain not found. Run /scrape/ first."}
+            if sort_by not in ("pagerank", "internal_link_count", "outlink_count", "click_depth"):
+                raise HTTPException(status_code=400, detail=f"Cannot sort by {sort_by}")
+            db_handler = self.scrapers[domain].db_handler
+            return {
+                "summary": db_handler.get_domain_state("link_graph"),
+                "pages": db_handler.fetch_link_metrics(sort_by=sort_by, limit=min(limit, 1000), orphans_only=orphans_only),
+            }
 
-            content_scraper = self.content_scrapers[domain]
-            content_scraper.process_indexed_pages()
-            return {"message": f"Content scraping started for {domain}"}
+        @self.app.get("/frontier/")
+        def get_frontier(domain: str):
+            """URL counts by state in the shared frontier of a distributed crawl (see crawl_worker.py)."""
+            return SharedFrontier(self.get_db_handler(domain).frontier_collection).stats()
+
+        @self.app.get("/metrics")
+        def metrics():
+            """Prometheus metrics of every scrape and crawl running in this process."""
+            exposition = render_metrics()
+            if exposition is None:
+                raise HTTPException(status_code=501, detail="Install prometheus-client to expose metrics")
+            body, content_type = exposition
+            return Response(content=body, media_type=content_type)
+
+        @self.app.get("/jobs/")
+        def list_jobs(domain: str = None):
+            """Lists known jobs, optionally for one domain."""
+            return {"jobs": [job.snapshot() for job in self.jobs.list_jobs(domain)]}
+
+        @self.app.get("/jobs/{job_id}")
+        def get_job(job_id: str):
+            """Reports a job's status, pages done, pages/sec and ETA."""
+            job = self.jobs.get(job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail="Job not found")
+            return job.snapshot()
             
         @self.app.get("/website-name/")
         def get_website_name(domain: str):
@@ -66,28 +124,52 @@ class WebScraperAPI:
             return {"website_name": self.scrapers[domain].website_name}
 
         @self.app.get("/scraped-urls/")
-        def get_scraped_urls(domain: str):
+        def get_scraped_urls(domain: str, after: str = None, limit: int = 1000, fields: str = None):
             """
-            Return scraped URLs for a domain using the ContentScraper's db_handler.
+            Return one page of scraped URLs for a domain, keyed by URL.
+            Pass next_after back as `after` to get the following page.
             """
-            if domain not in self.content_scrapers:
-                return {"error": "Domain not found in content scrapers. Run /scrape-content/ first."}
+            limit = min(max(limit, 1), 10000)
+            pages = self.get_db_handler(domain).iter_pages(
+                fields=fields.split(",") + ["url"] if fields else None, after=after, limit=limit
+            )
+            urls = {page.pop("url"): page for page in pages}
+            # A full page means there may be more; an empty or short one ends the listing
+            next_after = next(reversed(urls)) if len(urls) == limit else None
+            return {"scraped_urls": urls, "next_after": next_after}
+
+        @self.app.get("/export/")
+        def export(domain: str, format: str = "csv", fields: str = None, after: str = None, limit: int = 0):
+            """Streams stored pages as CSV, NDJSON or Parquet, optionally only some fields or a range of URLs."""
+            return self.export_response(domain, format, fields.split(",") if fields else None, after, limit)
 
-            content_scraper = self.content_scrapers[domain]
-            urls = content_scraper.db_handler.fetch_scraped_urls()
-            return {"scraped_urls": urls}
         @self.app.get("/download-csv/")
         def download_csv(domain: str):
-            """Dynamically generates and returns extracted data CSV."""
-            if domain not in self.content_scrapers:
-                return {"error": "Domain not found. Run /scrape/ first."}
-            content_scraper = self.content_scrapers[domain]
-            csv_content = content_scraper.generate_extracted_data_csv()
-            response = Response(content=csv_content,media_type="text/csv")
-            response.headers["Content-Disposition"] = f"attachment; filename={domain}_extracted_data.csv"
-            return response
+            """Streams the extracted data of every page as CSV."""
+            return self.export_response(domain, "csv", filename=f"{domain}_extracted_data.csv")
             
         
+    def get_db_handler(self, domain):
+        """The db_handler of the domain's WebScraper, or a fresh one, so stored data stays readable after a restart."""
+        if domain in self.scrapers:
+            return self.scrapers[domain].db_handler
+        return MongoDBHandler(get_website_name(domain))
+
+    def export_response(self, domain, export_format, fields=None, after=None, limit=0, filename=None):
+        if export_format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unknown format {export_format}, use one of {list(EXPORT_FORMATS)}")
+        exporter = DataExporter(self.get_db_handler(domain))
+        try:
+            body = exporter.export(export_format, fields=fields, after=after, limit=max(limit, 0))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        filename = filename or f"{get_website_name(domain)}_pages.{export_format}"
+        return StreamingResponse(
+            body,
+            media_type=EXPORT_FORMATS[export_format],
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        )
+
     def get_app(self):
         """Returns the FastAPI instance."""
         return self.app
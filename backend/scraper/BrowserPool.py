@@ -0,0 +1,117 @@
+import asyncio
+from contextlib import asynccontextmanager
+from playwright.async_api import Browser
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+###  Browser Pool ###
+class PooledPage:
+    """A browser context with a single page, plus the bookkeeping used to decide when to recycle it."""
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.navigations = 0
+        self.crashed = False
+
+    async def close(self):
+        try:
+            await self.context.close()
+        except Exception as e:
+            logger.warning("⚠️ Failed to close browser context: %s", e)
+
+
+class BrowserPool:
+    """
+    Reusable pool of browser contexts and pages; request blocking is configured once per context,
+    from a domain's ResourcePolicy when one is given and from blocked_resource_types otherwise.
+    With `launch` (an async callable returning a new Browser) a browser that crashed is relaunched;
+    without it, or if relaunching fails, borrowing a page raises once no page is left.
+    """
+
+    def __init__(self, browser: Browser, size=5, max_navigations=50, blocked_resource_types=("image", "stylesheet", "font"),
+                 policy=None, launch=None):
+        self.browser = browser
+        self.size = size
+        self.max_navigations = max_navigations  # Recycle a page after this many uses to cap Chromium memory growth
+        self.blocked_resource_types = set(blocked_resource_types)
+        self.policy = policy
+        self.launch = launch
+        self._idle = asyncio.Queue()
+        self._slots = set()
+        self._relaunching = asyncio.Lock()
+        self._failure = None
+
+    async def _block_resources(self, route, request):
+        if self.policy is not None:
+            blocked = self.policy.should_block(request.url, request.resource_type)
+        else:
+            blocked = request.resource_type in self.blocked_resource_types
+        if blocked:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _new_slot(self):
+        context = await self.browser.new_context()
+        # 🚫 Block unnecessary resources for every page of this context
+        await context.route("**/*", self._block_resources)
+        page = await context.new_page()
+        slot = PooledPage(context, page)
+        page.on("crash", lambda _: setattr(slot, "crashed", True))
+        self._slots.add(slot)
+        return slot
+
+    async def start(self):
+        for _ in range(self.size):
+            self._idle.put_nowait(await self._new_slot())
+        return self
+
+    async def _relaunch(self):
+        async with self._relaunching:
+            if self.browser.is_connected():
+                return  # Still running, or already relaunched for another page
+            logger.warning("♻️ Browser is gone, relaunching it")
+            self.browser = await self.launch()
+
+    async def _recycle(self, slot):
+        self._slots.discard(slot)
+        await slot.close()
+        try:
+            return await self._new_slot()
+        except Exception as e:
+            failure = e
+        if self.launch is not None:
+            try:
+                await self._relaunch()
+                return await self._new_slot()
+            except Exception as e:
+                failure = e
+        logger.warning("⚠️ Failed to replace a browser page, pool shrinks to %d: %s", len(self._slots), failure)
+        if not self._slots:
+            # Nothing will ever be put back: wake the waiters instead of letting them block forever
+            self._failure = failure
+            self._idle.put_nowait(None)
+        return None
+
+    @asynccontextmanager
+    async def page(self):
+        """Borrows a page; it goes back to the pool afterwards, or is replaced if it crashed or is worn out."""
+        slot = await self._idle.get()
+        if slot is None:
+            self._idle.put_nowait(None)  # Passed on to the next waiter
+            raise RuntimeError("No browser pages left in the pool") from self._failure
+        try:
+            yield slot.page
+        finally:
+            slot.navigations += 1
+            if slot.crashed or slot.page.is_closed() or slot.navigations >= self.max_navigations:
+                slot = await self._recycle(slot)
+            if slot:
+                self._idle.put_nowait(slot)
+
+    async def close(self):
+        for slot in list(self._slots):
+            await slot.close()
+        self._slots.clear()
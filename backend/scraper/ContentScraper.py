@@ -1,75 +1,373 @@
 import asyncio
+import hashlib
+import multiprocessing
+import os
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
 from scraper.utils.get_website_name import get_website_name
 from scraper.MongoDBHandler import MongoDBHandler
-from scraper.MetadataScraper import MetadataScraper
-from scraper.InternalLinkGraphBuilder import InternalLinkGraphBuilder
+from scraper.MetadataScraper import MetadataScraper, init_extract_worker
+from scraper.MetadataBatchWriter import MetadataBatchWriter
 from scraper.NavigationLinkFilter import NavigationLinkFilter
+from scraper.HttpTransport import HttpTransport, is_html
+from scraper.BrowserPool import BrowserPool
+from scraper.RenderTierPolicy import RenderTierPolicy
+from scraper.ResourcePolicy import ResourcePolicy
+from scraper.InternalLinkGraphBuilder import InternalLinkGraphBuilder
+from scraper.DuplicateDetector import DuplicateDetector
+from scraper.utils.normalize_url import normalize_url
 from playwright.async_api import async_playwright
+from scraper.utils.logger import get_logger
+from scraper.utils.metrics import IN_FLIGHT, PAGES, QUEUE_DEPTH
+from scraper.utils.tracing import span
+
+logger = get_logger(__name__)
 
 class ScrapeRunner:
-    def __init__(self, domain, concurrency=5):
+    def __init__(self, domain, concurrency=5, incremental=False, transport=None, http_concurrency=16,
+                 max_page_navigations=50, render_mode="hybrid", extract_workers=None, parser_backend="auto",
+                 write_batch_size=500, db_handler=None, skip_duplicate_patterns=False, nav_sample_size=20,
+                 nav_model_max_age=7 * 24 * 3600, refresh_nav_model=False, blocked_resource_types=None,
+                 block_third_party_scripts=None):
         self.domain = domain
         self.website_name = get_website_name(domain)
-        self.database = MongoDBHandler(self.website_name)
-        self.scraped_urls = list(self.database.fetch_scraped_urls().keys())
-        self.nav_filter = NavigationLinkFilter(domain)
+        self.database = db_handler or MongoDBHandler(self.website_name)
+        # URLs the crawler found but never fetched may be 404s or files, so they are not scraped
+        self.scraped_urls = self.database.fetch_urls({"unverified": {"$exists": False}})
+        self.parser_backend = parser_backend
+        # Navigation model learned on an earlier run; reused until it is older than nav_model_max_age
+        self.nav_filter = NavigationLinkFilter(
+            domain, parser_backend, state=self.database.get_domain_state("nav_model"), max_age=nav_model_max_age
+        )
+        self.nav_sample_size = nav_sample_size
+        self.refresh_nav_model = refresh_nav_model
         self.concurrency = concurrency
+        self.incremental = incremental
+        self.transport = transport or HttpTransport()
+        self.http_concurrency = http_concurrency  # Parallel plain HTTP fetches (fingerprints, static tier)
+        self.max_page_navigations = max_page_navigations
+        # "hybrid" tries a plain HTTP fetch first and only renders when needed, "render" always uses Playwright
+        self.render_mode = render_mode
+        self.tier_policy = RenderTierPolicy(self.database.get_domain_state("render_tier"))
+        self.tier_counts = {"static": 0, "rendered": 0}
+        self.carried = 0  # Pages left unchanged in incremental mode
+        # Requests Playwright skips for this domain; None keeps the stored policy (or the defaults)
+        self.resource_policy = ResourcePolicy(
+            domain, self.database.get_domain_state("resource_policy"), blocked_resource_types, block_third_party_scripts
+        )
+        # Processes for HTML extraction; 0 keeps it on the event loop
+        self.extract_workers = (os.cpu_count() or 1) if extract_workers is None else extract_workers
+        self.write_batch_size = write_batch_size
+        # Near-duplicate detection; with skip_duplicate_patterns, URL patterns that keep yielding copies stop being scraped
+        self.duplicates = DuplicateDetector(skip_patterns=skip_duplicate_patterns)
+
+    async def _run_workers(self, urls, handle, workers):
+        """Feeds URLs to a fixed number of worker tasks, so pending work never grows with the site."""
+        url_iter = iter(urls)
+
+        async def worker():
+            for url in url_iter:
+                await handle(url)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
 
-    async def _analyze_nav_links(self, browser):
-        print("🔍 Sampling pages to detect navigational link patterns...")
-        sample_urls = random.sample(self.scraped_urls, min(20, len(self.scraped_urls)))
+    async def _analyze_nav_links(self, pool):
+        """
+        Learns the domain's navigation patterns unless a fresh model is stored.
+        Sample pages render in parallel batches of the pool size; sampling stops early once
+        a batch leaves the classification unchanged.
+        """
+        if self.nav_filter.is_fresh() and not self.refresh_nav_model:
+            logger.info("🧭 Reusing stored navigation model: %d nav paths from %d pages",
+                        len(self.nav_filter.nav_paths), self.nav_filter.page_count)
+            return
 
-        for i, url in enumerate(sample_urls, 1):
+        logger.info("🔍 Sampling pages to detect navigational link patterns...")
+        sample_urls = random.sample(self.scraped_urls, min(self.nav_sample_size, len(self.scraped_urls)))
+        min_pages = min(5, len(sample_urls))  # Pages to see before a classification is trusted
+
+        async def analyze(url):
             try:
-                print(f"📄 Analyzing sample page {i}: {url}")
-                page = await browser.new_page()
-                await page.route("**/*", lambda route, request: 
-                    route.abort() if request.resource_type in ["image", "stylesheet", "font"] else route.continue_()
-                )
-                await page.goto(url, wait_until="domcontentloaded", timeout=0)
-                html = await page.content()
+                logger.debug("📄 Analyzing sample page: %s", url)
+                async with pool.page() as page:
+                    await page.goto(url, wait_until="domcontentloaded", timeout=0)
+                    html = await page.content()
                 self.nav_filter.analyze_page(html)
-                await page.close()
             except Exception as e:
-                print(f"⚠️ Failed to analyze sample page {url}: {e}")
+                logger.warning("⚠️ Failed to analyze sample page %s: %s", url, e)
+
+        previous = None
+        for start in range(0, len(sample_urls), self.concurrency):
+            await asyncio.gather(*(analyze(url) for url in sample_urls[start:start + self.concurrency]))
+            if self.nav_filter.page_count < min_pages:
+                continue
+            current = self.nav_filter.classify()
+            if current == previous:
+                logger.info("🧭 Navigation patterns stable after %d pages, stopping early", self.nav_filter.page_count)
+                break
+            previous = current
 
+        if not self.nav_filter.page_count:
+            logger.warning("⚠️ No sample page could be analyzed, navigation links will be kept")
+            return
         self.nav_filter.finalize()
+        self.database.set_domain_state("nav_model", self.nav_filter.state())
+
+    async def _fingerprint(self, session, url, state):
+        """
+        Fetches a page over plain HTTP and returns (change-tracking fields, response).
+        Sends the stored validators so an unchanged page costs a 304 and keeps its stored hash.
+        Non-HTML bodies are not downloaded, so they get no content hash.
+        """
+        headers = {}
+        if state.get("content_hash"):
+            # A 304 is only useful with a stored hash to keep
+            if state.get("etag"):
+                headers["If-None-Match"] = state["etag"]
+            if state.get("http_last_modified"):
+                headers["If-Modified-Since"] = state["http_last_modified"]
+
+        response = await session.get(url, headers=headers or None, accept=is_html)
+        if response.status_code == 304 and state.get("content_hash"):
+            return {"content_hash": state["content_hash"], "etag": state.get("etag"),
+                    "http_last_modified": state.get("http_last_modified")}, response
+        if response.status_code != 200:
+            return {}, response
+        fingerprint = {
+            "etag": response.headers.get("etag"),
+            "http_last_modified": response.headers.get("last-modified"),
+        }
+        if not response.extensions.get("skipped"):
+            fingerprint["content_hash"] = hashlib.sha256(response.content).hexdigest()
+        return fingerprint, response
+
+    def _select_candidate_urls(self, change_state):
+        """
+        Drops stored URLs whose sitemap <lastmod> matches the one they were last scraped at; their stored
+        metadata and links_to stay untouched in MongoDB. The rest are checked by _check_changed while scraping.
+        """
+        candidates = []
+        for url in self.scraped_urls:
+            state = change_state.get(url, {})
+            lastmod = state.get("lastmod")
+            if lastmod and lastmod == state.get("scraped_lastmod"):
+                self.carried += 1
+            else:
+                candidates.append(url)
+        return candidates
 
-    async def run(self):
-        scraped_metadata = []
-        sem = asyncio.Semaphore(self.concurrency)
+    async def _check_changed(self, session, url, state):
+        """
+        Returns (changed, fingerprint fields, response) for a page without a matching lastmod.
+        Without a lastmod, a page is unchanged when its content hash matches the stored one.
+        The response of a changed page is handed to the static tier, so the page is downloaded once.
+        """
+        lastmod = state.get("lastmod")
+        try:
+            fingerprint, response = await self._fingerprint(session, url, state)
+        except Exception as e:
+            logger.warning("⚠️ Failed to fingerprint %s: %s", url, e)
+            fingerprint, response = {}, None
+
+        if lastmod is None and fingerprint.get("content_hash") and fingerprint["content_hash"] == state.get("content_hash"):
+            return False, fingerprint, None
+        if response is not None and response.status_code != 200:
+            response = None  # A 304 has no body to extract; the static tier fetches the page itself
+        return True, {**fingerprint, "scraped_lastmod": lastmod}, response
+
+    async def _scrape_static(self, session, url, response=None):
+        """
+        Fetches a page over HTTP (unless `response` already holds it) and extracts it; returns None when
+        the page needs a browser. Non-HTML resources are only recorded with their content type: their
+        body is never downloaded or rendered.
+        """
+        if response is None:
+            try:
+                with span("scrape.static", url=url):
+                    response = await session.get(url, accept=is_html)
+            except Exception as e:
+                logger.warning("⚠️ Static fetch failed for %s, rendering instead: %s", url, e)
+                return None
+        if response.status_code != 200:
+            return None
+        if response.extensions.get("skipped"):
+            logger.debug("⏭️ %s is not HTML, recorded without rendering", url)
+            return {"url": url, "content_type": response.headers.get("content-type"), "headings": {}}
+
+        html = response.text
+        data = await self.scraper.extract_async(html, url)
+        reason = self.tier_policy.needs_render(html, data)
+        self.tier_policy.record(reason is not None)
+        if reason:
+            logger.debug("🖥️ %s needs rendering (%s)", url, reason)
+            return None
+        return data
+
+    async def _scrape_rendered(self, pool, url):
+        """Renders a page in the browser, paced by the same per-host scheduler as plain HTTP fetches."""
+        scheduler = self.transport.scheduler
+        host = urlparse(url).netloc
+        await scheduler.acquire_async(host)
+        start = time.monotonic()
+        data = None
+        scripts_blocked = self.resource_policy.block_third_party_scripts
+        try:
+            data = await self.scraper.scrape(pool, url)
+        finally:
+            # A page that failed to load comes back without headings
+            loaded = bool(data and data["headings"])
+            scheduler.release(host, time.monotonic() - start, error=not loaded)
+        if loaded:
+            # A page that loads but stays blank may need the third-party scripts the policy blocks
+            self.resource_policy.record(not self.tier_policy.is_blank(data), scripts_blocked)
+        return data
+
+    async def run(self, progress=None):
+        """Scrapes every stored URL (or only changed ones in incremental mode); progress(done, total) follows each page."""
+        writer = MetadataBatchWriter(self.database, batch_size=self.write_batch_size)
+        done = 0
+
+        urls_to_scrape, change_state, simhashes = self.scraped_urls, {}, {}
+        if self.incremental:
+            change_state = self.database.fetch_change_state()
+            urls_to_scrape = self._select_candidate_urls(change_state)
+            # Carried-forward pages keep their stored SimHash, so new pages are compared against them too
+            simhashes = self.database.fetch_simhashes()
+            candidates = set(urls_to_scrape)
+            for url, simhash_hex in simhashes.items():
+                if url not in candidates:
+                    self.duplicates.add(url, simhash_hex)
 
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=True)
+            # The pool size bounds how many pages render at once; it relaunches the browser if it crashes
+            pool = await BrowserPool(browser, size=self.concurrency, max_navigations=self.max_page_navigations,
+                                     policy=self.resource_policy,
+                                     launch=lambda: p.chromium.launch(headless=True)).start()
 
             # Step 1: Analyze header/footer nav patterns
-            await self._analyze_nav_links(browser)
+            await self._analyze_nav_links(pool)
 
-            # Step 2: Init scraper with nav_filter
-            self.scraper = MetadataScraper(self.domain, self.nav_filter)
+            # Step 2: Init scraper with nav_filter, extraction runs in worker processes
+            executor = None
+            if self.extract_workers:
+                executor = ProcessPoolExecutor(
+                    max_workers=self.extract_workers,
+                    mp_context=multiprocessing.get_context("spawn"),  # Don't fork a process that runs an event loop and the browser driver
+                    initializer=init_extract_worker,
+                    initargs=(self.domain, list(self.nav_filter.nav_paths), self.parser_backend),
+                )
+            self.scraper = MetadataScraper(self.domain, self.nav_filter, self.parser_backend, executor=executor)
 
-            async def scrape_url(url):
-                async with sem:
-                    try:
-                        print(f"🔍 Scraping {url}")
-                        data = await self.scraper.scrape(browser, url)
-                        scraped_metadata.append(data)
-                    except Exception as e:
-                        print(f"❌ Failed to scrape {url}: {e}")
+            in_flight = IN_FLIGHT.labels("scrape")
+            queue_depth = QUEUE_DEPTH.labels("scrape")
 
-            await asyncio.gather(*(scrape_url(url) for url in self.scraped_urls))
-            await browser.close()
+            async def scrape_url(session, url):
+                nonlocal done
+                in_flight.inc()
+                outcome = "failed"
+                try:
+                    if self.duplicates.should_skip(url):
+                        logger.debug("⏭️ Skipping %s, its URL pattern keeps producing duplicates", url)
+                        outcome = "skipped"
+                        return
+                    fingerprint, response = {}, None
+                    if self.incremental:
+                        changed, fingerprint, response = await self._check_changed(
+                            session, url, change_state.get(url, {}))
+                        if not changed:
+                            self.carried += 1
+                            self.duplicates.add(url, simhashes.get(url))
+                            outcome = "unchanged"
+                            return
+                    logger.debug("🔍 Scraping %s", url)
+                    with span("scrape.page", url=url):
+                        data = None
+                        if self.render_mode == "hybrid" and self.tier_policy.should_try_static():
+                            data = await self._scrape_static(session, url, response)
+                            if data:
+                                self.tier_counts["static"] += 1
+                                outcome = "static"
+                        if data is None:
+                            data = await self._scrape_rendered(pool, url)
+                            self.tier_counts["rendered"] += 1
+                            outcome = "rendered"
+                        if data.get("content_type"):
+                            outcome = "non_html"
+                        elif data["headings"]:  # Empty only when the page failed to load
+                            data.update(fingerprint)
+                            self.duplicates.add(url, data["simhash"])
+                        else:
+                            outcome = "failed"
+                        await writer.add(data)
+                except Exception as e:
+                    outcome = "failed"
+                    logger.error("❌ Failed to scrape %s: %s", url, e)
+                finally:
+                    done += 1
+                    in_flight.dec()
+                    queue_depth.set(len(urls_to_scrape) - done)
+                    PAGES.labels("scrape", outcome).inc()
+                    if progress:
+                        progress(done, len(urls_to_scrape))
 
-        # Step 3: Count internal links
-        graph_builder = InternalLinkGraphBuilder(scraped_metadata)
-        link_counts = graph_builder.build_internal_link_counts()
+            # Enough workers to keep the HTTP tier busy; renders are still capped by the browser pool
+            async with self.transport.async_session() as session:
+                await self._run_workers(
+                    urls_to_scrape, lambda url: scrape_url(session, url), max(self.concurrency, self.http_concurrency)
+                )
+            await writer.flush()
+            await pool.close()
+            await pool.browser.close()
+            if executor:
+                executor.shutdown()
 
-        for data in scraped_metadata:
-            data["internal_link_count"] = link_counts.get(data["url"], 0)
+        if self.incremental:
+            logger.info("♻️ Incremental mode: %d changed pages, %d carried forward",
+                        len(self.scraped_urls) - self.carried, self.carried)
+        logger.info("📊 Pages by tier: %d static, %d rendered", self.tier_counts["static"], self.tier_counts["rendered"])
+        if self.render_mode == "hybrid":
+            self.database.set_domain_state("render_tier", self.tier_policy.state())
+        if self.resource_policy.blocked:
+            logger.info("🚫 Blocked browser requests: %s", ", ".join(
+                f"{count} {resource_type}" for resource_type, count in self.resource_policy.blocked.most_common()))
+        self.database.set_domain_state("resource_policy", self.resource_policy.state())
 
-        # Step 4: Save to DB
-        if scraped_metadata:
-            self.database.update_metadata(scraped_metadata)
+        # Step 3: Analyze the link graph across everything stored, carried-forward pages included
+        if writer.written:
+            self.analyze_link_graph()
+            self.save_duplicates()
         else:
-            print("⚠️ No metadata to update in MongoDB!")
+            logger.warning("⚠️ No metadata to update in MongoDB!")
+
+    def save_duplicates(self):
+        """Stores near-duplicate clusters per page and a summary of the URL patterns producing them."""
+        clusters = self.duplicates.index.clusters()
+        self.database.update_duplicate_clusters(clusters)
+        patterns = self.duplicates.duplicate_patterns()
+        self.database.set_domain_state("duplicates", {
+            "clusters": len(clusters),
+            "duplicate_pages": sum(len(members) - 1 for members in clusters.values()),
+            "duplicate_patterns": patterns,
+            "skipped": self.duplicates.skipped,
+        })
+        logger.info("🧬 %d near-duplicate clusters, %d duplicate URL patterns, %d pages skipped",
+                    len(clusters), len(patterns), self.duplicates.skipped)
+
+    def analyze_link_graph(self):
+        """
+        Builds the internal link graph from MongoDB and stores internal link counts, click depth, PageRank
+        and orphan flags per page.
+        """
+        # Sitemap URLs are the ones stored as "indexed"; link lists are streamed from the cursor into the edge arrays
+        sitemap_urls = self.database.fetch_urls({"status": "indexed"})
+        graph = InternalLinkGraphBuilder(self.database.fetch_link_data(), homepage=normalize_url(self.domain),
+                                         sitemap_urls=sitemap_urls).build()
+        self.database.update_link_metrics(graph.page_metrics())
+        summary = graph.summary()
+        self.database.set_domain_state("link_graph", summary)
+        logger.info("🕸️ %d orphan pages, %d unreachable from the homepage, max click depth %s",
+                    summary["orphans"], summary["unreachable"], summary["max_click_depth"])
+        return summary
@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+from scraper.utils.bulk_update import bulk_update
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUEUED = "queued"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"  # Answered with an error status: not a page, and not fetched again on resume
+DISALLOWED = "disallowed"  # Disallowed by robots.txt: never fetched
+
+###  Crawl Checkpoint ###
+class CrawlCheckpoint:
+    """
+    Records the state of every URL the crawler has claimed (queued, in progress, done, failed, disallowed) and
+    writes the changes to a store at a fixed interval, so a killed crawl can resume where it stopped.
+    Fetches that raised are put back to queued, so a resumed crawl tries them again.
+    """
+
+    def __init__(self, store, interval=30):
+        self.store = store
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def mark(self, url, state):
+        with self._lock:
+            self._pending[url] = state
+
+    def flush(self):
+        """Writes the states changed since the last flush."""
+        with self._lock:
+            changes, self._pending = self._pending, {}
+        if changes:
+            self.store.save(changes)
+            logger.debug("💾 Checkpointed %d URL states", len(changes))
+
+    def load(self):
+        """Returns {url: state} for every URL claimed by the last checkpointed crawl."""
+        return self.store.load()
+
+    def clear(self):
+        with self._lock:
+            self._pending = {}
+        self.store.clear()
+
+
+class MongoCheckpointStore:
+    """Keeps one document per URL in a MongoDB collection, so checkpoints stay small deltas."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def save(self, changes):
+        bulk_update(
+            self.collection, [({"_id": url}, {"$set": {"state": state}}, True) for url, state in changes.items()],
+            ordered=False,
+        )
+
+    def load(self):
+        return {entry["_id"]: entry["state"] for entry in self.collection.find({}, {"state": 1})}
+
+    def clear(self):
+        self.collection.delete_many({})
+
+
+class FileCheckpointStore:
+    """Appends state changes as JSON lines to a local file; the last line for a URL wins on load."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def save(self, changes):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for url, state in changes.items():
+                f.write(json.dumps({"url": url, "state": state}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load(self):
+        states = {}
+        if not os.path.exists(self.path):
+            return states
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line from a crash mid-write
+                states[entry["url"]] = entry["state"]
+        return states
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
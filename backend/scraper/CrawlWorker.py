@@ -0,0 +1,136 @@
+import asyncio
+import os
+import socket
+import time
+from scraper.HttpTransport import HttpTransport
+from scraper.InternalLinkCrawler import InternalLinkCrawler, has_skipped_extension
+from scraper.FingerprintSet import FingerprintSet
+from scraper.SharedFrontier import DONE, FAILED, QUEUED
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+###  Crawl Worker ###
+class CrawlWorker:
+    """
+    One of any number of crawl processes, on one or more hosts, that crawl a site together.
+    URLs come from a SharedFrontier in leased batches; the worker fetches a batch concurrently,
+    admits the links it finds back into the frontier and merges the crawled URLs into MongoDB.
+    A worker that dies simply stops heartbeating, and its batch is reclaimed by the others.
+    """
+
+    def __init__(self, domain, frontier, db_handler, transport=None, robots=None, worker_id=None, batch_size=50,
+                 lease_seconds=60, concurrency=16, parser_backend="auto", idle_wait=2):
+        self.frontier = frontier
+        self.db_handler = db_handler
+        self.transport = transport or HttpTransport()
+        self.robots = robots
+        # Fetching, link normalization and parsing are the single-node crawler's
+        self.crawler = InternalLinkCrawler(domain, concurrency=concurrency, transport=self.transport,
+                                           parser_backend=parser_backend)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.concurrency = concurrency
+        self.idle_wait = idle_wait  # Seconds to wait for other workers' batches to add URLs
+        self.admitted = FingerprintSet()  # URLs this worker already sent to the frontier, to skip repeat writes
+        self.leases = {}  # token -> Lease currently held
+        self.stats = {"pages": 0, "batches": 0, "admitted": 0, "retried": 0}
+
+    def _admit(self, urls, state):
+        """Adds URLs this worker has not sent before to the frontier; returns how many were new to it."""
+        # Only URLs that fit under the frontier's cap are remembered, so a trimmed one can be sent again
+        urls = self.frontier.fit(url for url in urls if url not in self.admitted)
+        added = self.frontier.add(urls, state)
+        for url in urls:
+            self.admitted.add(url)
+        return added
+
+    def _merge(self, lease, links, done_urls, crawled, retry, failed):
+        """
+        Admits discovered URLs to the frontier, stores the batch's pages and releases the lease:
+        URLs whose fetch failed go back to the queue, those answered with an error status are failed.
+        """
+        admitted = self._admit(links, QUEUED)
+        self._admit(done_urls, DONE)
+        self.db_handler.merge_crawled_urls(crawled + done_urls)
+        if retry:
+            self.stats["retried"] += self.frontier.release(lease, retry)
+        if failed:
+            self.frontier.complete(lease, failed, state=FAILED)
+        self.frontier.complete(lease)
+        return admitted
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            for lease in list(self.leases.values()):
+                held = await asyncio.to_thread(self.frontier.heartbeat, lease, self.lease_seconds)
+                if held < len(lease.urls):
+                    logger.warning("⚠️ %d URLs of a lease were reclaimed from %s", len(lease.urls) - held, self.worker_id)
+
+    async def run_async(self, progress=None):
+        """Leases and crawls batches until the frontier is drained; progress(pages) follows each batch."""
+        robots = await asyncio.to_thread(self.robots.rules) if self.robots else None
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start = time.perf_counter()
+
+        async def fetch(session, url):
+            async with semaphore:
+                return await self.crawler.fetch_page(session, url)
+
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            async with self.transport.async_session() as session:
+                while True:
+                    lease = await asyncio.to_thread(self.frontier.lease, self.worker_id, self.batch_size,
+                                                    self.lease_seconds)
+                    if not lease.urls:
+                        if await asyncio.to_thread(self.frontier.is_drained):
+                            break
+                        await asyncio.sleep(self.idle_wait)  # Other workers still hold batches that may add URLs
+                        continue
+
+                    self.leases[lease.token] = lease
+                    pages = await asyncio.gather(*(fetch(session, url) for url in lease.urls))
+                    record_files = self.crawler.non_html == "record"
+                    links, done_urls, crawled, retry, failed = set(), set(), [], [], []
+                    for url, page in zip(lease.urls, pages):
+                        if "error" in page:
+                            # No response is worth another attempt; an error status is final
+                            (retry if page["error"] is None else failed).append(url)
+                            continue
+                        if record_files or not page.get("non_html"):
+                            crawled.append(url)
+                        canonical = page["canonical"]
+                        if canonical and canonical != url:
+                            done_urls.add(canonical)  # Same content under its canonical URL: recorded, not fetched
+                        for link in page["links"]:
+                            if has_skipped_extension(link):
+                                if record_files:
+                                    done_urls.add(link)  # A file: recorded but never fetched
+                            elif robots is None or robots.is_allowed(link):
+                                links.add(link)
+                            else:
+                                done_urls.add(link)  # Disallowed: recorded but never fetched
+                    admitted = await asyncio.to_thread(self._merge, lease, sorted(links), sorted(done_urls), crawled,
+                                                       retry, failed)
+                    del self.leases[lease.token]
+
+                    self.stats["pages"] += len(lease.urls)
+                    self.stats["batches"] += 1
+                    self.stats["admitted"] += admitted
+                    if progress:
+                        progress(self.stats["pages"])
+        finally:
+            heartbeat.cancel()
+
+        elapsed = time.perf_counter() - start
+        self.stats["elapsed"] = round(elapsed, 3)
+        self.stats["pages_per_sec"] = round(self.stats["pages"] / elapsed, 2) if elapsed else 0.0
+        logger.info("⚡ Worker %s crawled %d pages in %d batches (%s pages/sec)",
+                    self.worker_id, self.stats["pages"], self.stats["batches"], self.stats["pages_per_sec"])
+        return self.stats
+
+    def run(self, progress=None):
+        return asyncio.run(self.run_async(progress=progress))
@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+DEFAULT_FIELDS = (
+    "url", "status", "title", "meta_description", "canonical", "headings", "links_to",
+    "internal_link_count", "outlink_count", "click_depth", "pagerank", "is_orphan",
+    "duplicate_cluster", "lastmod",
+)
+
+
+def _parquet_types():
+    """Column types for known fields; anything else is exported as a JSON string."""
+    return {
+        "headings": pa.struct([(f"h{i}", pa.int64()) for i in range(1, 7)]),
+        "links_to": pa.list_(pa.string()),
+        "internal_link_count": pa.int64(),
+        "outlink_count": pa.int64(),
+        "click_depth": pa.int64(),
+        "duplicate_cluster_size": pa.int64(),
+        "pagerank": pa.float64(),
+        "is_orphan": pa.bool_(),
+    }
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that keeps what the Parquet writer produced until the next drain()."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+###  Data Exporter ###
+class DataExporter:
+    """
+    Streams stored pages as CSV, NDJSON or Parquet straight from a MongoDB cursor,
+    a batch at a time, so an export starts at once and its memory does not grow with the site.
+    """
+
+    def __init__(self, db_handler, batch_size=1000):
+        self.db_handler = db_handler
+        self.batch_size = batch_size
+
+    def export(self, export_format, fields=None, after=None, limit=0):
+        """Returns a generator of bytes for the pages after URL `after` (sorted by URL), at most `limit` (0 = all)."""
+        fields = list(fields or DEFAULT_FIELDS)
+        if "url" not in fields:
+            fields.insert(0, "url")
+        pages = self.db_handler.iter_pages(fields=fields, after=after, limit=limit, batch_size=self.batch_size)
+        if export_format == "csv":
+            return self.iter_csv(pages, fields)
+        if export_format == "ndjson":
+            return self.iter_ndjson(pages)
+        if export_format == "parquet":
+            if not PARQUET_AVAILABLE:
+                raise ValueError("Parquet export needs the pyarrow package")
+            return self.iter_parquet(pages, fields)
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    def _batches(self, pages):
+        batch = []
+        for page in pages:
+            batch.append(page)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def iter_csv(self, pages, fields):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for batch in self._batches(pages):
+            for page in batch:
+                # Nested values (headings, links_to) go into one cell as JSON
+                writer.writerow([
+                    json.dumps(value) if isinstance(value, (dict, list)) else value
+                    for value in (page.get(field) for field in fields)
+                ])
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")  # Header of an empty export
+
+    def iter_ndjson(self, pages):
+        for batch in self._batches(pages):
+            yield "".join(json.dumps(page, default=str) + "\n" for page in batch).encode("utf-8")
+
+    def iter_parquet(self, pages, fields):
+        known = _parquet_types()
+        schema = pa.schema([(field, known.get(field, pa.string())) for field in fields])
+        sink = _ChunkSink()
+        with pq.ParquetWriter(sink, schema) as writer:
+            for batch in self._batches(pages):
+                columns = {}
+                for field in fields:
+                    values = [page.get(field) for page in batch]
+                    if field not in known:
+                        values = [value if value is None or isinstance(value, str) else json.dumps(value, default=str)
+                                  for value in values]
+                    elif field == "headings":
+                        values = [value or None for value in values]  # {} marks a page that failed to load
+                    columns[field] = values
+                # One row group per batch, sent as soon as it is encoded
+                writer.write_table(pa.table(columns, schema=schema))
+                yield sink.drain()
+        yield sink.drain()  # Footer
@@ -0,0 +1,106 @@
+from collections import defaultdict
+from scraper.utils.simhash import hamming_distance
+from scraper.utils.url_pattern import url_pattern
+
+
+class SimHashIndex:
+    """
+    LSH index over 64-bit SimHashes. The hash is cut into max_distance + 1 bands, so by the pigeonhole
+    principle any two hashes within max_distance bits agree exactly on at least one band; a lookup only
+    compares against pages sharing a band instead of every page.
+    """
+
+    def __init__(self, max_distance=3):
+        self.max_distance = max_distance
+        self.band_count = max_distance + 1
+        self.band_bits = 64 // self.band_count
+        self.band_mask = (1 << self.band_bits) - 1
+        self.bands = [defaultdict(list) for _ in range(self.band_count)]
+        self.hashes = {}  # url -> simhash
+        self.parent = {}  # Union-find over near-duplicate pairs; roots are the first page seen of each cluster
+
+    def _band_keys(self, value):
+        return [(value >> (i * self.band_bits)) & self.band_mask for i in range(self.band_count)]
+
+    def near(self, value):
+        """URLs whose SimHash is within max_distance bits of `value`."""
+        candidates = set()
+        for band, key in zip(self.bands, self._band_keys(value)):
+            candidates.update(band.get(key, ()))
+        return [url for url in candidates if hamming_distance(self.hashes[url], value) <= self.max_distance]
+
+    def add(self, url, value):
+        """Indexes a page; returns the URLs it is a near duplicate of."""
+        if url in self.hashes:
+            return []
+        matches = self.near(value)
+        self.hashes[url] = value
+        self.parent[url] = url
+        for band, key in zip(self.bands, self._band_keys(value)):
+            band[key].append(url)
+        for match in matches:
+            self._union(match, url)
+        return matches
+
+    def _find(self, url):
+        root = url
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[url] != root:  # Path compression
+            self.parent[url], url = root, self.parent[url]
+        return root
+
+    def _union(self, earlier, later):
+        root_earlier, root_later = self._find(earlier), self._find(later)
+        if root_earlier != root_later:
+            self.parent[root_later] = root_earlier
+
+    def clusters(self):
+        """Returns {root url: [member urls]} for every cluster of two or more near-duplicate pages."""
+        groups = defaultdict(list)
+        for url in self.hashes:
+            groups[self._find(url)].append(url)
+        return {root: members for root, members in groups.items() if len(members) > 1}
+
+
+###  Duplicate Detector ###
+class DuplicateDetector:
+    """
+    Flags near-duplicate pages through a SimHashIndex and tracks how often each URL pattern
+    (see url_pattern, shared with the crawl frontier) produces duplicates, so patterns that
+    keep yielding copies, like facets and pagination, can be skipped before they are rendered.
+    """
+
+    def __init__(self, max_distance=3, skip_patterns=False, min_samples=10, skip_ratio=0.8):
+        self.index = SimHashIndex(max_distance)
+        self.skip_patterns = skip_patterns
+        self.min_samples = min_samples  # Pages of a pattern to see before judging it
+        self.skip_ratio = skip_ratio  # Share of duplicates at which a pattern is skipped
+        self.pattern_counts = defaultdict(lambda: [0, 0])  # pattern -> [pages, duplicates]
+        self.skipped = 0
+
+    def add(self, url, simhash_hex):
+        """Records a scraped page; returns True when it is a near duplicate of a page seen before."""
+        if not simhash_hex:
+            return False
+        is_duplicate = bool(self.index.add(url, int(simhash_hex, 16)))
+        counts = self.pattern_counts[url_pattern(url)]
+        counts[0] += 1
+        counts[1] += is_duplicate
+        return is_duplicate
+
+    def should_skip(self, url):
+        """True when skip_patterns is on and the URL's pattern has mostly produced duplicates."""
+        if not self.skip_patterns:
+            return False
+        pages, duplicates = self.pattern_counts.get(url_pattern(url), (0, 0))
+        if pages >= self.min_samples and duplicates / pages >= self.skip_ratio:
+            self.skipped += 1
+            return True
+        return False
+
+    def duplicate_patterns(self):
+        return sorted(
+            (pattern for pattern, (pages, duplicates) in self.pattern_counts.items()
+             if pages >= self.min_samples and duplicates / pages >= self.skip_ratio),
+        )
@@ -0,0 +1,111 @@
+import hashlib
+import math
+from array import array
+
+
+def url_fingerprint(url):
+    """64-bit fingerprint of a (normalized) URL; never 0, which marks an empty slot."""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+###  Fingerprint Set ###
+class FingerprintSet:
+    """
+    Exact set of URLs stored as 64-bit fingerprints in one open-addressing array, about 24 bytes per URL
+    (16 to 32 as the half-full table doubles) instead of a full string plus a set entry.
+    Two different URLs collide with probability ~n²/2⁶⁵, i.e. practically never at crawl sizes.
+    """
+
+    def __init__(self, capacity=1024, max_load=0.5):
+        self.max_load = max_load
+        self._count = 0
+        self._allocate(max(8, 1 << math.ceil(math.log2(capacity / max_load))))
+
+    def _allocate(self, size):
+        self._slots = array("Q", bytes(8 * size))
+        self._mask = size - 1
+
+    def _index(self, fingerprint):
+        # Linear probing; stops at the fingerprint or at the first empty slot
+        slots, mask = self._slots, self._mask
+        i = fingerprint & mask
+        while True:
+            slot = slots[i]
+            if slot == fingerprint or slot == 0:
+                return i
+            i = (i + 1) & mask
+
+    def add(self, url):
+        """Adds a URL; returns True if it was not in the set yet."""
+        return self.add_fingerprint(url_fingerprint(url))
+
+    def add_fingerprint(self, fingerprint):
+        i = self._index(fingerprint)
+        if self._slots[i]:
+            return False
+        self._slots[i] = fingerprint
+        self._count += 1
+        if self._count > len(self._slots) * self.max_load:
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self._slots
+        self._allocate(len(old) * 2)
+        for fingerprint in old:
+            if fingerprint:
+                self._slots[self._index(fingerprint)] = fingerprint
+
+    def __contains__(self, url):
+        return self._slots[self._index(url_fingerprint(url))] != 0
+
+    def __len__(self):
+        return self._count
+
+    def memory_bytes(self):
+        return self._slots.itemsize * len(self._slots)
+
+
+###  Bloom Filter ###
+class BloomFilter:
+    """
+    Approximate URL set with the FingerprintSet interface, for crawls too big to keep exact:
+    about 1.2 bytes per URL at a 1% false-positive rate. A false positive makes a new URL look seen,
+    so that share of URLs is skipped; nothing seen is ever reported as new.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01):
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, fingerprint):
+        # Double hashing: k positions from the two 32-bit halves of one fingerprint
+        low, high = fingerprint & 0xFFFFFFFF, (fingerprint >> 32) | 1
+        return [(low + i * high) % self.size for i in range(self.hashes)]
+
+    def add(self, url):
+        return self.add_fingerprint(url_fingerprint(url))
+
+    def add_fingerprint(self, fingerprint):
+        bits = self._bits
+        added = False
+        for position in self._positions(fingerprint):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                added = True
+        if added:
+            self._count += 1
+        return added
+
+    def __contains__(self, url):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(url_fingerprint(url)))
+
+    def __len__(self):
+        return self._count
+
+    def memory_bytes(self):
+        return len(self._bits)
@@ -0,0 +1,217 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+THROTTLE_STATUSES = (429, 503)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POLL_INTERVAL = 0.05  # How often a request waiting for a free concurrency slot checks again
+
+
+def parse_retry_after(value):
+    """Returns the delay in seconds from a Retry-After header (seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class HostState:
+    """Token bucket, concurrency window and latency estimate for one host."""
+
+    def __init__(self, rate, concurrency):
+        self.rate = rate
+        self.concurrency = concurrency
+        self.tokens = 1.0
+        self.refilled_at = time.monotonic()
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.crawl_delay = None
+        self.shared_pacing = None  # SharedPacing of a distributed crawl, applied on top of the local pacing
+        self.latency = None  # EWMA of response time in seconds
+        self.baseline_latency = None
+        self.last_decrease = 0.0
+        self.slow_start = True  # Grow exponentially until the host first pushes back, like TCP
+        self.counters = {"requests": 0, "throttled": 0, "errors": 0, "retries": 0}
+
+    def refill(self, now):
+        capacity = 1.0 if self.crawl_delay else max(self.rate, 1.0)
+        self.tokens = min(capacity, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+
+###  Host Scheduler ###
+class HostScheduler:
+    """
+    Shared politeness scheduler: every request to a host takes a token from that host's bucket
+    and a slot in its concurrency window.
+    Rate and window grow additively while responses stay fast and are cut multiplicatively on
+    429/503, errors or rising latency (AIMD). Crawl-delay caps the rate and Retry-After pauses the host.
+    """
+
+    def __init__(self, initial_rate=5.0, max_rate=50.0, min_rate=0.2, initial_concurrency=4, max_concurrency=16,
+                 latency_factor=2.0, min_latency_increase=0.05, backoff_base=0.5, backoff_cap=60.0):
+        self.initial_rate = initial_rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_factor = latency_factor  # Latency above baseline * factor counts as congestion...
+        self.min_latency_increase = min_latency_increase  # ...once it is also this many seconds above it
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(self.initial_rate, min(self.initial_concurrency, self.max_concurrency))
+        return state
+
+    def set_crawl_delay(self, host, seconds, shared_pacing=None):
+        """
+        Applies a robots.txt Crawl-delay: at most one request every `seconds`, one at a time.
+        With shared_pacing (a SharedPacing) every request also waits for its slot across all crawl processes.
+        """
+        if not seconds or seconds <= 0:
+            return
+        with self._lock:
+            state = self._host(host)
+            state.crawl_delay = seconds
+            state.shared_pacing = shared_pacing
+            state.rate = min(state.rate, 1.0 / seconds)
+            state.concurrency = 1
+        logger.info("🐢 Crawl-delay %ss for %s", seconds, host)
+
+    # ---- acquiring a slot ----
+    def _try_acquire(self, host):
+        """Takes a token and a concurrency slot, returning 0, or returns how long to wait before trying again."""
+        with self._lock:
+            state = self._host(host)
+            now = time.monotonic()
+            state.refill(now)
+            if state.blocked_until > now:
+                return state.blocked_until - now
+            if state.in_flight >= int(state.concurrency):
+                return POLL_INTERVAL
+            if state.tokens < 1:
+                return (1 - state.tokens) / state.rate
+            state.tokens -= 1
+            state.in_flight += 1
+            state.counters["requests"] += 1
+            return 0
+
+    def acquire(self, host):
+        while True:
+            wait = self._try_acquire(host)
+            if not wait:
+                break
+            time.sleep(wait)
+        pacing = self.hosts[host].shared_pacing
+        if pacing is not None:
+            try:
+                time.sleep(pacing.reserve())
+            except BaseException:
+                self.abandon(host)
+                raise
+
+    async def acquire_async(self, host):
+        while True:
+            wait = self._try_acquire(host)
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+        pacing = self.hosts[host].shared_pacing
+        if pacing is not None:
+            try:
+                await asyncio.sleep(await asyncio.to_thread(pacing.reserve))
+            except BaseException:
+                self.abandon(host)  # The slot is held while waiting for the shared one
+                raise
+
+    # ---- feedback ----
+    def release(self, host, latency, status=None, error=False, retry_after=None):
+        """Frees the slot and adapts the host's rate and window to the outcome of the request."""
+        with self._lock:
+            state = self._host(host)
+            state.in_flight = max(state.in_flight - 1, 0)
+            now = time.monotonic()
+
+            if retry_after:
+                state.blocked_until = max(state.blocked_until, now + retry_after)
+
+            if error or status in THROTTLE_STATUSES or (status or 0) >= 500:
+                state.counters["throttled" if status in THROTTLE_STATUSES else "errors"] += 1
+                self._decrease(state, now, 0.5)
+                return
+
+            state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+            if state.baseline_latency is None or state.latency < state.baseline_latency:
+                state.baseline_latency = state.latency
+            else:
+                # Drift up slowly so one lucky early response doesn't pin the baseline forever
+                state.baseline_latency += (state.latency - state.baseline_latency) * 0.01
+
+            rise = state.latency - state.baseline_latency
+            if state.latency > state.baseline_latency * self.latency_factor and rise > self.min_latency_increase:
+                self._decrease(state, now, 0.8)
+                return
+
+            if state.crawl_delay is not None:
+                return
+            if state.slow_start:
+                # Doubles the window every round trip and the rate every second
+                state.concurrency = min(self.max_concurrency, state.concurrency + 1.0)
+                state.rate = min(self.max_rate, state.rate + 1.0)
+            else:
+                # Additive increase: about +1 slot per window and +1 req/s per second of successful traffic
+                state.concurrency = min(self.max_concurrency, state.concurrency + 1.0 / state.concurrency)
+                state.rate = min(self.max_rate, state.rate + 1.0 / state.rate)
+
+    def abandon(self, host):
+        """Frees the slot of a request that ended without an outcome to learn from, e.g. because it was cancelled."""
+        with self._lock:
+            state = self._host(host)
+            state.in_flight = max(state.in_flight - 1, 0)
+
+    def _decrease(self, state, now, factor):
+        # One cut per round trip, so a burst of failures from requests already in flight counts once
+        if now - state.last_decrease < max(state.latency or 0.0, 1.0):
+            return
+        state.last_decrease = now
+        state.slow_start = False
+        state.concurrency = max(1.0, state.concurrency * factor)
+        state.rate = max(self.min_rate, state.rate * factor)
+
+    def backoff(self, host, attempt, retry_after=None):
+        """Delay before retry number `attempt` (0-based): Retry-After when given, else full-jitter exponential backoff."""
+        with self._lock:
+            self._host(host).counters["retries"] += 1
+        if retry_after is not None:
+            return min(retry_after, self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def stats(self):
+        """Returns the current rate, window, latency and counters for every host seen."""
+        with self._lock:
+            return {
+                host: {
+                    "rate": round(state.rate, 2),
+                    "concurrency": int(state.concurrency),
+                    "in_flight": state.in_flight,
+                    "latency_ms": round(state.latency * 1000, 1) if state.latency is not None else None,
+                    "crawl_delay": state.crawl_delay,
+                    **state.counters,
+                }
+                for host, state in self.hosts.items()
+            }
@@ -0,0 +1,206 @@
+import hashlib
+import re
+from functools import lru_cache
+from bs4 import BeautifulSoup
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import lxml.html
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+NON_TEXT_TAGS = ("head", "script", "style", "noscript", "template")  # Never part of the visible body text
+DOCUMENT_ROOT = "[document]"  # Name BeautifulSoup gives the document node, kept so DOM paths match across backends
+DIGITS = re.compile(r"\d+")
+RAW_TITLE = re.compile(r"<title\b[^>]*>(.*?)</title", re.IGNORECASE | re.DOTALL)
+TAG_START = re.compile(r"</?[A-Za-z]")
+
+
+def structural_segment(tag, element_id=None, classes=None, role=None):
+    """
+    One step of a structural DOM path: tag#id.classes[role]. Digits are dropped so
+    per-item names like post-123 collapse into one segment.
+    """
+    segment = tag
+    if element_id and element_id.strip():
+        segment += "#" + DIGITS.sub("", element_id.strip())
+    if classes:
+        if isinstance(classes, str):
+            classes = classes.split()
+        names = sorted({DIGITS.sub("", name) for name in classes} - {""})
+        if names:
+            segment += "." + ".".join(names)
+    if role and role.strip():
+        segment += "[" + role.strip().lower() + "]"
+    return segment
+
+
+@lru_cache(maxsize=1 << 16)
+def path_signature(path):
+    """Stable 64-bit hash of a DOM path; the same in every process, so it can be stored and shared with workers."""
+    return int.from_bytes(hashlib.blake2b(path.encode("utf-8"), digest_size=8).digest(), "big")
+
+###  HTML Extractor ###
+class HtmlExtractor:
+    """
+    Pulls the page facts the scrapers need (title, meta description, rel=canonical, heading counts
+    and anchors with their DOM paths) out of an HTML document.
+    The "lxml" backend does it in a single C-backed tree walk; "bs4" is the pure-Python fallback.
+    With collect_text=True the visible body text is returned too, under "text".
+    With structural_paths=True each path step also carries the element's id, classes and role,
+    and anchors come with the path's 64-bit path_signature instead of the path string.
+    """
+
+    def __init__(self, backend="auto", collect_text=False, structural_paths=False):
+        if backend == "auto":
+            backend = "lxml" if LXML_AVAILABLE else "bs4"
+        if backend == "lxml" and not LXML_AVAILABLE:
+            logger.warning("⚠️ lxml is not installed, falling back to the BeautifulSoup parser")
+            backend = "bs4"
+        self.backend = backend
+        self.collect_text = collect_text
+        self.structural_paths = structural_paths
+
+    def extract(self, html: str) -> dict:
+        """Returns {"title", "meta_description", "canonical", "headings", "anchors": [(href, dom_path), ...]}."""
+        if self.backend == "lxml":
+            return self._extract_lxml(html)
+        return self._extract_bs4(html)
+
+    def _empty(self):
+        facts = {
+            "title": None,
+            "meta_description": None,
+            "canonical": None,
+            "headings": {tag: 0 for tag in HEADING_TAGS},
+            "anchors": [],
+        }
+        if self.collect_text:
+            facts["text"] = ""
+        return facts
+
+    def _extract_bs4(self, html):
+        soup = BeautifulSoup(html, "html.parser")
+        facts = self._empty()
+
+        facts["title"] = soup.title.string.strip() if soup.title and soup.title.string else None
+        meta_desc = soup.find("meta", attrs={"name": "description"})
+        facts["meta_description"] = meta_desc["content"].strip() if meta_desc and meta_desc.has_attr("content") else None
+        canonical = soup.find("link", rel="canonical", href=True)
+        facts["canonical"] = canonical["href"].strip() if canonical else None
+
+        for tag in soup.find_all(list(HEADING_TAGS)):
+            facts["headings"][tag.name] += 1
+
+        for a in soup.find_all("a", href=True):
+            path = []
+            element = a
+            while element and element.name:
+                if self.structural_paths and element.name != DOCUMENT_ROOT:
+                    path.append(structural_segment(
+                        element.name, element.get("id"), element.get("class"), element.get("role")
+                    ))
+                else:
+                    path.append(element.name)
+                element = element.parent
+            dom_path = " > ".join(reversed(path))
+            facts["anchors"].append((a["href"], path_signature(dom_path) if self.structural_paths else dom_path))
+
+        if self.collect_text:
+            for tag in soup.find_all(list(NON_TEXT_TAGS)):
+                tag.decompose()
+            facts["text"] = " ".join(soup.get_text(" ").split())
+
+        return facts
+
+    def _title_has_tags(self, html):
+        """True when the first <title> of the source contains tags, which html.parser would make child elements."""
+        match = RAW_TITLE.search(html)
+        return bool(match and TAG_START.search(match.group(1)))
+
+    def _parse_lxml(self, html):
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # Unicode strings with an XML encoding declaration must be handed over as bytes
+            return lxml.html.document_fromstring(html.encode("utf-8"))
+
+    def _extract_lxml(self, html):
+        facts = self._empty()
+        if not html or not html.strip():
+            return facts
+        try:
+            root = self._parse_lxml(html)
+        except etree.ParserError:
+            return facts
+
+        headings = facts["headings"]
+        anchors = facts["anchors"]
+        title_seen = meta_seen = canonical_seen = False
+        # One prefix string per open element, so a DOM path is built once per element, not once per anchor
+        paths = [DOCUMENT_ROOT]
+        collect_text = self.collect_text
+        structural_paths = self.structural_paths
+        texts = []
+        hidden = 0  # Depth inside elements whose text is not visible
+
+        events = ("start", "end", "comment", "pi") if collect_text else ("start", "end")
+        for event, element in etree.iterwalk(root, events=events):
+            tag = element.tag
+            if not isinstance(tag, str):
+                # Comments and processing instructions; only the text after them can be visible
+                if not hidden and element.tail:
+                    texts.append(element.tail)
+                continue
+            if event == "end":
+                paths.pop()
+                if collect_text:
+                    if tag in NON_TEXT_TAGS:
+                        hidden -= 1
+                    if not hidden and element.tail:
+                        texts.append(element.tail)
+                continue
+
+            if structural_paths:
+                path = paths[-1] + " > " + structural_segment(
+                    tag, element.get("id"), element.get("class"), element.get("role")
+                )
+            else:
+                path = paths[-1] + " > " + tag
+            paths.append(path)
+            if collect_text:
+                if tag in NON_TEXT_TAGS:
+                    hidden += 1
+                elif not hidden and element.text:
+                    texts.append(element.text)
+
+            if tag == "a":
+                href = element.get("href")
+                if href is not None:
+                    anchors.append((href, path_signature(path) if structural_paths else path))
+            elif tag in headings:
+                headings[tag] += 1
+            elif tag == "title" and not title_seen:
+                title_seen = True
+                # Same rule as BeautifulSoup's .string: only a title made of a single text node counts.
+                # lxml keeps tags inside <title> as text, so a "<" sends us back to the source to check
+                if element.text and len(element) == 0 and not ("<" in element.text and self._title_has_tags(html)):
+                    facts["title"] = element.text.strip()
+            elif tag == "meta" and not meta_seen and element.get("name") == "description":
+                meta_seen = True
+                content = element.get("content")
+                facts["meta_description"] = content.strip() if content is not None else None
+            elif tag == "link" and not canonical_seen and "canonical" in (element.get("rel") or "").lower().split():
+                href = element.get("href")
+                if href is not None:
+                    canonical_seen = True
+                    facts["canonical"] = href.strip()
+
+        if collect_text:
+            facts["text"] = " ".join(" ".join(texts).split())
+        return facts
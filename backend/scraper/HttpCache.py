@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+###  HTTP Cache ###
+class HttpCache:
+    """Persistent on-disk response cache keyed by URL, storing validators, bodies and parsed results."""
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024, max_age=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.body_dir = os.path.join(cache_dir, "bodies")
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(self.body_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                derived TEXT
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+        self._db.commit()
+        self.total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self.evict()
+
+    def _body_path(self, url):
+        return os.path.join(self.body_dir, hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+    def lookup(self, url):
+        """Returns the cached entry for a URL, or None if it is missing or older than max_age."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, content_type, stored_at, derived FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        etag, last_modified, content_type, stored_at, derived = row
+        if time.time() - stored_at > self.max_age or not os.path.exists(self._body_path(url)):
+            return None
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_type": content_type,
+            "derived": json.loads(derived) if derived is not None else None,
+        }
+
+    def validators(self, entry):
+        """Builds If-None-Match / If-Modified-Since headers from a cached entry."""
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def load_body(self, url):
+        with open(self._body_path(url), "rb") as f:
+            return f.read()
+
+    def store(self, url, response, derived=None):
+        """Stores a 200 response that carries at least one validator, with an optional parsed result."""
+        if not response.headers.get("etag") and not response.headers.get("last-modified"):
+            return  # Nothing to revalidate against
+
+        body = response.content
+        tmp_path = self._body_path(url) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, self._body_path(url))
+        self._commit(url, response.headers, len(body), derived)
+
+    @contextmanager
+    def body_writer(self, url, headers):
+        """
+        Yields a CacheBodyWriter that copies a streamed body to disk as it is read.
+        The entry is only committed if the wrapped stream was read to the end.
+        """
+        if not headers.get("etag") and not headers.get("last-modified"):
+            yield CacheBodyWriter(None)
+            return
+
+        tmp_path = self._body_path(url) + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                writer = CacheBodyWriter(f)
+                yield writer
+            if writer.complete:
+                os.replace(tmp_path, self._body_path(url))
+                self._commit(url, headers, writer.size, None)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def open_body(self, url):
+        return open(self._body_path(url), "rb")
+
+    def _commit(self, url, headers, size, derived):
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM entries WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, headers.get("etag"), headers.get("last-modified"), headers.get("content-type"), size, now, now,
+                 json.dumps(derived) if derived is not None else None),
+            )
+            self._db.commit()
+            self.total_bytes += size - (old[0] if old else 0)
+
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def store_derived(self, url, derived):
+        with self._lock:
+            self._db.execute("UPDATE entries SET derived = ? WHERE url = ?", (json.dumps(derived), url))
+            self._db.commit()
+
+    def revalidated(self, url):
+        """Marks an entry as fresh again after a 304."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE entries SET stored_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self._db.commit()
+
+    def _delete(self, rows):
+        for url, size in rows:
+            try:
+                os.remove(self._body_path(url))
+            except FileNotFoundError:
+                pass
+            self.total_bytes -= size
+        self._db.executemany("DELETE FROM entries WHERE url = ?", [(url,) for url, _ in rows])
+        self._db.commit()
+
+    def evict(self):
+        """Drops entries older than max_age, then least recently used ones until under 90% of max_bytes."""
+        with self._lock:
+            expired = self._db.execute(
+                "SELECT url, size FROM entries WHERE stored_at < ?", (time.time() - self.max_age,)
+            ).fetchall()
+            self._delete(expired)
+
+            if self.total_bytes > self.max_bytes:
+                target = self.max_bytes * 0.9
+                victims = []
+                freed = 0
+                for url, size in self._db.execute("SELECT url, size FROM entries ORDER BY accessed_at"):
+                    if self.total_bytes - freed <= target:
+                        break
+                    victims.append((url, size))
+                    freed += size
+                self._delete(victims)
+
+        if expired:
+            logger.info("🧹 Evicted %d expired entries from the HTTP cache", len(expired))
+
+
+class CacheBodyWriter:
+    """Tees chunks of a streamed body into a cache file."""
+
+    def __init__(self, f):
+        self.f = f
+        self.size = 0
+        self.complete = False
+
+    def wrap(self, chunks):
+        for chunk in chunks:
+            if self.f is not None:
+                self.f.write(chunk)
+            self.size += len(chunk)
+            yield chunk
+        self.complete = True
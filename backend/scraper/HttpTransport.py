@@ -0,0 +1,345 @@
+import asyncio
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlparse
+import httpx
+from scraper.HostScheduler import HostScheduler, RETRY_STATUSES, parse_retry_after
+from scraper.utils.logger import get_logger
+from scraper.utils.metrics import BODY_BYTES, CONNECT_SECONDS, FETCH_SECONDS, RETRIES, status_outcome
+
+logger = get_logger(__name__)
+
+# httpcore trace events of a new connection; connect_tcp includes the DNS lookup
+CONNECT_PHASES = {"connection.connect_tcp": "tcp", "connection.start_tls": "tls"}
+# Start of the connection phase in progress; trace events of one request share its task (or thread) context
+_phase_started = ContextVar("phase_started", default=None)
+
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+# Headers describing the encoded body, dropped once a limited read has decoded it
+_BODY_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+def is_html(content_type):
+    """True for HTML content types; a missing Content-Type is given the benefit of the doubt."""
+    return not content_type or content_type.split(";", 1)[0].strip().lower() in HTML_TYPES
+
+
+def content_length(headers):
+    try:
+        return int(headers.get("content-length"))
+    except (TypeError, ValueError):
+        return None
+
+
+try:
+    import h2  # noqa: F401  (only needed to enable HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+###  HTTP Transport ###
+class HttpTransport:
+    """
+    Shared HTTP layer: pooled keep-alive connections, gzip/brotli decoding and optional HTTP/2.
+    Requests are paced per host by a HostScheduler and retried with jittered backoff on 429/5xx and network errors.
+    """
+
+    def __init__(self, max_connections=100, max_connections_per_host=16, max_keepalive_connections=32,
+                 http2=False, timeout=20, user_agent="Mozilla/5.0", cache=None, scheduler=None, max_retries=3):
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("⚠️ HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=30,
+        )
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        # httpx advertises gzip/deflate and, when brotli is installed, br in Accept-Encoding
+        self.headers = {"User-Agent": user_agent}
+        self.cache = cache  # Optional HttpCache for conditional GETs
+        # max_connections_per_host is the ceiling; the scheduler finds the rate each host can take
+        self.scheduler = scheduler or HostScheduler(max_concurrency=max_connections_per_host)
+        self.max_retries = max_retries
+
+        self._client = None
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "connections_opened": 0, "tls_handshakes": 0, "not_modified": 0,
+                         "body_bytes": 0, "bodies_skipped": 0, "bodies_truncated": 0}
+
+    # ---- connection-reuse counters ----
+    def _record(self, event_name):
+        phase_name, _, step = event_name.rpartition(".")
+        phase = CONNECT_PHASES.get(phase_name)
+        if phase is None:
+            return
+        if step == "started":
+            _phase_started.set(time.perf_counter())
+            return
+        if step != "complete":
+            return
+        started = _phase_started.get()
+        if started is not None:
+            CONNECT_SECONDS.labels(phase).observe(time.perf_counter() - started)
+        with self._lock:
+            self.counters["connections_opened" if phase == "tcp" else "tls_handshakes"] += 1
+
+    def _trace(self, event_name, info):
+        self._record(event_name)
+
+    async def _atrace(self, event_name, info):
+        self._record(event_name)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def stats(self):
+        """Returns request/connection counters, including how many requests reused a pooled connection."""
+        with self._lock:
+            stats = dict(self.counters)
+        stats["connections_reused"] = max(stats["requests"] - stats["connections_opened"], 0)
+        stats["reuse_ratio"] = round(stats["connections_reused"] / stats["requests"], 3) if stats["requests"] else 0.0
+        stats["hosts"] = self.scheduler.stats()
+        return stats
+
+    # ---- sync client (sitemaps, robots.txt) ----
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    headers=self.headers, timeout=self.timeout, limits=self.limits,
+                    http2=self.http2, follow_redirects=True,
+                )
+            return self._client
+
+    def _retry_delay(self, url, attempt, response=None, error=None):
+        """Returns how long to wait before retrying, or None when the request should not be retried."""
+        if attempt >= self.max_retries:
+            return None
+        if response is not None and response.status_code not in RETRY_STATUSES:
+            return None
+        retry_after = parse_retry_after(response.headers.get("retry-after")) if response is not None else None
+        delay = self.scheduler.backoff(urlparse(url).netloc, attempt, retry_after)
+        reason = response.status_code if response is not None else type(error).__name__
+        RETRIES.inc()
+        logger.info("🔁 Retrying %s in %.1fs (%s)", url, delay, reason)
+        return delay
+
+    def _send(self, url, send):
+        """Runs send() under the host's scheduler slot, retrying throttled and failed attempts."""
+        host = urlparse(url).netloc
+        for attempt in itertools.count():
+            self.scheduler.acquire(host)
+            self._count("requests")
+            start = time.monotonic()
+            try:
+                response = send()
+            except httpx.HTTPError as e:
+                FETCH_SECONDS.labels("error").observe(time.monotonic() - start)
+                self.scheduler.release(host, time.monotonic() - start, error=True)
+                # Only network errors are retried; redirect loops, invalid URLs and decoding errors are final
+                delay = self._retry_delay(url, attempt, error=e) if isinstance(e, httpx.TransportError) else None
+                if delay is None:
+                    raise
+            except BaseException:
+                self.scheduler.abandon(host)  # Never leak the host's slot, or later requests to it wait forever
+                raise
+            else:
+                FETCH_SECONDS.labels(status_outcome(response.status_code)).observe(time.monotonic() - start)
+                self.scheduler.release(
+                    host, time.monotonic() - start, status=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get("retry-after")),
+                )
+                delay = self._retry_delay(url, attempt, response=response)
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+
+    def get(self, url, headers=None, timeout=None):
+        """GET a URL over the shared pooled client."""
+        response = self._send(url, lambda: self.client.get(
+            url, headers=headers, timeout=timeout or self.timeout, extensions={"trace": self._trace}
+        ))
+        self._count_body(response.num_bytes_downloaded)
+        return response
+
+    def _count_body(self, downloaded, avoided=0):
+        self._count("body_bytes", downloaded)
+        BODY_BYTES.labels("downloaded").inc(downloaded)
+        if avoided > 0:
+            BODY_BYTES.labels("avoided").inc(avoided)
+
+    # ---- conditional GETs ----
+    def _cached_response(self, url, entry):
+        headers = {"content-type": entry["content_type"]} if entry["content_type"] else {}
+        return httpx.Response(200, headers=headers, content=self.cache.load_body(url), request=httpx.Request("GET", url))
+
+    def _handle_parsed(self, url, response, entry, parse):
+        if response.status_code == 304 and entry:
+            # Unchanged since the last run: reuse the stored parse result instead of parsing again
+            self._count("not_modified")
+            self.cache.revalidated(url)
+            if entry["derived"] is not None:
+                return 304, entry["derived"]
+            result = parse(self._cached_response(url, entry))
+            self.cache.store_derived(url, result)
+            return 304, result
+
+        if response.status_code != 200:
+            return response.status_code, None
+
+        result = parse(response)
+        # A skipped or truncated body is not the resource its validators describe, so it is never cached
+        limited = response.extensions.get("skipped") or response.extensions.get("truncated")
+        if self.cache and not limited:
+            self.cache.store(url, response, derived=result)
+        return 200, result
+
+    @contextmanager
+    def stream_body(self, url, timeout=None, chunk_size=64 * 1024):
+        """
+        Streams a GET body as (status_code, chunk iterator) without holding it in memory.
+        With a cache, a 304 replays the stored body from disk and a 200 is copied to the cache as it is read.
+        """
+        entry = self.cache.lookup(url) if self.cache else None
+        headers = self.cache.validators(entry) if entry else None
+        request = self.client.build_request(
+            "GET", url, headers=headers, timeout=timeout or self.timeout, extensions={"trace": self._trace}
+        )
+        response = self._send(url, lambda: self.client.send(request, stream=True))
+        try:
+            if response.status_code == 304 and entry:
+                self._count("not_modified")
+                self.cache.revalidated(url)
+                with self.cache.open_body(url) as f:
+                    yield 304, iter(lambda: f.read(chunk_size), b"")
+            elif response.status_code != 200:
+                yield response.status_code, iter(())
+            elif self.cache:
+                with self.cache.body_writer(url, response.headers) as writer:
+                    yield 200, writer.wrap(response.iter_bytes(chunk_size))
+            else:
+                yield 200, response.iter_bytes(chunk_size)
+        finally:
+            response.close()
+
+    # ---- async client (crawler) ----
+    @asynccontextmanager
+    async def async_session(self):
+        """Yields an AsyncHttpSession bound to the running event loop, sharing this transport's settings and counters."""
+        async with httpx.AsyncClient(
+            headers=self.headers, timeout=self.timeout, limits=self.limits,
+            http2=self.http2, follow_redirects=True,
+        ) as client:
+            yield AsyncHttpSession(self, client)
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+class AsyncHttpSession:
+    """Async view of an HttpTransport; an httpx.AsyncClient is tied to one event loop, so one exists per session."""
+
+    def __init__(self, transport, client):
+        self.transport = transport
+        self.client = client
+
+    async def get(self, url, headers=None, timeout=None, accept=None, max_bytes=None):
+        """
+        GET a URL, paced by the transport's scheduler and retried like HttpTransport.get.
+        With `accept` (a predicate on the Content-Type, e.g. is_html) or `max_bytes`, the body is streamed:
+        a 200 whose type is not accepted is closed without reading its body, and at most max_bytes are read
+        of the rest. Such responses carry the extensions "skipped" and "truncated".
+        """
+        transport = self.transport
+        scheduler = transport.scheduler
+        host = urlparse(url).netloc
+        limited = accept is not None or max_bytes is not None
+        for attempt in itertools.count():
+            await scheduler.acquire_async(host)
+            transport._count("requests")
+            start = time.monotonic()
+            try:
+                request = self.client.build_request(
+                    "GET", url, headers=headers, timeout=timeout or transport.timeout,
+                    extensions={"trace": transport._atrace},
+                )
+                response = await self.client.send(request, stream=limited)
+                if limited:
+                    response = await self._read_limited(response, accept, max_bytes)
+                else:
+                    transport._count_body(response.num_bytes_downloaded)
+            except httpx.HTTPError as e:
+                FETCH_SECONDS.labels("error").observe(time.monotonic() - start)
+                scheduler.release(host, time.monotonic() - start, error=True)
+                delay = transport._retry_delay(url, attempt, error=e) if isinstance(e, httpx.TransportError) else None
+                if delay is None:
+                    raise
+            except BaseException:
+                scheduler.abandon(host)  # Cancelled, or failed outside httpx
+                raise
+            else:
+                FETCH_SECONDS.labels(status_outcome(response.status_code)).observe(time.monotonic() - start)
+                scheduler.release(
+                    host, time.monotonic() - start, status=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get("retry-after")),
+                )
+                delay = transport._retry_delay(url, attempt, response=response)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+
+    async def _read_limited(self, response, accept, max_bytes):
+        """Reads as much of a streamed response as `accept` and `max_bytes` allow, into a plain Response."""
+        transport = self.transport
+        skipped = truncated = False
+        chunks, size = [], 0
+        try:
+            if response.status_code == 200 and accept is not None and not accept(response.headers.get("content-type")):
+                skipped = True
+            elif response.status_code == 200:
+                async for chunk in response.aiter_bytes():
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if max_bytes is not None and size >= max_bytes:
+                        truncated = True
+                        break
+        finally:
+            await response.aclose()
+
+        # Bytes the server announced but that never had to cross the network
+        announced = content_length(response.headers)
+        downloaded = response.num_bytes_downloaded
+        transport._count_body(downloaded, announced - downloaded if announced is not None else 0)
+        if skipped:
+            transport._count("bodies_skipped")
+        if truncated:
+            transport._count("bodies_truncated")
+        headers = [(key, value) for key, value in response.headers.multi_items() if key.lower() not in _BODY_HEADERS]
+        return httpx.Response(
+            response.status_code, headers=headers, content=b"".join(chunks)[:max_bytes], request=response.request,
+            extensions={"skipped": skipped, "truncated": truncated},
+        )
+
+    async def get_parsed(self, url, parse, timeout=None, accept=None, max_bytes=None):
+        """
+        GETs a URL and returns (status_code, parse(response)); parsing and cache writes run in a worker thread.
+        With a cache, validators are sent and a 304 returns the stored result without parsing.
+        `parse` must return something JSON-serializable. The result is None for non-200/304 responses.
+        `accept` and `max_bytes` limit the body read as in get(); `parse` sees the limited response.
+        """
+        cache = self.transport.cache
+        entry = await asyncio.to_thread(cache.lookup, url) if cache else None  # SQLite and disk: off the loop
+        headers = cache.validators(entry) if entry else None
+        response = await self.get(url, headers=headers, timeout=timeout, accept=accept, max_bytes=max_bytes)
+        return await asyncio.to_thread(self.transport._handle_parsed, url, response, entry, parse)
@@ -1,73 +1,310 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+from scraper.HttpTransport import HttpTransport, is_html
+from scraper.HtmlExtractor import HtmlExtractor
+from scraper.FingerprintSet import FingerprintSet, BloomFilter
+from scraper.PriorityFrontier import PriorityFrontier
+from scraper.CrawlCheckpoint import QUEUED, IN_PROGRESS, DONE, FAILED, DISALLOWED
+from scraper.utils.normalize_url import normalize_url
+from scraper.utils.logger import get_logger
+from scraper.utils.metrics import IN_FLIGHT, PAGES, PARSE_SECONDS, QUEUE_DEPTH, timed
+from scraper.utils.tracing import span
+
+logger = get_logger(__name__)
+
+# Links to these are documents, media and archives, not pages; they are never requested
+SKIPPED_EXTENSIONS = frozenset({
+    "pdf", "doc", "docx", "xls", "xlsx", "ppt", "pptx", "odt", "csv", "zip", "gz", "tgz", "rar", "7z", "tar",
+    "exe", "dmg", "apk", "iso", "jpg", "jpeg", "png", "gif", "webp", "svg", "ico", "bmp", "tif", "tiff", "avif",
+    "mp3", "wav", "ogg", "mp4", "m4v", "mov", "avi", "webm", "mkv", "woff", "woff2", "ttf", "eot", "css", "js",
+})
+
+
+def has_skipped_extension(url):
+    path = urlsplit(url).path
+    last = path.rsplit("/", 1)[-1]
+    return "." in last and last.rsplit(".", 1)[-1].lower() in SKIPPED_EXTENSIONS
 
 ###  Internal Link Crawler ###
 class InternalLinkCrawler:
-    """Crawls internal links dynamically using multithreading."""
+    """Crawls internal links with a pool of concurrent fetchers, most promising URLs first (see PriorityFrontier)."""
 
-    def __init__(self, domain):
-        self.domain = self.remove_trailing_slash(domain)
-        self.base_netloc = urlparse(self.domain).netloc
+    def __init__(self, domain, concurrency=16, transport=None, checkpoint=None, robots=None, dedupe="exact",
+                 parser_backend="auto", max_repeats=3, max_body_bytes=1024 * 1024, non_html="skip"):
+        self.domain = normalize_url(domain) or self.remove_trailing_slash(domain)
+        self.base_netloc = urlsplit(self.domain).netloc
+        self.concurrency = concurrency
+        self.transport = transport or HttpTransport()
+        self.checkpoint = checkpoint  # Optional CrawlCheckpoint for resumable crawls
+        self.robots = robots  # Optional RobotsTxt; disallowed URLs are listed in unverified but never fetched
+        # "exact" keeps 64-bit fingerprints of seen URLs, "bloom" a Bloom filter for very large crawls
+        self.dedupe = dedupe
+        self.extractor = HtmlExtractor(parser_backend)
+        self.max_repeats = max_repeats  # A path segment repeated this often is a relative-link loop
+        # Links are extracted from the first max_body_bytes of a page; None reads whole pages
+        self.max_body_bytes = max_body_bytes
+        # Non-HTML responses and links to files are never parsed: "skip" leaves them out of the results,
+        # "record" keeps their URLs
+        self.non_html = non_html
+        self.seen = None
+        self.frontier = None
+        self.found = []
+        # URL -> why it was found but never fetched ("not fetched", "crawl trap", "fetch failed", "disallowed")
+        self.unverified = {}
+        self.stats = {}
 
     def remove_trailing_slash(self, url):
         """Removes the trailing slash from a URL if present."""
         return url[:-1] if url.endswith("/") else url
 
     def normalize_url(self, base_url, link):
-        """Ensures extracted URLs are absolute and prevents malformed URLs."""
-        absolute_url = urljoin(base_url, link)
-        parsed = urlparse(absolute_url)
+        """Resolves a link to its canonical internal URL; None for external, malformed and looping links."""
+        url = normalize_url(link, base=base_url)
+        if not url:
+            return None
+        parts = urlsplit(url)
+        if parts.netloc != self.base_netloc:
+            return None  # Ignore external links
 
-        # Prevent self-referential and malformed URLs
-        if not parsed.netloc or parsed.netloc != self.base_netloc:
-            return None  # Ignore external links and empty URLs
+        # Relative links resolved against the wrong base nest forever (/a/b/a/b/a/b...); deep paths are fine
+        segments = [segment for segment in parts.path.split("/") if segment]
+        if len(segments) >= self.max_repeats and max(Counter(segments).values()) >= self.max_repeats:
+            return None
+        return url
 
-        # Ensure URL does not contain repeating paths (fix infinite loop issue)
-        path_parts = list(filter(None, parsed.path.split('/')))
-        normalized_path = "/".join(path_parts[:5])  # Limit path depth to avoid looping
+    def parse_page(self, url, response):
+        """
+        Returns a page's internal links and its rel=canonical URL when that points inside the site.
+        Responses whose body was skipped as non-HTML come back flagged "non_html", without links.
+        """
+        if response.extensions.get("skipped"):
+            return {"links": [], "canonical": None, "non_html": True}
+        if response.extensions.get("truncated"):
+            logger.debug("✂️ %s is larger than %d bytes, links taken from its start", url, self.max_body_bytes)
+        with timed(PARSE_SECONDS.labels("crawl")):
+            facts = self.extractor.extract(response.text)
+        links = {self.normalize_url(url, href) for href, _ in facts["anchors"]}
+        links.discard(None)
+        canonical = self.normalize_url(url, facts["canonical"]) if facts["canonical"] else None
+        return {"links": sorted(links), "canonical": canonical}
 
-        normalized_url = f"{parsed.scheme}://{parsed.netloc}/{normalized_path}".rstrip("/")
-        return normalized_url
+    def new_seen_set(self, max_pages):
+        if self.dedupe == "bloom":
+            return BloomFilter(capacity=max(max_pages, 1000), error_rate=0.001)
+        return FingerprintSet(capacity=max_pages)
 
-    def fetch_page(self, url, visited):
-        """Fetches and extracts internal links from a single page."""
-        if url in visited or "#" in url:
-            return []
+    def record(self, url, state=DONE):
+        """Adds a URL to the crawl's results; returns False if it was already seen."""
+        if not self.seen.add(url):
+            return False
+        self.found.append(url)
+        if self.checkpoint:
+            self.checkpoint.mark(url, state)
+        return True
 
-        print(f"🔍 Crawling: {url}")
-        visited.add(url)
+    def record_disallowed(self, url):
+        """Lists a URL robots.txt disallows in unverified; it is never fetched, and never scraped for content."""
+        if not self.seen.add(url):
+            return False
+        self.unverified[url] = "disallowed"
+        if self.checkpoint:
+            self.checkpoint.mark(url, DISALLOWED)
+        return True
 
+    def enqueue(self, frontier, url, parent=None, depth=None, known=False):
+        """Queues a URL not seen before (unless it is a crawl trap); a repeat counts as one more inbound link."""
+        if frontier.full() and url not in self.seen:
+            return False  # Left unseen, so a later page can still queue it
+        if not self.seen.add(url):
+            frontier.add_inlink(url)
+            return False
+        if not frontier.add(url, parent=parent, depth=depth, known=known):
+            return False  # A crawl trap
+        if self.checkpoint:
+            self.checkpoint.mark(url, QUEUED)
+        return True
+
+    async def fetch_page(self, session, url):
+        """
+        Fetches a single page; returns {"links", "canonical"}. A failed fetch has no links and an "error":
+        the status code of a non-200 response, or None when the request itself failed.
+        """
+        logger.debug("🔍 Crawling: %s", url)
+        in_flight = IN_FLIGHT.labels("crawl")
+        in_flight.inc()
+        outcome = "ok"
         try:
-            response = requests.get(url, timeout=20, headers={"User-Agent": "Mozilla/5.0"})
-            if response.status_code != 200:
-                print(f"⚠️ Skipping {url} - Status Code: {response.status_code}")
-                return []
+            with span("crawl.page", url=url):
+                # Parsing runs off the event loop, and is skipped entirely when the page answers 304
+                status, page = await session.get_parsed(url, lambda response: self.parse_page(url, response),
+                                                        accept=is_html, max_bytes=self.max_body_bytes)
+            if page is None:
+                outcome = "skipped"
+                logger.warning("⚠️ Skipping %s - Status Code: %s", url, status)
+                return {"links": [], "canonical": None, "error": status}
+            if isinstance(page, list):
+                page = {"links": page, "canonical": None}  # Cached by an older version: links only
+            if page.get("non_html"):
+                outcome = "non_html"
+                logger.debug("⏭️ %s is not HTML, body not downloaded", url)
+            return page
 
-            soup = BeautifulSoup(response.text, "html.parser")
+        except Exception as e:
+            outcome = "failed"
+            logger.warning("⚠️ Failed to crawl %s: %s", url, e)
+            return {"links": [], "canonical": None, "error": None}
+        finally:
+            in_flight.dec()
+            PAGES.labels("crawl", outcome).inc()
 
-            new_links = set()
-            for link in soup.find_all("a", href=True):
-                new_url = self.normalize_url(url, link["href"])
-                if new_url and new_url not in visited:
-                    new_links.add(new_url)
+    async def crawl_internal_links_async(self, max_pages=100, resume=False, progress=None, seeds=None):
+        """
+        Crawls internal links with a PriorityFrontier and `concurrency` fetchers until max_pages pages were
+        fetched, and returns the URLs of pages fetched successfully (plus their canonical URLs). URLs found
+        but never fetched, crawl traps and robots.txt-disallowed links included, are left in `unverified`
+        instead; pages that answered 4xx/5xx are dropped.
+        The frontier starts from the homepage plus `seeds` (e.g. the sitemap URLs), which are known pages and
+        mostly serve to discover the ones the sitemap misses.
+        Seen URLs are kept as fingerprints (see FingerprintSet); the URLs themselves are only listed once.
+        With resume=True the frontier and seen set are restored from the checkpoint, and pages that were
+        in progress or failed to fetch when the crawl stopped are fetched again. Without it, the checkpoint
+        of an earlier crawl is cleared first, so a later resume never mixes two crawls.
+        progress, if given, is called as progress(pages_fetched, max_pages) after every page.
+        """
+        # Discovered URLs outnumber fetched ones by about the fan-out; past this bound new ones are dropped
+        max_queued = max(20 * max_pages, 10000)
+        self.seen = self.new_seen_set(max_queued)
+        self.found = []
+        self.unverified = {}
+        self.frontier = frontier = PriorityFrontier(maxsize=max_queued)
+        fetched = started = non_html = 0
+        # Compiled once up front (fetching robots.txt if needed) so the workers only match
+        robots = await asyncio.to_thread(self.robots.rules) if self.robots else None
+        start = time.perf_counter()
 
-            return list(new_links)
+        if resume and self.checkpoint:
+            states = await asyncio.to_thread(self.checkpoint.load)
+            pending = []
+            for url, state in states.items():
+                self.seen.add(url)
+                if state == DONE:
+                    self.found.append(url)
+                elif state == DISALLOWED:
+                    self.unverified[url] = "disallowed"
+                elif state in (QUEUED, IN_PROGRESS):
+                    pending.append(url)
+            for url in pending[:max_queued]:
+                frontier.add(url)
+            if states:
+                logger.info("♻️ Resuming crawl: %d URLs known, %d still to fetch", len(states), len(pending))
+        elif self.checkpoint:
+            await asyncio.to_thread(self.checkpoint.clear)
 
-        except Exception as e:
-            print(f"⚠️ Failed to crawl {url}: {e}")
-            return []
+        if not self.found and not frontier.qsize():
+            self.enqueue(frontier, self.domain, depth=0)
+            for seed in seeds or ():
+                url = self.normalize_url(self.domain, seed)
+                if url and (robots is None or robots.is_allowed(url)):
+                    self.enqueue(frontier, frontier.clean(url), depth=1, known=True)
 
-    def crawl_internal_links(self, max_pages=100):
-        """Crawls internal links from a website."""
-        visited = set()
-        queue = [self.domain]
+        async def worker(session):
+            nonlocal fetched, started, non_html
+            while True:
+                url = await frontier.get()
+                QUEUE_DEPTH.labels("crawl").set(frontier.qsize())
+                try:
+                    started += 1
+                    if started >= max_pages:
+                        frontier.close()  # Page budget spent: the rest of the frontier is reported, not fetched
+                    if self.checkpoint:
+                        self.checkpoint.mark(url, IN_PROGRESS)
+                    page = await self.fetch_page(session, url)
+                    state = DONE
+                    if page.get("non_html"):
+                        non_html += 1
+                    if "error" in page:
+                        if page["error"] is None:
+                            self.unverified[url] = "fetch failed"  # May be transient; the page may well exist
+                            state = QUEUED  # Fetched again if the crawl is resumed
+                        else:
+                            state = FAILED
+                    elif not page.get("non_html") or self.non_html == "record":
+                        self.found.append(url)
+                    canonical = page["canonical"]
+                    if canonical and canonical != url:
+                        # Same content under its canonical URL: record it without fetching it again
+                        if frontier.discard(canonical):
+                            self.found.append(canonical)
+                            if self.checkpoint:
+                                self.checkpoint.mark(canonical, DONE)
+                        elif robots is None or robots.is_allowed(canonical):
+                            self.record(canonical)
+                        else:
+                            self.record_disallowed(canonical)
+                    for link in page["links"]:
+                        link = frontier.clean(link)
+                        # No await between the check and the add, so the claim is atomic on the loop
+                        if has_skipped_extension(link):
+                            if self.non_html == "record":
+                                self.record(link)  # A file: recorded but never fetched
+                        elif robots is None or robots.is_allowed(link):
+                            self.enqueue(frontier, link, parent=url)
+                        else:
+                            self.record_disallowed(link)
+                    if self.checkpoint:
+                        self.checkpoint.mark(url, state)
+                    fetched += 1
+                    if progress:
+                        progress(fetched, max_pages)
+                finally:
+                    frontier.finish(url)
+                    frontier.task_done()
+
+        async def checkpointer():
+            while True:
+                await asyncio.sleep(self.checkpoint.interval)
+                await asyncio.to_thread(self.checkpoint.flush)
+
+        async with self.transport.async_session() as session:
+            workers = [asyncio.create_task(worker(session)) for _ in range(self.concurrency)]
+            if self.checkpoint:
+                workers.append(asyncio.create_task(checkpointer()))
+            await frontier.join()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        discovered = frontier.remaining()
+        self.unverified.update(dict.fromkeys(discovered, "not fetched"))
+        self.unverified.update(dict.fromkeys(frontier.trapped_urls, "crawl trap"))
 
-        with ThreadPoolExecutor(max_workers=16) as executor:
-            while queue and len(visited) < max_pages:
-                results = list(executor.map(lambda url: self.fetch_page(url, visited), queue[:16]))
-                new_urls = [url for sublist in results for url in sublist if url not in visited]
-                queue = new_urls
+        if self.checkpoint:
+            # The crawl finished, so there is nothing left to resume
+            await asyncio.to_thread(self.checkpoint.clear)
 
-        return list(visited)
+        elapsed = time.perf_counter() - start
+        self.stats = {
+            "pages": len(self.found),
+            "elapsed": round(elapsed, 3),
+            "pages_per_sec": round(fetched / elapsed, 2) if elapsed else 0.0,
+            "fetched": fetched,
+            "discovered": len(discovered),
+            "unverified": len(self.unverified),
+            "non_html": non_html,
+            "seen_set_bytes": self.seen.memory_bytes(),
+            "traps": frontier.traps,
+        }
+        logger.info("⚡ Crawled %d pages in %ss (%s pages/sec), %d more found but not fetched",
+                    fetched, self.stats["elapsed"], self.stats["pages_per_sec"], len(discovered))
+        if frontier.traps:
+            logger.info("🪤 %d crawl traps, %d of their URLs skipped: %s", len(frontier.traps), frontier.trapped,
+                        ", ".join(frontier.traps))
+
+        return list(self.found)
+
+    def crawl_internal_links(self, max_pages=100, resume=False, progress=None, seeds=None):
+        """Crawls internal links from a website."""
+        return asyncio.run(self.crawl_internal_links_async(max_pages=max_pages, resume=resume, progress=progress,
+                                                           seeds=seeds))
@@ -1,14 +1,49 @@
-from collections import defaultdict
+from array import array
+import numpy as np
+from scraper.LinkGraph import LinkGraph
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class InternalLinkGraphBuilder:
-    def __init__(self, scraped_metadata):
+    """
+    Interns the URLs of scraped pages to integer IDs and builds a LinkGraph from every internal link:
+    their links_to lists plus the nav_links kept apart from them, flagged as navigation.
+    Pages are read in one pass, so they can come straight from a database cursor; only the
+    URL-to-ID map and the compact edge arrays are kept.
+    """
+
+    def __init__(self, scraped_metadata, homepage=None, sitemap_urls=()):
         self.scraped_metadata = scraped_metadata
+        self.homepage = homepage
+        self.sitemap_urls = sitemap_urls
 
-    def build_internal_link_counts(self):
-        incoming_links = defaultdict(int)
+    def build(self):
+        ids = {}  # url -> ID, in first-seen order
+        sources, targets, nav = array("q"), array("q"), array("b")
 
         for page in self.scraped_metadata:
-            for linked_url in page.get("links_to", []):
-                incoming_links[linked_url] += 1
+            source = ids.setdefault(page["url"], len(ids))
+            links = page.get("links_to") or ()
+            # A URL linked from both the content and a menu is one content link
+            nav_links = set(page.get("nav_links") or ()).difference(links)
+            # setdefault with len(ids) hands out the next ID to unseen URLs, without a Python call per link
+            targets.extend([ids.setdefault(url, len(ids)) for url in links])
+            targets.extend([ids.setdefault(url, len(ids)) for url in nav_links])
+            sources.extend([source] * (len(links) + len(nav_links)))
+            nav.extend([0] * len(links) + [1] * len(nav_links))
 
-        return incoming_links
+        homepage = ids.setdefault(self.homepage, len(ids)) if self.homepage else None
+        sitemap_ids = [ids.setdefault(url, len(ids)) for url in self.sitemap_urls]
+
+        sources, targets = np.frombuffer(sources, dtype=np.int64), np.frombuffer(targets, dtype=np.int64)
+        nav = np.frombuffer(nav, dtype=np.int8).astype(bool)
+        keep = sources != targets  # Self-links don't count as internal links
+        logger.info("🕸️ Link graph: %d pages, %d links (%d in navigation)", len(ids), int(keep.sum()),
+                    int((keep & nav).sum()))
+        return LinkGraph(list(ids), sources[keep], targets[keep], homepage=homepage, sitemap_ids=sitemap_ids,
+                         nav=nav[keep])
+
+    def build_internal_link_counts(self):
+        graph = self.build()
+        return dict(zip(graph.urls, graph.internal_link_count.tolist()))
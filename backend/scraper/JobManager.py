@@ -0,0 +1,140 @@
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+###  Job ###
+class Job:
+    """One background scrape of a domain, with the progress the status endpoint reports."""
+
+    def __init__(self, kind, domain, target):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.domain = domain
+        self.target = target  # Called as target(job); reports progress through job.progress
+        self.status = QUEUED
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.pages_done = 0
+        self.pages_total = None
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def progress(self, done, total=None):
+        """Progress callback handed to the crawler and the content scraper."""
+        self.pages_done = done
+        if total is not None:
+            self.pages_total = total
+
+    def snapshot(self):
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        rate = self.pages_done / elapsed if elapsed else 0.0
+        eta = None
+        if self.status == RUNNING and rate and self.pages_total:
+            eta = round(max(self.pages_total - self.pages_done, 0) / rate, 1)
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "domain": self.domain,
+            "status": self.status,
+            "error": self.error,
+            "pages_done": self.pages_done,
+            "pages_total": self.pages_total,
+            "pages_per_sec": round(rate, 2),
+            "eta_seconds": eta,
+            "elapsed": round(elapsed, 1),
+            "created_at": self.created_at,
+        }
+
+
+###  Job Manager ###
+class JobManager:
+    """
+    Runs scrape jobs on a bounded thread pool so API requests return right away.
+    Jobs for the same domain run one after another, and submitting a job that is
+    already queued or running for that domain returns the existing job.
+    """
+
+    def __init__(self, max_workers=4, max_history=1000):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scrape-job")
+        self.max_history = max_history
+        self.jobs = OrderedDict()
+        self._waiting = {}  # domain -> deque of jobs queued behind the one running for that domain
+        self._busy_domains = set()
+        self._lock = threading.Lock()
+
+    def submit(self, kind, domain, target):
+        """Queues target(job) for a domain and returns the job, or the active job of the same kind."""
+        with self._lock:
+            for job in self.jobs.values():
+                if job.domain == domain and job.kind == kind and job.active:
+                    return job
+
+            job = Job(kind, domain, target)
+            self.jobs[job.id] = job
+            self._prune()
+            if domain in self._busy_domains:
+                self._waiting.setdefault(domain, deque()).append(job)
+            else:
+                self._start(job)
+            return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list_jobs(self, domain=None):
+        return [job for job in list(self.jobs.values()) if domain is None or job.domain == domain]
+
+    def _start(self, job):
+        # Called with the lock held
+        self._busy_domains.add(job.domain)
+        self.executor.submit(self._run, job)
+
+    def _run(self, job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        logger.info("🚀 Job %s started: %s %s", job.id, job.kind, job.domain)
+        try:
+            job.target(job)
+            job.status = DONE
+            logger.info("✅ Job %s finished: %d pages in %.1fs", job.id, job.pages_done, time.time() - job.started_at)
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            logger.error("❌ Job %s failed: %s", job.id, e)
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._busy_domains.discard(job.domain)
+                waiting = self._waiting.get(job.domain)
+                if waiting:
+                    self._start(waiting.popleft())
+                if not waiting:
+                    self._waiting.pop(job.domain, None)
+
+    def _prune(self):
+        # Called with the lock held; forgets the oldest finished jobs past max_history
+        excess = len(self.jobs) - self.max_history
+        if excess <= 0:
+            return
+        finished = [job_id for job_id, job in self.jobs.items() if not job.active]
+        for job_id in itertools.islice(finished, excess):
+            del self.jobs[job_id]
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,115 @@
+import numpy as np
+
+###  Link Graph ###
+class LinkGraph:
+    """
+    Internal link graph with URLs interned to integer IDs and edges in CSR arrays
+    (indptr/indices), so degree, click depth and PageRank run as NumPy array operations.
+    Every link is an edge. Links in site navigation are flagged in `nav`; they count for click depth,
+    reachability, orphans and PageRank, but not for a page's internal link count.
+    """
+
+    def __init__(self, urls, sources, targets, homepage=None, sitemap_ids=None, nav=None):
+        self.urls = urls
+        self.size = len(urls)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+
+        # Sort edges by source so each page's outlinks are one contiguous slice of `indices`
+        order = np.argsort(sources, kind="stable")
+        self.indices = targets[order]
+        self.out_degree = np.bincount(sources, minlength=self.size)
+        self.indptr = np.concatenate(([0], np.cumsum(self.out_degree)))
+        self.in_degree = np.bincount(targets, minlength=self.size)
+        content = ~np.asarray(nav, dtype=bool) if nav is not None else slice(None)
+        self.internal_link_count = np.bincount(targets[content], minlength=self.size)
+        self.edge_count = len(self.indices)
+
+        self.homepage = homepage  # ID of the page click depth is measured from
+        self.sitemap_ids = np.asarray(sitemap_ids if sitemap_ids is not None else [], dtype=np.int64)
+        self._depth = None
+        self._pagerank = None
+
+    def _neighbors(self, frontier):
+        """All outlink targets of the pages in `frontier`, gathered without a Python loop."""
+        counts = self.out_degree[frontier]
+        total = int(counts.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        # Position of each edge inside its page's slice, plus the slice start
+        starts = np.repeat(self.indptr[frontier] - np.cumsum(counts) + counts, counts)
+        return self.indices[starts + np.arange(total)]
+
+    def click_depth(self):
+        """Fewest clicks from the homepage to each page (breadth-first, one level per step); -1 when unreachable."""
+        if self._depth is None:
+            depth = np.full(self.size, -1, dtype=np.int64)
+            if self.homepage is not None:
+                depth[self.homepage] = 0
+                frontier = np.array([self.homepage], dtype=np.int64)
+                level = 0
+                while len(frontier):
+                    level += 1
+                    neighbors = self._neighbors(frontier)
+                    frontier = np.unique(neighbors[depth[neighbors] == -1])
+                    depth[frontier] = level
+            self._depth = depth
+        return self._depth
+
+    def pagerank(self, damping=0.85, tolerance=1e-9, max_iterations=100):
+        """Internal PageRank by power iteration; rank of pages without outlinks is spread over every page."""
+        if self._pagerank is None:
+            n = self.size
+            if not n:
+                self._pagerank = np.empty(0)
+                return self._pagerank
+            sources = np.repeat(np.arange(n), self.out_degree)
+            dangling = self.out_degree == 0
+            safe_degree = np.where(dangling, 1, self.out_degree)
+            rank = np.full(n, 1.0 / n)
+            for _ in range(max_iterations):
+                share = rank / safe_degree
+                incoming = np.bincount(self.indices, weights=share[sources], minlength=n)
+                new_rank = (1 - damping) / n + damping * (incoming + rank[dangling].sum() / n)
+                converged = np.abs(new_rank - rank).sum() < tolerance
+                rank = new_rank
+                if converged:
+                    break
+            self._pagerank = rank
+        return self._pagerank
+
+    def orphans(self):
+        """IDs of sitemap pages that no other page links to (the homepage never counts as orphaned)."""
+        orphan_ids = self.sitemap_ids[self.in_degree[self.sitemap_ids] == 0]
+        return orphan_ids[orphan_ids != self.homepage] if self.homepage is not None else orphan_ids
+
+    def page_metrics(self):
+        """Yields one dict per page: url, internal link and outlink counts, click depth, PageRank and orphan flag."""
+        depth = self.click_depth()
+        rank = self.pagerank()
+        orphan = np.zeros(self.size, dtype=bool)
+        orphan[self.orphans()] = True
+        # tolist() converts to Python numbers in one C call instead of one per field
+        columns = zip(self.urls, self.internal_link_count.tolist(), self.out_degree.tolist(), depth.tolist(),
+                      rank.tolist(), orphan.tolist())
+        for url, internal_links, outlinks, click_depth, pagerank, is_orphan in columns:
+            yield {
+                "url": url,
+                "internal_link_count": internal_links,
+                "outlink_count": outlinks,
+                "click_depth": click_depth if click_depth >= 0 else None,
+                "pagerank": pagerank,
+                "is_orphan": is_orphan,
+            }
+
+    def summary(self):
+        depth = self.click_depth()
+        reachable = depth[depth >= 0]
+        return {
+            "pages": self.size,
+            "edges": self.edge_count,
+            "orphans": int(len(self.orphans())),
+            "unreachable": int((depth < 0).sum()),
+            "max_click_depth": int(reachable.max()) if len(reachable) else None,
+            "pages_by_depth": {str(level): int(count) for level, count in enumerate(np.bincount(reachable)) if count},
+        }
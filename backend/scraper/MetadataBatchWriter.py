@@ -0,0 +1,26 @@
+import asyncio
+
+###  Metadata Batch Writer ###
+class MetadataBatchWriter:
+    """Buffers scraped page metadata and writes it to MongoDB in unordered bulk batches as pages complete."""
+
+    def __init__(self, db_handler, batch_size=500):
+        self.db_handler = db_handler
+        self.batch_size = batch_size
+        self.buffer = []
+        self.written = 0
+        # One batch in flight at a time; scrapers wait here instead of piling up more pages in memory
+        self._flush_lock = asyncio.Lock()
+
+    async def add(self, data):
+        self.buffer.append(data)
+        if len(self.buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        async with self._flush_lock:
+            batch, self.buffer = self.buffer, []
+            if not batch:
+                return
+            await asyncio.to_thread(self.db_handler.update_metadata, batch, ordered=False)
+            self.written += len(batch)
@@ -1,76 +1,105 @@
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-from playwright.async_api import Browser, Page
+import asyncio
+from concurrent.futures import Executor
+from urllib.parse import urlparse
 from typing import Optional
 from scraper.NavigationLinkFilter import NavigationLinkFilter  # Import your filter class
+from scraper.BrowserPool import BrowserPool
+from scraper.HtmlExtractor import HtmlExtractor
+from scraper.utils.normalize_url import normalize_url
+from scraper.utils.simhash import simhash
+from scraper.utils.metrics import PARSE_SECONDS, RENDER_SECONDS, timed
+from scraper.utils.tracing import span
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class MetadataScraper:
-    def __init__(self, base_domain: str, nav_filter: Optional[NavigationLinkFilter] = None):
-        self.base_domain = urlparse(base_domain).netloc
+    def __init__(self, base_domain: str, nav_filter: Optional[NavigationLinkFilter] = None, parser_backend: str = "auto",
+                 executor: Optional[Executor] = None):
+        self.base_domain = urlparse(normalize_url(base_domain) or base_domain).netloc
         self.nav_filter = nav_filter
+        # Body text feeds the SimHash; structural path signatures are what the nav filter classifies
+        self.extractor = HtmlExtractor(parser_backend, collect_text=True, structural_paths=True)
+        # Process pool set up with init_extract_worker; without one, extraction runs inline
+        self.executor = executor
 
-    async def scrape(self, browser: Browser, url: str) -> dict:
-        page: Page = await browser.new_page()
-
-        # 🚫 Block unnecessary resources
-        await page.route("**/*", lambda route, request: 
-            route.abort() if request.resource_type in ["image", "stylesheet", "font"] else route.continue_()
-        )
-
-        try:
-            await page.goto(url, wait_until="domcontentloaded", timeout=0)
-        except Exception as e:
-            print(f"❌ Failed to load {url}: {e}")
-            await page.close()
-            return {
-                "url": url,
-                "title": None,
-                "meta_description": None,
-                "headings": {},
-                "links_to": []
-            }
-
-        content = await page.content()
-        soup = BeautifulSoup(content, 'html.parser')
-
-        # ✅ Title and meta description
-        title = soup.title.string.strip() if soup.title and soup.title.string else None
-        meta_desc = soup.find("meta", attrs={"name": "description"})
-        meta_description = meta_desc['content'].strip() if meta_desc and meta_desc.has_attr('content') else None
-
-        # ✅ Headings count
-        headings = {f"h{i}": len(soup.find_all(f"h{i}")) for i in range(1, 7)}
-
-        # ✅ Internal links (with nav path filtering)
-        all_links = soup.find_all("a", href=True)
-        links_to = []
-        skipped_nav = 0
+    async def scrape(self, pool: BrowserPool, url: str) -> dict:
+        async with pool.page() as page:
+            try:
+                with span("scrape.render", url=url), timed(RENDER_SECONDS):
+                    await page.goto(url, wait_until="domcontentloaded", timeout=0)
+                    content = await page.content()
+            except Exception as e:
+                logger.error("❌ Failed to load %s: %s", url, e)
+                return {
+                    "url": url,
+                    "title": None,
+                    "meta_description": None,
+                    "canonical": None,
+                    "headings": {},
+                    "links_to": [],
+                    "nav_links": [],
+                    "simhash": None,
+                    "text_length": 0
+                }
+
+        return await self.extract_async(content, url)
+
+    async def extract_async(self, content: str, url: str) -> dict:
+        """Runs extract in the process pool so parsing never blocks the event loop."""
+        # Timed here rather than in extract, which may run in a worker process the metrics can't see
+        with timed(PARSE_SECONDS.labels("extract")):
+            if self.executor is None:
+                return self.extract(content, url)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, extract_in_worker, content, url)
+
+    def extract(self, content: str, url: str) -> dict:
+        # ✅ Title, meta description, heading counts and anchors in one pass
+        facts = self.extractor.extract(content)
 
-        for a in all_links:
-            href = a['href']
-            full_url = urljoin(url, href)
-            parsed = urlparse(full_url)
+        # ✅ Internal links, with links from navigation (header, footer, menus) kept apart
+        links_to = []
+        nav_links = []
 
-            if parsed.netloc != self.base_domain:
-                continue  # external link
+        for href, path_signature in facts["anchors"]:
+            cleaned_url = normalize_url(href, base=url)
+            if not cleaned_url or urlparse(cleaned_url).netloc != self.base_domain:
+                continue  # external or malformed link
 
-            if self.nav_filter:
-                dom_path = self.nav_filter.get_dom_path(a)
-                if self.nav_filter.is_navigational(dom_path):
-                    skipped_nav += 1
-                    continue
+            if self.nav_filter and self.nav_filter.is_navigational(path_signature):
+                nav_links.append(cleaned_url)
+                continue
 
-            cleaned_url = parsed.scheme + "://" + parsed.netloc + parsed.path
             links_to.append(cleaned_url)
 
-        await page.close()
+        logger.debug("✅ Scraped %s — %d internal links, %d more in navigation", url, len(links_to), len(nav_links))
 
-        print(f"✅ Scraped {url} — {len(links_to)} internal links kept, {skipped_nav} skipped as navigation.\n")
+        # Stored as hex: MongoDB integers are signed 64-bit
+        simhash_value = simhash(facts["text"])
 
         return {
             "url": url,
-            "title": title,
-            "meta_description": meta_description,
-            "headings": headings,
-            "links_to": list(set(links_to))
+            "title": facts["title"],
+            "meta_description": facts["meta_description"],
+            "canonical": normalize_url(facts["canonical"], base=url) if facts["canonical"] else None,
+            "headings": facts["headings"],
+            "links_to": list(set(links_to)),
+            "nav_links": list(set(nav_links)),  # Still links: click depth and reachability follow them
+            "simhash": f"{simhash_value:016x}" if simhash_value is not None else None,
+            "text_length": len(facts["text"])  # Visible body text characters; tells a blank shell from a page
         }
+
+
+# ---- process-pool workers ----
+_worker_scraper = None
+
+def init_extract_worker(domain: str, nav_paths, parser_backend: str = "auto"):
+    """Process pool initializer: builds one MetadataScraper per worker so nav path signatures are shipped once, not per page."""
+    global _worker_scraper
+    nav_filter = NavigationLinkFilter(domain, parser_backend)
+    nav_filter.nav_paths = set(nav_paths)
+    _worker_scraper = MetadataScraper(domain, nav_filter, parser_backend)
+
+def extract_in_worker(content: str, url: str) -> dict:
+    return _worker_scraper.extract(content, url)
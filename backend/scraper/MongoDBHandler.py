@@ -1,60 +1,241 @@
-from pymongo import MongoClient, UpdateOne
+from pymongo import ASCENDING, MongoClient
+from pymongo.errors import OperationFailure
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from scraper.utils.bulk_update import bulk_update
+from scraper.utils.logger import get_logger
+from scraper.utils.metrics import DB_WRITE_SECONDS, timed
+
+logger = get_logger(__name__)
 load_dotenv()
+
+# Indexes on scraped_urls: the unique url index turns every upsert into an index lookup instead of a
+# collection scan; the rest serve the status, change-tracking and duplicate queries
+PAGE_INDEXES = [
+    ("url", {"unique": True}),
+    ("status", {}),
+    ("lastmod", {"sparse": True}),
+    ("content_hash", {"sparse": True}),
+    ("duplicate_cluster", {"sparse": True}),
+]
+
 ###  MongoDB Handler ###
 class MongoDBHandler:
-    """Handles MongoDB connection and URL storage."""
-    
+    """
+    Handles MongoDB connection and URL storage.
+    Every handler of a process shares one MongoClient (and its connection pool) per URI,
+    and indexes are created once per database.
+    """
+
+    _clients = {}
+    _indexed = set()
+    _lock = threading.Lock()
+
     def __init__(self, website_name):
         """Initialize MongoDB connection."""
         MONGO_URI = os.getenv("MONGO_URI")
         if not MONGO_URI:
             raise ValueError("MongoDB URI is missing!")
         
-        client = MongoClient(MONGO_URI)
+        client = self.get_client(MONGO_URI)
         db_name = website_name + '_db'
         db = client[db_name]
         self.collection = db["scraped_urls"]
-        # Check if the collection is empty and prompt to scrape first
-        if self.collection.count_documents({}) == 0:
-            print(f"⚠️ No data found in MongoDB for {website_name}. Please scrape first!")
+        self.state_collection = db["domain_state"]  # Small per-site settings learned across runs
+        self.crawl_state_collection = db["crawl_state"]  # Checkpointed crawl frontier, see CrawlCheckpoint
+        self.frontier_collection = db["frontier"]  # Frontier shared by distributed workers, see SharedFrontier
+        self.pacing_collection = db["crawl_pacing"]  # Crawl-delay shared by distributed workers, see SharedPacing
+        self.ensure_indexes()
+
+    @classmethod
+    def get_client(cls, uri):
+        """The process-wide MongoClient for `uri`; it is thread-safe and pools its own connections."""
+        with cls._lock:
+            client = cls._clients.get(uri)
+            if client is None:
+                client = cls._clients[uri] = MongoClient(
+                    uri, maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+                )
+            return client
+
+    @classmethod
+    def close_clients(cls):
+        with cls._lock:
+            for client in cls._clients.values():
+                client.close()
+            cls._clients.clear()
+            cls._indexed.clear()
+
+    def ensure_indexes(self):
+        key = self.collection.full_name
+        with self._lock:
+            if key in self._indexed:
+                return
+            self._indexed.add(key)
+        for field, options in PAGE_INDEXES:
+            try:
+                self.collection.create_index([(field, ASCENDING)], **options)
+            except OperationFailure as e:
+                # Old data written without the unique index may hold duplicate URLs
+                logger.warning("⚠️ Could not create the %s index on %s: %s", field, key, e)
 
-    def save_urls(self, url_data):
+    def _bulk_write(self, operation, operations, ordered=True):
+        """Applies (filter, update, upsert) tuples to scraped_urls in one bulk write."""
+        with timed(DB_WRITE_SECONDS.labels(operation)):
+            return bulk_update(self.collection, operations, ordered=ordered)
+
+    def save_urls(self, url_data, lastmods=None):
+        """Stores URL statuses, plus the sitemap <lastmod> of each URL when known."""
         if not url_data:
-            print("⚠️ No URLs to store in MongoDB!")
+            logger.warning("⚠️ No URLs to store in MongoDB!")
             return
 
+        lastmods = lastmods or {}
+        operations = []
+        for url, status in url_data.items():
+            fields = {"status": status}
+            if url in lastmods:
+                fields["lastmod"] = lastmods[url]
+            # Listed by the sitemap or fetched by the crawler, so no longer unverified
+            operations.append(({"url": url}, {"$set": fields, "$unset": {"unverified": ""}}, True))
+
+        if operations:
+            result = self._bulk_write("save_urls", operations)
+            logger.info("✅ %d new URLs stored in MongoDB!", result.upserted_count)
+
+    def save_unverified_urls(self, reasons, status="non-indexed"):
+        """
+        Stores URLs the crawler found but never fetched, flagged with why (see InternalLinkCrawler.unverified).
+        URLs already stored are left alone, except that robots.txt-disallowed ones are always flagged, so a
+        rule added since an earlier crawl stops ScrapeRunner from rendering them. ScrapeRunner skips unverified URLs.
+        """
         operations = [
-            UpdateOne({"url": url}, {"$set": {"status": status}}, upsert=True)
-            for url, status in url_data.items()
+            ({"url": url}, {"$set": {"unverified": reason}, "$setOnInsert": {"status": status}}, True)
+            if reason == "disallowed" else
+            ({"url": url}, {"$setOnInsert": {"status": status, "unverified": reason}}, True)
+            for url, reason in reasons.items()
         ]
+        if operations:
+            result = self._bulk_write("save_unverified_urls", operations, ordered=False)
+            logger.info("🔎 %d URLs found but not fetched stored as unverified", result.upserted_count)
 
+    def merge_crawled_urls(self, urls, status="non-indexed"):
+        """
+        Stores URLs found by crawl workers. Only new URLs get `status`, so workers never
+        overwrite the "indexed" status the sitemap gave a URL.
+        """
+        operations = [({"url": url}, {"$setOnInsert": {"status": status}}, True) for url in urls]
         if operations:
-            result = self.collection.bulk_write(operations)
-            print(f"✅ {result.upserted_count} new URLs stored in MongoDB!")
+            return self._bulk_write("merge_crawled_urls", operations, ordered=False).upserted_count
+        return 0
 
-    def fetch_scraped_urls(self):
-        """Fetch all scraped URLs and their metadata from MongoDB dynamically."""
-        projection = {"_id": 0}  # Dynamically include all fields except _id
+    def fetch_scraped_urls(self, query=None, fields=None):
+        """Fetch scraped URLs matching `query` with their metadata (only `fields` when given), keyed by URL."""
+        projection = {"_id": 0, "url": 1, **{field: 1 for field in fields}} if fields else {"_id": 0}
         return {
             entry.pop("url"): entry  # Remove "url" from values and use it as key
-            for entry in self.collection.find({}, projection)
+            for entry in self.collection.find(query or {}, projection)
         }
 
-    
-    def update_metadata(self, metadata_list):
+    def fetch_urls(self, query=None):
+        """Fetch only the URLs of stored pages matching `query`."""
+        return [entry["url"] for entry in self.collection.find(query or {}, {"_id": 0, "url": 1})]
+
+    def iter_pages(self, fields=None, after=None, limit=0, batch_size=1000):
+        """
+        Server-side cursor over stored pages sorted by URL, fetched `batch_size` documents at a time.
+        Pass the last URL of a page of results as `after` to continue from it (keyset pagination).
+        """
+        query = {"url": {"$gt": after}} if after else {}
+        projection = {"_id": 0, **{field: 1 for field in fields}} if fields else {"_id": 0}
+        return self.collection.find(query, projection).sort("url", 1).limit(limit).batch_size(batch_size)
+
+    def fetch_change_state(self, query=None):
+        """Fetch the change-tracking fields of every URL matching `query`, keyed by URL."""
+        projection = {
+            "_id": 0, "url": 1, "lastmod": 1, "scraped_lastmod": 1,
+            "content_hash": 1, "etag": 1, "http_last_modified": 1,
+        }
+        return {
+            entry.pop("url"): entry
+            for entry in self.collection.find(query or {}, projection)
+        }
+
+    def update_metadata(self, metadata_list, ordered=True):
         """Updates MongoDB with metadata including title, description, and heading count."""
         if not metadata_list:
-            print("⚠️ No metadata to update in MongoDB!")
+            logger.warning("⚠️ No metadata to update in MongoDB!")
             return
 
         operations = [
-            UpdateOne({"url": data["url"]}, {"$set": data}, upsert=True)
+            ({"url": data["url"]}, {"$set": data}, True)
             for data in metadata_list
         ]
 
         if operations:
-            result = self.collection.bulk_write(operations)
-            print(f"✅ {result.upserted_count} pages updated with metadata in MongoDB!")
-    
\ No newline at end of file
+            # Unordered batches let the server apply the upserts in parallel and keep going past a failed one
+            result = self._bulk_write("update_metadata", operations, ordered=ordered)
+            logger.info("✅ %d pages updated with metadata in MongoDB!", result.upserted_count + result.modified_count)
+
+    def fetch_link_data(self, query=None):
+        """Streams url, links_to and nav_links of every stored page matching `query` for the link graph."""
+        return self.collection.find(query or {}, {"_id": 0, "url": 1, "links_to": 1, "nav_links": 1})
+
+    def update_link_metrics(self, metrics, batch_size=5000):
+        """Stores per-page link graph metrics (internal link count, outlinks, click depth, PageRank, orphan flag) in batches."""
+        operations, updated = [], 0
+        for page in metrics:
+            url = page.pop("url")
+            operations.append(({"url": url}, {"$set": page}, False))
+            if len(operations) >= batch_size:
+                updated += self._bulk_write("update_link_metrics", operations, ordered=False).modified_count
+                operations = []
+        if operations:
+            updated += self._bulk_write("update_link_metrics", operations, ordered=False).modified_count
+        logger.info("✅ Link graph metrics updated for %d pages in MongoDB!", updated)
+
+    def fetch_link_metrics(self, sort_by="pagerank", limit=100, orphans_only=False):
+        """Returns stored pages with their link graph metrics, best first by `sort_by`."""
+        query = {"is_orphan": True} if orphans_only else {"pagerank": {"$exists": True}}
+        projection = {
+            "_id": 0, "url": 1, "internal_link_count": 1, "outlink_count": 1,
+            "click_depth": 1, "pagerank": 1, "is_orphan": 1,
+        }
+        return list(self.collection.find(query, projection).sort(sort_by, -1).limit(limit))
+
+    def fetch_simhashes(self):
+        """Returns {url: simhash hex} for every page scraped with a content fingerprint."""
+        return {
+            entry["url"]: entry["simhash"]
+            for entry in self.collection.find({"simhash": {"$type": "string"}}, {"_id": 0, "url": 1, "simhash": 1})
+        }
+
+    def update_duplicate_clusters(self, clusters, batch_size=5000):
+        """Marks every page of a near-duplicate cluster with the cluster's first URL and size; clears old marks."""
+        self.collection.update_many(
+            {"duplicate_cluster": {"$exists": True}}, {"$unset": {"duplicate_cluster": "", "duplicate_cluster_size": ""}}
+        )
+        operations = []
+        for root, members in clusters.items():
+            for url in members:
+                operations.append((
+                    {"url": url}, {"$set": {"duplicate_cluster": root, "duplicate_cluster_size": len(members)}}, False
+                ))
+                if len(operations) >= batch_size:
+                    self._bulk_write("update_duplicate_clusters", operations, ordered=False)
+                    operations = []
+        if operations:
+            self._bulk_write("update_duplicate_clusters", operations, ordered=False)
+        logger.info("✅ %d near-duplicate clusters stored in MongoDB!", len(clusters))
+
+    def get_domain_state(self, key):
+        """Fetch a value learned in a previous run for this website, or None."""
+        entry = self.state_collection.find_one({"_id": key})
+        return entry["value"] if entry else None
+
+    def set_domain_state(self, key, value):
+        self.state_collection.update_one(
+            {"_id": key}, {"$set": {"value": value, "updated_at": time.time()}}, upsert=True
+        )
@@ -1,52 +1,87 @@
+import time
 from collections import defaultdict
-from typing import List
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
+from scraper.HtmlExtractor import HtmlExtractor
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Bumped whenever structural_segment or path_signature change, so stored models built the old way are rebuilt
+SIGNATURE_VERSION = 1
 
 class NavigationLinkFilter:
-    def __init__(self, base_domain: str):
+    """
+    Learns which anchor positions are site navigation (header, footer, menus) from a sample of pages.
+    A position is the path_signature of the anchor's structural DOM path, so classifying a link
+    is one integer set lookup. The learned model is saved per domain through state() and reused
+    while it is younger than max_age.
+    """
+
+    def __init__(self, base_domain: str, parser_backend: str = "auto", state=None, max_age=7 * 24 * 3600,
+                 threshold=0.8):
         self.base_domain = urlparse(base_domain).netloc
-        self.dom_path_counts = defaultdict(int)
+        self.extractor = HtmlExtractor(parser_backend, structural_paths=True)
+        self.max_age = max_age
+        self.threshold = threshold  # Share of sampled pages a position must appear on to count as navigation
+        self.path_counts = defaultdict(int)
         self.nav_paths = set()
         self.page_count = 0
+        self.built_at = None
+        self.sampling = False  # True between the first analyze_page of a rebuild and finalize
 
-    def get_dom_path(self, element) -> str:
-        path = []
-        while element and element.name:
-            path.insert(0, element.name)
-            element = element.parent
-        return " > ".join(path)
+        state = state or {}
+        if state.get("version") == SIGNATURE_VERSION:
+            self.nav_paths = {int(signature, 16) for signature in state.get("signatures", [])}
+            self.page_count = state.get("pages", 0)
+            self.built_at = state.get("built_at")
+
+    def is_fresh(self) -> bool:
+        """True when a stored model was loaded and is recent enough to skip sampling."""
+        return self.built_at is not None and time.time() - self.built_at < self.max_age
 
     def analyze_page(self, html: str):
-        soup = BeautifulSoup(html, 'html.parser')
-        links = soup.find_all("a", href=True)
+        if not self.sampling:
+            # A rebuild starts from scratch; a loaded model only carries its page count, not the counts behind it
+            self.path_counts.clear()
+            self.page_count = 0
+            self.sampling = True
+
         seen_paths = set()
 
-        for a in links:
-            href = a['href']
+        for href, signature in self.extractor.extract(html)["anchors"]:
             parsed_href = urlparse(href)
             if parsed_href.netloc and parsed_href.netloc != self.base_domain:
                 continue
 
-            dom_path = self.get_dom_path(a)
-            seen_paths.add(dom_path)
+            seen_paths.add(signature)
 
         for path in seen_paths:
-            self.dom_path_counts[path] += 1
+            self.path_counts[path] += 1
 
         self.page_count += 1
-        print(f"📄 Analyzed page {self.page_count}, found {len(seen_paths)} unique DOM paths")
+        logger.debug("📄 Analyzed page %d, found %d unique DOM paths", self.page_count, len(seen_paths))
+
+    def classify(self) -> set:
+        """Positions that appear on at least `threshold` of the pages analyzed so far."""
+        if not self.page_count:
+            return set()
+        return {path for path, count in self.path_counts.items() if count / self.page_count >= self.threshold}
 
-    def finalize(self, threshold=0.8):
-        print("\n🔍 Finalizing navigation pattern detection...")
-        print(f"Total pages analyzed: {self.page_count}")
-        for path, count in sorted(self.dom_path_counts.items(), key=lambda x: -x[1]):
-            frequency = count / self.page_count
-            print(f"    Path: {path}  —  Appears in {frequency:.2%} of pages")
-            if frequency >= threshold:
-                self.nav_paths.add(path)
+    def finalize(self):
+        self.nav_paths = self.classify()
+        self.built_at = time.time()
+        self.sampling = False
+        logger.info("✅ %d of %d DOM paths classified as navigational from %d pages",
+                    len(self.nav_paths), len(self.path_counts), self.page_count)
 
-        print(f"\n✅ {len(self.nav_paths)} DOM paths classified as navigational.\n")
+    def is_navigational(self, signature: int) -> bool:
+        return signature in self.nav_paths
 
-    def is_navigational(self, dom_path: str) -> bool:
-        return dom_path in self.nav_paths
+    def state(self):
+        # Hex strings: MongoDB integers are signed 64-bit
+        return {
+            "version": SIGNATURE_VERSION,
+            "signatures": sorted(f"{signature:016x}" for signature in self.nav_paths),
+            "pages": self.page_count,
+            "built_at": self.built_at,
+        }
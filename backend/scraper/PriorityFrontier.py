@@ -0,0 +1,310 @@
+import asyncio
+import heapq
+import itertools
+import math
+import re
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit, urlunsplit
+from scraper.utils.logger import get_logger
+from scraper.utils.normalize_url import normalize_url
+from scraper.utils.url_pattern import param_names, url_pattern
+
+logger = get_logger(__name__)
+
+# Query parameters that only carry a visitor session; more are learned from their values while crawling
+SESSION_PARAMS = frozenset({
+    "sid", "sessid", "sessionid", "session_id", "jsessionid", "phpsessid", "aspsessionid", "cfid", "cftoken",
+})
+_PATH_SESSION = re.compile(r";(jsessionid|phpsessid|sid)=[^/?]*", re.IGNORECASE)
+RESCORE_LIMIT = 64  # Stale entries re-scored per get before the best one found is taken
+TRAPPED_URLS_KEPT = 10000  # Trap URLs listed in trapped_urls; past this they are only counted
+
+
+def char_entropy(value):
+    """Shannon entropy of a string's characters in bits per character."""
+    counts = Counter(value)
+    return -sum(count / len(value) * math.log2(count / len(value)) for count in counts.values())
+
+
+class _Pattern:
+    __slots__ = ("fetched", "yield_rate", "self_links", "other_links", "trap")
+
+    def __init__(self):
+        self.fetched = 0
+        self.yield_rate = None  # Moving average of new URLs found per fetched page
+        self.self_links = 0  # New URLs of this same pattern found on its pages
+        self.other_links = 0
+        self.trap = False
+
+
+class _Entry:
+    __slots__ = ("depth", "inlinks", "pattern", "chain", "faceted", "known", "score", "children")
+
+    def __init__(self, depth, pattern, chain, faceted, known):
+        self.depth = depth
+        self.inlinks = 0
+        self.pattern = pattern
+        self.chain = chain  # Consecutive ancestors of the same pattern, e.g. months of a calendar
+        self.faceted = faceted
+        self.known = known
+        self.score = None
+        self.children = 0
+
+
+###  Priority Frontier ###
+class PriorityFrontier(asyncio.Queue):
+    """
+    Crawl frontier that hands out the most promising URL first instead of the oldest one.
+    A URL scores higher the shallower it is, the more pages link to it, the fewer pages of its
+    URL pattern were fetched so far (novelty) and the more new URLs its pattern's pages keep
+    finding (yield), so the page budget goes where new pages are. URLs of crawl traps are turned
+    away and listed in trapped_urls: calendars and other patterns whose pages only generate more of
+    themselves, and the filter combinations of faceted paths, whose URLs combine their query parameters
+    in more than facet_limit ways (/search?color&size, ?color&sort, ?color&size&sort...). Their
+    single-parameter URLs, such as pagination or ?id=N, are kept. Session IDs are stripped from URLs instead.
+    Scores go stale as the pattern statistics change, so entries are re-scored lazily when they
+    reach the top of the heap.
+    """
+
+    def __init__(self, maxsize=0, depth_weight=1.0, inlink_weight=0.5, novelty_weight=2.0, yield_weight=1.0,
+                 known_penalty=1.0, trap_chain=10, self_share=0.8, facet_limit=4,
+                 session_values=3, token_entropy=3.5):
+        super().__init__(maxsize)
+        self.depth_weight = depth_weight
+        self.inlink_weight = inlink_weight
+        self.novelty_weight = novelty_weight
+        self.yield_weight = yield_weight
+        self.known_penalty = known_penalty  # Seeds from the sitemap are already known pages
+        self.trap_chain = trap_chain
+        self.self_share = self_share
+        self.facet_limit = facet_limit
+        self.session_values = session_values
+        self.token_entropy = token_entropy
+        self.session_params = set(SESSION_PARAMS)
+        self.traps = {}  # Pattern, path or parameter -> reason, for reporting
+        self.trapped = 0  # Trap URLs turned away
+        self.trapped_urls = []  # The first TRAPPED_URLS_KEPT of them, so they can be reported
+
+    def _init(self, maxsize):
+        self._heap = []
+        # asyncio.Queue sizes itself from _queue, so it is the url -> _Entry map of URLs waiting in the heap
+        self._queued = self._queue = {}
+        self._active = {}  # URLs handed out by get() and not finished yet
+        self._patterns = defaultdict(_Pattern)
+        self._combinations = defaultdict(set)  # Path -> sets of 2+ query parameter names seen, up to facet_limit + 1
+        self._tokens = defaultdict(set)  # (path, parameter) -> random-looking values seen
+        self._sequence = itertools.count()
+        self._leftover = {}  # URLs found after close(), never handed out
+        self.closed = False
+
+    def add(self, url, parent=None, depth=None, known=False):
+        """
+        Queues a URL found on `parent` (a page being crawled), or a seed at `depth`.
+        Returns False for URLs of a crawl trap, which are counted but never queued.
+        """
+        entry = self._entry(url, parent, depth, known)
+        if entry.faceted or self._patterns[entry.pattern].trap:
+            self._trap(url)
+            return False
+        if self.closed:
+            self._leftover[url] = entry
+        else:
+            self.put_nowait((url, entry))
+        return True
+
+    def _put(self, item):
+        url, entry = item
+        self._queued[url] = entry
+        self._push(url, entry)
+
+    def _entry(self, url, parent, depth, known):
+        pattern = url_pattern(url)
+        source = self._active.get(parent) if parent else None
+        chain = 0
+        if source is not None:
+            depth = source.depth + 1
+            source.children += 1
+            source_stats = self._patterns[source.pattern]
+            if source.pattern == pattern:
+                chain = source.chain + 1
+                source_stats.self_links += 1
+            else:
+                source_stats.other_links += 1
+        elif depth is None:
+            depth = urlsplit(url).path.count("/")  # Resumed URLs: the path depth stands in for the link depth
+
+        entry = _Entry(depth, pattern, chain, self._is_faceted(url), known)
+        if chain >= self.trap_chain:
+            self._check_trap(pattern)
+        return entry
+
+    def _push(self, url, entry):
+        entry.score = self._score(entry)
+        heapq.heappush(self._heap, (-entry.score, next(self._sequence), url))
+        if len(self._heap) > 4 * len(self._queued) + 1024:
+            # Inbound-link bumps and re-scoring leave stale duplicates behind; drop them
+            self._heap = [item for item in self._heap if self._queued.get(item[2]) is not None
+                          and -item[0] == self._queued[item[2]].score]
+            heapq.heapify(self._heap)
+
+    def _score(self, entry):
+        stats = self._patterns[entry.pattern]
+        score = (self.novelty_weight / (1 + stats.fetched)
+                 + self.inlink_weight * math.log1p(entry.inlinks)
+                 - self.depth_weight * entry.depth)
+        if stats.yield_rate is not None:
+            score += self.yield_weight * math.log1p(stats.yield_rate)
+        if entry.known:
+            score -= self.known_penalty
+        return score
+
+    def _get(self):
+        best = None
+        rescored = 0
+        while self._heap:
+            score, _, url = heapq.heappop(self._heap)
+            entry = self._queued.get(url)
+            if entry is None or -score != entry.score:
+                continue  # Already handed out, or superseded by a newer push
+            current = self._score(entry)
+            if best is None or current > best[0]:
+                if best is not None:
+                    self._push(best[1], best[2])
+                best = (current, url, entry)
+            else:
+                self._push(url, entry)
+            rescored += 1
+            if rescored >= RESCORE_LIMIT or not self._heap or best[0] >= -self._heap[0][0]:
+                break
+        _, url, entry = best
+        del self._queued[url]
+        self._active[url] = entry
+        self._patterns[entry.pattern].fetched += 1
+        return url
+
+    def finish(self, url):
+        """Called once the links of a page from get() were added; updates its pattern's yield."""
+        entry = self._active.pop(url, None)
+        if entry is None:
+            return
+        stats = self._patterns[entry.pattern]
+        stats.yield_rate = entry.children if stats.yield_rate is None else 0.8 * stats.yield_rate + 0.2 * entry.children
+
+    def add_inlink(self, url):
+        """Counts another page linking to a queued URL, which raises its priority."""
+        entry = self._queued.get(url)
+        if entry is not None:
+            entry.inlinks += 1
+            self._push(url, entry)
+
+    def discard(self, url):
+        """Removes a queued URL (e.g. found to be the canonical of a fetched page); returns True if it was queued."""
+        if self._leftover.pop(url, None) is not None:
+            return True
+        if self._queued.pop(url, None) is None:
+            return False
+        self.task_done()
+        return True
+
+    def close(self):
+        """
+        Stops handing out URLs once the page budget is spent. Queued URLs, and those the pages still
+        in flight add, are kept for remaining(); join() returns when the pages in flight are done.
+        """
+        self.closed = True
+        self._leftover.update(self._queued)
+        count = len(self._queued)
+        self._queued.clear()
+        self._heap = []
+        for _ in range(count):
+            self.task_done()
+
+    def remaining(self):
+        """URLs found but never fetched, best first, without the seeds."""
+        entries = {**self._queued, **self._leftover}
+        scored = [(self._score(entry), url) for url, entry in entries.items() if not entry.known]
+        return [url for _, url in sorted(scored, reverse=True)]
+
+    def clean(self, url):
+        """
+        Removes session IDs from a URL, learning which parameters hold one from the values seen so far.
+        A URL that loses a session ID is normalized again, so it matches the key of the page without one.
+        """
+        stripped = url
+        if ";" in url:
+            stripped = _PATH_SESSION.sub("", url)
+        parts = urlsplit(stripped)
+        if parts.query:
+            params = []
+            for param in parts.query.split("&"):
+                key, _, value = param.partition("=")
+                key = key.lower()
+                if key in self.session_params:
+                    continue
+                if len(value) >= 16 and char_entropy(value) >= self.token_entropy:
+                    # A random-looking value that changes while the path stays the same is a session, not a page
+                    tokens = self._tokens[(parts.path, key)]
+                    tokens.add(value)
+                    if len(tokens) >= self.session_values:
+                        self.session_params.add(key)
+                        self.traps[key] = "session id"
+                        logger.info("🪤 Query parameter %s looks like a session ID, removing it from URLs", key)
+                        continue
+                params.append(param)
+            stripped = urlunsplit(parts._replace(query="&".join(params)))
+        if stripped == url:
+            return url
+        return normalize_url(stripped) or url
+
+    def _trap(self, url):
+        self.trapped += 1
+        if len(self.trapped_urls) < TRAPPED_URLS_KEPT:
+            self.trapped_urls.append(url)
+
+    def _drop(self, is_trap):
+        """Turns away queued and leftover URLs that turned out to belong to a trap."""
+        for url in [url for url, entry in self._leftover.items() if is_trap(url, entry)]:
+            del self._leftover[url]
+            self._trap(url)
+        for url in [url for url, entry in self._queued.items() if is_trap(url, entry)]:
+            del self._queued[url]
+            self._trap(url)
+            self.task_done()
+
+    def _is_faceted(self, url):
+        """True for a URL combining several filters on a path whose parameters combine in too many ways."""
+        path, _, query = url.partition("?")
+        names = param_names(query)
+        if len(names) < 2:
+            return False
+        combinations = self._combinations[path]
+        if len(combinations) <= self.facet_limit:
+            combinations.add(names)
+            if len(combinations) <= self.facet_limit:
+                return False
+            self.traps[path] = "faceted"
+            logger.info("🪤 %s combines query parameters in more than %d ways, skipping its filter combinations",
+                        path, self.facet_limit)
+            self._drop(lambda queued, entry: queued.partition("?")[0] == path
+                       and len(param_names(queued.partition("?")[2])) > 1)
+        return True
+
+    def _check_trap(self, pattern):
+        """A pattern reached through trap_chain pages of itself whose pages mostly link to more of it is a trap."""
+        stats = self._patterns[pattern]
+        new_links = stats.self_links + stats.other_links
+        if stats.trap or not new_links or stats.self_links / new_links < self.self_share:
+            return
+        stats.trap = True
+        self.traps[pattern] = "self-generating"
+        logger.info("🪤 %s keeps generating URLs of itself (%d of %d new links), no longer crawling it",
+                    pattern, stats.self_links, new_links)
+        self._drop(lambda url, entry: entry.pattern == pattern)
+
+    def stats(self):
+        return {
+            "queued": len(self._queued) + len(self._leftover),
+            "patterns": len(self._patterns),
+            "traps": dict(self.traps),
+            "trapped": self.trapped,
+        }
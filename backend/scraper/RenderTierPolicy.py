@@ -0,0 +1,65 @@
+SPA_ROOT_MARKERS = (
+    'id="root"', "id='root'", 'id="app"', "id='app'", 'id="__next"', 'id="__nuxt"',
+    "data-reactroot", "ng-app", "<app-root",
+)
+
+###  Render Tier Policy ###
+class RenderTierPolicy:
+    """Decides whether a plain HTTP fetch is good enough for a page or it has to be rendered in Playwright."""
+
+    def __init__(self, state=None, min_text_chars=200, learn_after=20, probe_every=20):
+        state = state or {}
+        self.static_ok = state.get("static_ok", 0)
+        self.needed_render = state.get("needed_render", 0)
+        self.min_text_chars = min_text_chars
+        self.learn_after = learn_after  # Pages seen before the domain gets a verdict
+        self.probe_every = probe_every  # With a "render" verdict, still try 1 in N pages statically so it can flip back
+        self._skipped = 0
+
+    def needs_render(self, html, data):
+        """
+        Returns the reason a statically fetched page needs rendering, or None if it can be used as is.
+        `data` is the page's extraction result, whose text_length already counts its visible text.
+        """
+        if not html or html.isspace():
+            return "empty response"
+        if not data["title"]:
+            return "missing title"
+
+        if data.get("text_length", 0) < self.min_text_chars:
+            if any(marker in html for marker in SPA_ROOT_MARKERS):
+                return "SPA root"
+            return "empty body"
+        return None
+
+    def is_blank(self, data):
+        """True for an extracted page without a title or visible text, like an SPA shell whose scripts never ran."""
+        return not data.get("title") or data.get("text_length", 0) < self.min_text_chars
+
+    def record(self, needed_render):
+        if needed_render:
+            self.needed_render += 1
+        else:
+            self.static_ok += 1
+
+        # Halve old observations so the verdict follows site changes
+        if self.static_ok + self.needed_render > 10 * self.learn_after:
+            self.static_ok //= 2
+            self.needed_render //= 2
+
+    @property
+    def verdict(self):
+        """'render' once almost every page of the domain has needed a browser, otherwise None."""
+        seen = self.static_ok + self.needed_render
+        if seen >= self.learn_after and self.needed_render / seen >= 0.9:
+            return "render"
+        return None
+
+    def should_try_static(self):
+        if self.verdict != "render":
+            return True
+        self._skipped += 1
+        return self._skipped % self.probe_every == 0
+
+    def state(self):
+        return {"static_ok": self.static_ok, "needed_render": self.needed_render, "verdict": self.verdict}
@@ -0,0 +1,108 @@
+from collections import Counter
+from urllib.parse import urlsplit
+from scraper.utils.normalize_url import normalize_url
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Never needed for titles, descriptions, headings or links
+DEFAULT_BLOCKED_TYPES = ("image", "media", "font", "stylesheet")
+
+###  Resource Policy ###
+class ResourcePolicy:
+    """
+    Decides which requests Playwright aborts while rendering one domain's pages.
+    Resource types in blocked_types are always aborted. Third-party scripts (analytics, ads, widgets)
+    are aborted too unless pages of the domain fail to render without them more often than with them.
+    Render outcomes are counted separately with and without the scripts, and the setting in use is
+    periodically switched for a fresh sample of the other one, so the choice can flip back.
+    The policy is stored per domain, and explicit arguments override the stored values.
+    """
+
+    def __init__(self, domain, state=None, blocked_types=None, block_third_party_scripts=None, learn_after=10,
+                 max_failure_share=0.5, probe_every=200):
+        state = state or {}
+        host = urlsplit(normalize_url(domain) or domain).hostname or ""
+        self.site = host[4:] if host.startswith("www.") else host
+        if blocked_types is None:
+            blocked_types = state.get("blocked_types", DEFAULT_BLOCKED_TYPES)
+        self.blocked_types = set(blocked_types)
+        if block_third_party_scripts is None:
+            block_third_party_scripts = state.get("block_third_party_scripts", True)
+        self.block_third_party_scripts = block_third_party_scripts
+        # [renders, failed renders] with third-party scripts blocked (True) and loaded (False)
+        self.outcomes = {
+            True: [state.get("rendered", 0), state.get("failed", 0)],
+            False: [state.get("rendered_with_scripts", 0), state.get("failed_with_scripts", 0)],
+        }
+        self.since_switch = state.get("since_switch", 0)  # Renders since block_third_party_scripts last changed
+        self.learn_after = learn_after  # Renders of a setting seen before its failure share counts
+        self.max_failure_share = max_failure_share
+        self.probe_every = probe_every
+        self.blocked = Counter()  # Aborted requests by resource type, this run
+
+    def is_first_party(self, url):
+        host = urlsplit(url).hostname or ""
+        return host == self.site or host.endswith("." + self.site)
+
+    def should_block(self, url, resource_type):
+        if resource_type in self.blocked_types:
+            blocked = True
+        else:
+            blocked = resource_type == "script" and self.block_third_party_scripts and not self.is_first_party(url)
+        if blocked:
+            self.blocked[resource_type] += 1
+        return blocked
+
+    def failure_share(self, scripts_blocked):
+        """Share of renders that failed with the scripts blocked or loaded, None until learn_after renders."""
+        rendered, failed = self.outcomes[scripts_blocked]
+        return failed / rendered if rendered >= self.learn_after else None
+
+    def _switch(self, block, reason):
+        self.block_third_party_scripts = block
+        self.since_switch = 0
+        logger.info("🧩 %s third-party scripts of %s from now on: %s",
+                    "Blocking" if block else "Loading", self.site, reason)
+
+    def record(self, ok, scripts_blocked=None):
+        """
+        Counts a render under the setting it ran with (the current one by default), then reconsiders it:
+        scripts are let in when too many pages fail without them and fewer fail with them, and blocked again
+        when loading them doesn't help. Every probe_every renders the other setting is sampled afresh,
+        unless the scripts are blocked and pages render fine.
+        """
+        if scripts_blocked is None:
+            scripts_blocked = self.block_third_party_scripts
+        outcome = self.outcomes[scripts_blocked]
+        outcome[0] += 1
+        outcome[1] += not ok
+        if scripts_blocked != self.block_third_party_scripts:
+            return  # Started before the last switch; counted, but it doesn't move the new setting on
+        self.since_switch += 1
+
+        blocked_share, loaded_share = self.failure_share(True), self.failure_share(False)
+        failing = blocked_share is not None and blocked_share >= self.max_failure_share
+        if self.block_third_party_scripts:
+            if failing and (loaded_share is None or loaded_share < blocked_share):
+                self._switch(False, f"{outcome[1]} of {outcome[0]} pages failed to render without them")
+                return
+        elif loaded_share is not None and blocked_share is not None and loaded_share >= blocked_share:
+            self._switch(True, "pages fail to render as often with them")
+            return
+        if self.since_switch >= self.probe_every and (failing or not self.block_third_party_scripts):
+            # The other setting's counts may not stand for the pages crawled now: sample it again
+            other = not self.block_third_party_scripts
+            self.outcomes[other] = [0, 0]
+            self._switch(other, f"probing again after {self.since_switch} renders")
+
+    def state(self):
+        return {
+            "blocked_types": sorted(self.blocked_types),
+            "block_third_party_scripts": self.block_third_party_scripts,
+            "rendered": self.outcomes[True][0],
+            "failed": self.outcomes[True][1],
+            "rendered_with_scripts": self.outcomes[False][0],
+            "failed_with_scripts": self.outcomes[False][1],
+            "since_switch": self.since_switch,
+        }
@@ -1,30 +1,188 @@
-import requests
+import re
+import threading
+import time
+from scraper.HttpTransport import HttpTransport
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def parse_groups(text):
+    """
+    Splits a robots.txt into groups: [(agents, rules, crawl_delay)], rules being (allow, pattern) pairs.
+    Consecutive User-agent lines share one group, as in RFC 9309.
+    """
+    groups = []
+    agents, rules, crawl_delay = [], [], None
+    in_rules = False
+
+    for line in text.splitlines():
+        field, sep, value = line.split("#", 1)[0].partition(":")
+        if not sep:
+            continue
+        field, value = field.strip().lower(), value.strip()
+
+        if field == "user-agent":
+            if in_rules:
+                groups.append((agents, rules, crawl_delay))
+                agents, rules, crawl_delay = [], [], None
+                in_rules = False
+            agents.append(value.lower())
+        elif field in ("allow", "disallow"):
+            in_rules = True
+            if agents and value:  # An empty Disallow allows everything, so it adds no rule
+                rules.append((field == "allow", value))
+        elif field == "crawl-delay":
+            in_rules = True
+            try:
+                crawl_delay = float(value)
+            except ValueError:
+                pass
+
+    if agents:
+        groups.append((agents, rules, crawl_delay))
+    return groups
+
+
+def _pattern_regex(pattern):
+    """Translates a robots pattern with * and a trailing $ into a regex source."""
+    anchored = pattern.endswith("$")
+    if anchored:
+        pattern = pattern[:-1]
+    source = ".*".join(re.escape(part) for part in pattern.split("*"))
+    return source + ("$" if anchored else "")
+
+
+# Scheme and host (when present), then the path and query up to any fragment
+_URL_PATH = re.compile(r"(?:[A-Za-z][A-Za-z0-9+.-]*://[^/?#]*)?([^#]*)")
+
+
+def _path_and_query(url):
+    """Path plus ?query of a URL; a regex match, since urlparse would dominate matching time."""
+    path = _URL_PATH.match(url).group(1)
+    return path if path[:1] == "/" else "/" + path
+
+
+class RobotsRules:
+    """
+    Compiled Allow/Disallow rules for one user agent; the longest matching pattern wins and Allow wins a tie (RFC 9309).
+    Plain prefixes are grouped by length in hash maps, so the longest literal match costs one slice and
+    lookup per distinct rule length. Wildcard patterns are regexes behind one combined prefilter.
+    """
+
+    def __init__(self, rules=(), crawl_delay=None):
+        self.crawl_delay = crawl_delay
+        self.size = len(rules)
+        self.prefixes = {}  # length -> {prefix: allow}
+        self.wildcards = []  # (length, allow, compiled regex), longest first, Allow first on a tie
+
+        for allow, pattern in rules:
+            if "*" in pattern or pattern.endswith("$"):
+                self.wildcards.append((len(pattern), allow, re.compile(_pattern_regex(pattern))))
+                continue
+            bucket = self.prefixes.setdefault(len(pattern), {})
+            bucket[pattern] = bucket.get(pattern, False) or allow
+
+        self.lengths = sorted(self.prefixes, reverse=True)
+        self.wildcards.sort(key=lambda rule: (-rule[0], not rule[1]))
+        # One alternation rules out every wildcard with a single match call
+        self.any_wildcard = re.compile("|".join(f"(?:{rule[2].pattern})" for rule in self.wildcards)) if self.wildcards else None
+
+    def is_allowed(self, url):
+        path = _path_and_query(url)
+        if path == "/robots.txt":
+            return True
+
+        best_length, best_allow = -1, True
+        for length in self.lengths:
+            if length <= len(path):
+                allow = self.prefixes[length].get(path[:length])
+                if allow is not None:
+                    best_length, best_allow = length, allow
+                    break
+
+        if self.any_wildcard is not None and self.any_wildcard.match(path):
+            for length, allow, regex in self.wildcards:
+                if length < best_length:
+                    break
+                if regex.match(path):
+                    if length > best_length or allow:
+                        best_length, best_allow = length, allow
+                    break
+
+        return best_allow
+
+
+###  Robots.txt ###
 class RobotsTxt:
-    """Fetches all URLs from a robot.txt"""
-    def __init__(self,domain):
-        self.domain = domain
+    """
+    Fetches a site's robots.txt and compiles the group that applies to `user_agent`.
+    Compiled rules are cached per domain and agent for `ttl` seconds, shared by every instance.
+    """
 
-    def get_robot_paths(self):
-        """Fetches all URLs from a robot.txt"""
-        headers = {"User-Agent": "Mozilla/5.0"}
+    _cache = {}
+    _cache_lock = threading.Lock()
 
-        try:
-            response = requests.get(f"{self.domain}/robots.txt", headers=headers, timeout=10)
-            if response.status_code != 200:
-                print(f"⚠️ Failed to fetch robots.txt: {self.domain}")
-                return []
-
-            urls = []
-            for line in response.text.split("\n"):
-                if line.startswith("Disallow:"):
-                    parts = line.split(" ",1)
-                    if len(parts)>1 and parts[1].strip():
-                        urls.append(f"{self.domain}{parts[1].strip()}")
-            print(f"✅ Found {len(urls)} URLs in robots.txt")
-            print(f"robots.txt: {urls}")
-            return urls
+    def __init__(self, domain, transport=None, user_agent="*", ttl=24 * 3600):
+        self.domain = domain
+        self.transport = transport or HttpTransport()
+        self.user_agent = user_agent.lower()
+        self.ttl = ttl
 
+    def fetch(self):
+        """Downloads robots.txt; returns its text, or None when it is missing or unreachable."""
+        try:
+            response = self.transport.get(f"{self.domain}/robots.txt", timeout=10)
         except Exception as e:
-            print(f"⚠️ Error fetching robots.txt: {e}")
-            return []
-        
\ No newline at end of file
+            logger.warning("⚠️ Error fetching robots.txt: %s", e)
+            return None
+        if response.status_code != 200:
+            logger.warning("⚠️ Failed to fetch robots.txt: %s", self.domain)
+            return None
+        return response.text
+
+    def select_group(self, groups):
+        """Merges the groups naming the most specific agent that matches ours, falling back to *."""
+        best, best_agent = None, None
+        for agents, rules, crawl_delay in groups:
+            for agent in agents:
+                matches = agent == "*" or (self.user_agent != "*" and agent in self.user_agent)
+                if not matches:
+                    continue
+                if best_agent is None or (best_agent == "*" and agent != "*") or len(agent) > len(best_agent):
+                    best, best_agent = [(rules, crawl_delay)], agent
+                elif agent == best_agent:
+                    best.append((rules, crawl_delay))
+        if best is None:
+            return [], None
+        rules = [rule for group_rules, _ in best for rule in group_rules]
+        delays = [delay for _, delay in best if delay is not None]
+        return rules, (delays[0] if delays else None)
+
+    def rules(self):
+        """Returns the compiled RobotsRules for this domain, from the cache while it is fresh."""
+        key = (self.domain, self.user_agent)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        text = self.fetch()
+        if text is None:
+            # Missing robots.txt allows everything; retry sooner than a real file would be
+            rules, expires = RobotsRules(), time.monotonic() + min(self.ttl, 3600)
+        else:
+            rules = RobotsRules(*self.select_group(parse_groups(text)))
+            expires = time.monotonic() + self.ttl
+            logger.info("✅ Compiled %d robots.txt rules for %s (%d with wildcards)", rules.size, self.domain, len(rules.wildcards))
+
+        with self._cache_lock:
+            self._cache[key] = (expires, rules)
+        return rules
+
+    def is_allowed(self, url):
+        return self.rules().is_allowed(url)
+
+    def get_crawl_delay(self):
+        """Returns the Crawl-delay in seconds for our agent group, or None."""
+        return self.rules().crawl_delay
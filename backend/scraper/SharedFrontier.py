@@ -0,0 +1,176 @@
+import random
+import time
+import uuid
+from pymongo import ASCENDING
+from scraper.utils.bulk_update import bulk_update
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+SLOTS = 1024  # Random slot per URL; workers start leasing at a random slot so they rarely race for the same URLs
+
+
+class Lease:
+    """A batch of URLs held by one worker until `expires`, unless renewed by a heartbeat."""
+
+    def __init__(self, token, urls, expires):
+        self.token = token
+        self.urls = urls
+        self.expires = expires
+
+
+###  Shared Frontier ###
+class SharedFrontier:
+    """
+    Crawl frontier and seen-URL set shared by every CrawlWorker of a site, kept in a MongoDB collection
+    with one document per URL (_id is the normalized URL, so inserting is also the dedupe check).
+    Workers lease URL batches for lease_seconds and renew them with heartbeats; leases of workers
+    that stopped heartbeating are reclaimed, and URLs leased max_attempts times are marked failed.
+    """
+
+    def __init__(self, collection, max_pages=None, max_attempts=3):
+        self.collection = collection
+        self.max_pages = max_pages  # Approximate cap on URLs admitted across all workers
+        self.max_attempts = max_attempts
+        self.collection.create_index([("state", ASCENDING), ("slot", ASCENDING)])
+        self.collection.create_index([("state", ASCENDING), ("lease_expires", ASCENDING)])
+        self.collection.create_index("lease", sparse=True)
+
+    def reset(self):
+        """Forgets every URL, so the next crawl of the site starts from its seeds."""
+        self.collection.delete_many({})
+
+    def fit(self, urls):
+        """The leading URLs that still fit under max_pages (all of them without a cap)."""
+        urls = list(urls)
+        if self.max_pages is None or not urls:
+            return urls
+        room = self.max_pages - self.collection.estimated_document_count()
+        return urls[:max(room, 0)]
+
+    def add(self, urls, state=QUEUED):
+        """
+        Admits URLs not seen before by any worker, up to max_pages; returns how many were new.
+        Callers that need to know which URLs fit pass the result of fit().
+        """
+        urls = self.fit(urls)
+        if not urls:
+            return 0
+        now = time.time()
+        result = bulk_update(self.collection, [
+            (
+                {"_id": url},
+                {"$setOnInsert": {"state": state, "slot": random.randrange(SLOTS), "attempts": 0, "added_at": now}},
+                True,
+            )
+            for url in urls
+        ], ordered=False)
+        return result.upserted_count
+
+    def _requeue(self, query):
+        """Returns matching URLs to the queue, or marks them failed after max_attempts; returns (requeued, failed)."""
+        unset = {"lease": "", "owner": "", "lease_expires": ""}
+        failed = self.collection.update_many(
+            {**query, "attempts": {"$gte": self.max_attempts}}, {"$set": {"state": FAILED}, "$unset": unset}
+        ).modified_count
+        requeued = self.collection.update_many(query, {"$set": {"state": QUEUED}, "$unset": unset}).modified_count
+        return requeued, failed
+
+    def reclaim(self):
+        """Returns expired leases to the queue (or marks them failed after max_attempts); returns the count."""
+        requeued, failed = self._requeue({"state": LEASED, "lease_expires": {"$lt": time.time()}})
+        if failed or requeued:
+            logger.info("♻️ Reclaimed %d expired leased URLs, %d failed after %d attempts", requeued, failed, self.max_attempts)
+        return failed + requeued
+
+    def lease(self, owner, batch_size=50, lease_seconds=60):
+        """Claims up to batch_size queued URLs for `owner`; returns a Lease (with no URLs when nothing is queued)."""
+        self.reclaim()
+        token = uuid.uuid4().hex
+        expires = time.time() + lease_seconds
+        start = random.randrange(SLOTS)
+        candidates = []
+        for slots in ({"$gte": start}, {"$lt": start}):
+            if len(candidates) >= batch_size:
+                break
+            cursor = self.collection.find({"state": QUEUED, "slot": slots}, {"_id": 1})
+            candidates += [entry["_id"] for entry in cursor.sort("slot", ASCENDING).limit(batch_size - len(candidates))]
+        if not candidates:
+            return Lease(token, [], expires)
+
+        # The filter re-checks the state per document, so of two workers racing for a URL only one gets it
+        self.collection.update_many(
+            {"_id": {"$in": candidates}, "state": QUEUED},
+            {"$set": {"state": LEASED, "lease": token, "owner": owner, "lease_expires": expires},
+             "$inc": {"attempts": 1}},
+        )
+        urls = [entry["_id"] for entry in self.collection.find({"lease": token}, {"_id": 1})]
+        return Lease(token, urls, expires)
+
+    def heartbeat(self, lease, lease_seconds=60):
+        """Extends a lease; returns how many of its URLs are still held (fewer once some were reclaimed)."""
+        lease.expires = time.time() + lease_seconds
+        return self.collection.update_many(
+            {"lease": lease.token, "state": LEASED}, {"$set": {"lease_expires": lease.expires}}
+        ).modified_count
+
+    def complete(self, lease, urls=None, state=DONE):
+        """Marks leased URLs done, or failed for pages that can't be fetched (all of the lease by default)."""
+        query = {"lease": lease.token, "state": LEASED}
+        if urls is not None:
+            query["_id"] = {"$in": list(urls)}
+        self.collection.update_many(
+            query, {"$set": {"state": state}, "$unset": {"lease": "", "owner": "", "lease_expires": ""}}
+        )
+
+    def release(self, lease, urls):
+        """
+        Returns leased URLs whose fetch failed to the queue, for this or another worker to try again;
+        URLs already leased max_attempts times are marked failed. Returns how many were requeued.
+        """
+        requeued, failed = self._requeue({"lease": lease.token, "state": LEASED, "_id": {"$in": list(urls)}})
+        if failed:
+            logger.warning("⚠️ %d URLs failed after %d attempts", failed, self.max_attempts)
+        return requeued
+
+    def is_drained(self):
+        """True when no URL is queued or leased, so the crawl is over for every worker."""
+        return self.collection.find_one({"state": {"$in": [QUEUED, LEASED]}}, {"_id": 1}) is None
+
+    def stats(self):
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for entry in self.collection.aggregate([{"$group": {"_id": "$state", "count": {"$sum": 1}}}]):
+            counts[entry["_id"]] = entry["count"]
+        counts["total"] = sum(counts.values())
+        return counts
+
+
+###  Shared Pacing ###
+class SharedPacing:
+    """
+    A robots.txt Crawl-delay kept by every worker of a distributed crawl together, on any number of hosts:
+    each request claims the next free moment for its site in MongoDB, at most one every `delay` seconds.
+    """
+
+    def __init__(self, collection, site, delay):
+        self.collection = collection
+        self.site = site
+        self.delay = delay
+        self.collection.update_one({"_id": site}, {"$setOnInsert": {"next_at": 0.0}}, upsert=True)
+
+    def reserve(self):
+        """Claims the site's next request slot; returns how many seconds to wait for it."""
+        while True:
+            next_at = self.collection.find_one({"_id": self.site})["next_at"]
+            now = time.time()
+            start = max(now, next_at)
+            # Compare-and-set: another worker that claimed this slot first makes the update miss, so try again
+            claimed = self.collection.update_one(
+                {"_id": self.site, "next_at": next_at}, {"$set": {"next_at": start + self.delay}}
+            ).modified_count
+            if claimed:
+                return start - now
@@ -1,45 +1,158 @@
-import requests
+import queue
+import threading
+import zlib
 import xml.etree.ElementTree as ET
 from concurrent.futures import ThreadPoolExecutor
+from scraper.HttpTransport import HttpTransport
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+INFLATE_CHUNK = 256 * 1024  # Cap on decompressed bytes per step, so a small gzip chunk cannot expand all at once
 
 ###  Sitemap Scraper ###
 class SitemapScraper:
-    """Fetches all URLs from a sitemap, including nested sitemaps (parallel processing)."""
+    """Streams all URLs from a sitemap, including nested sitemaps and gzipped sitemaps (parallel processing)."""
 
-    def __init__(self, domain):
+    def __init__(self, domain, transport=None, max_workers=8, queue_size=10000):
         self.domain = domain
+        self.transport = transport or HttpTransport()
+        self.max_workers = max_workers
+        self.queue_size = queue_size  # Bounds how many records sit between the fetch threads and the consumer
+        self.lastmods = {}  # URL -> <lastmod> from the last get_sitemap_urls call
+
+    def _local_name(self, tag):
+        return tag.rsplit("}", 1)[-1]
+
+    def iterparse(self, chunks):
+        """
+        Incrementally parses sitemap XML (plain or gzipped) from an iterable of byte chunks.
+        Yields ("sitemap" | "url", {"url", "lastmod"}) per <sitemap>/<url> entry, so a
+        <sitemapindex> is told apart from a <urlset> by element type rather than by URL suffix.
+        """
+        parser = ET.XMLPullParser(events=("start", "end"))
+        decompressor = None
+        started = False
+        root = None
+
+        def drain():
+            nonlocal root
+            for event, elem in parser.read_events():
+                if event == "start":
+                    if root is None:
+                        root = elem
+                    continue
+
+                tag = self._local_name(elem.tag)
+                if tag not in ("url", "sitemap"):
+                    continue
+
+                loc = lastmod = None
+                for child in elem:
+                    child_tag = self._local_name(child.tag)
+                    if child_tag == "loc" and child.text:
+                        loc = child.text.strip()
+                    elif child_tag == "lastmod" and child.text:
+                        lastmod = child.text.strip()
+                if loc:
+                    yield tag, {"url": loc, "lastmod": lastmod}
+
+                root.clear()  # Drop finished entries so memory stays flat
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if not started:
+                started = True
+                if chunk[:2] == GZIP_MAGIC:
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+            if decompressor is None:
+                parser.feed(chunk)
+                yield from drain()
+                continue
+
+            data = decompressor.decompress(chunk, INFLATE_CHUNK)
+            while data:
+                parser.feed(data)
+                yield from drain()
+                data = decompressor.decompress(decompressor.unconsumed_tail, INFLATE_CHUNK)
+
+        parser.close()
+        yield from drain()
+
+    def stream_sitemap(self, sitemap_url):
+        """Fetches a single sitemap and yields its entries as they are parsed."""
+        with self.transport.stream_body(sitemap_url, timeout=10) as (status, chunks):
+            if status not in (200, 304):
+                logger.warning("⚠️ Failed to fetch sitemap: %s", sitemap_url)
+                return
+            yield from self.iterparse(chunks)
+
+    def iter_sitemap_records(self, sitemap_url):
+        """
+        Yields {"url", "lastmod"} records from a sitemap tree.
+        Nested sitemaps are streamed on one shared thread pool, and records reach the
+        caller through a bounded queue, so memory does not grow with sitemap size.
+        """
+        records = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        lock = threading.Lock()
+        seen = {sitemap_url}
+        pending = [1]  # Sitemaps submitted but not finished yet
+        done = object()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    records.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def process(url):
+            try:
+                for kind, record in self.stream_sitemap(url):
+                    if kind == "sitemap":
+                        with lock:
+                            if record["url"] in seen:
+                                continue
+                            seen.add(record["url"])
+                            pending[0] += 1
+                        executor.submit(process, record["url"])
+                    elif not put(record):
+                        return
+            except Exception as e:
+                logger.warning("⚠️ Error fetching sitemap %s: %s", url, e)
+            finally:
+                with lock:
+                    pending[0] -= 1
+                    finished = pending[0] == 0
+                if finished:
+                    put(done)
+
+        executor.submit(process, sitemap_url)
+        try:
+            while True:
+                record = records.get()
+                if record is done:
+                    break
+                yield record
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
 
     def get_sitemap_urls(self, sitemap_url):
         """Fetches all URLs from a sitemap, including nested sitemaps."""
-        headers = {"User-Agent": "Mozilla/5.0"}
+        urls = []
+        self.lastmods = {}
 
-        try:
-            response = requests.get(sitemap_url, headers=headers, timeout=10)
-            if response.status_code != 200:
-                print(f"⚠️ Failed to fetch sitemap: {sitemap_url}")
-                return []
-
-            root = ET.fromstring(response.content)
-            namespace = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
-            urls = []
-            nested_sitemaps = []
-
-            for elem in root.findall(f".//{namespace}loc"):
-                url = elem.text
-                if url.endswith(".xml"):
-                    nested_sitemaps.append(url)  # Collect nested sitemaps
-                else:
-                    urls.append(url)
-
-            # Fetch nested sitemaps in parallel
-            with ThreadPoolExecutor(max_workers=8) as executor:
-                results = executor.map(self.get_sitemap_urls, nested_sitemaps)
-                for result in results:
-                    urls.extend(result)
-
-            return urls
-
-        except Exception as e:
-            print(f"⚠️ Error fetching sitemap: {e}")
-            return []
+        for record in self.iter_sitemap_records(sitemap_url):
+            urls.append(record["url"])
+            if record["lastmod"]:
+                self.lastmods[record["url"]] = record["lastmod"]
 
+        return urls
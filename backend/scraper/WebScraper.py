@@ -1,28 +1,63 @@
-import requests
-from bs4 import BeautifulSoup
 from scraper.MongoDBHandler import MongoDBHandler
+from scraper.HttpTransport import HttpTransport
+from scraper.HttpCache import HttpCache
 from scraper.SitemapScraper import SitemapScraper
 from scraper.InternalLinkCrawler import InternalLinkCrawler
 from scraper.RobotsTxt import RobotsTxt
+from scraper.CrawlCheckpoint import CrawlCheckpoint, MongoCheckpointStore, FileCheckpointStore
 from urllib.parse import urlparse
 import csv
+import os
 from scraper.utils.get_website_name import get_website_name
+from scraper.utils.normalize_url import normalize_url
+from scraper.utils.logger import get_logger
+
+logger = get_logger(__name__)
 class WebScraper:
     """Coordinates the entire scraping process."""
 
-    def __init__(self, domain, db_handler=None, sitemap_scraper=None, link_crawler=None,robots_txt=None):
+    def __init__(self, domain, db_handler=None, sitemap_scraper=None, link_crawler=None,robots_txt=None, crawl_concurrency=16,
+                 transport=None, max_connections=100, max_connections_per_host=16, http2=False, cache_dir=None,
+                 checkpoint="mongo", checkpoint_interval=30):
         self.domain = self.remove_trailing_slash(domain)
         self.website_name = get_website_name(domain)
 
+        # Conditional-GET cache so repeat scrapes of an unchanged site mostly cost 304s
+        cache_dir = cache_dir if cache_dir is not None else os.getenv("HTTP_CACHE_DIR", ".http_cache")
+        cache = HttpCache(os.path.join(cache_dir, self.website_name)) if cache_dir else None
+
+        # One pooled transport shared by the sitemap scraper, the crawler and robots.txt
+        self.transport = transport or HttpTransport(
+            max_connections=max_connections,
+            max_connections_per_host=max_connections_per_host,
+            http2=http2,
+            cache=cache,
+        )
+
         # Use dependency injection for flexibility and testing
         self.db_handler = db_handler or MongoDBHandler(self.website_name)
-        self.sitemap_scraper = sitemap_scraper or SitemapScraper(self.domain)
-        self.link_crawler = link_crawler or InternalLinkCrawler(self.domain)
-        self.robots_txt = robots_txt or RobotsTxt(self.domain)
+        self.sitemap_scraper = sitemap_scraper or SitemapScraper(self.domain, transport=self.transport)
+        self.robots_txt = robots_txt or RobotsTxt(self.domain, transport=self.transport)
+        self.link_crawler = link_crawler or InternalLinkCrawler(
+            self.domain,
+            concurrency=crawl_concurrency,
+            transport=self.transport,
+            checkpoint=self.build_checkpoint(checkpoint, checkpoint_interval),
+            robots=self.robots_txt,
+        )
         
 
         self.scraped_urls = []
 
+    def build_checkpoint(self, backend, interval):
+        """Creates the crawl checkpoint: "mongo" (crawl_state collection), "file" (local JSON lines) or None."""
+        if backend == "mongo":
+            return CrawlCheckpoint(MongoCheckpointStore(self.db_handler.crawl_state_collection), interval)
+        if backend == "file":
+            path = os.path.join(os.getenv("CRAWL_STATE_DIR", ".crawl_state"), f"{self.website_name}.jsonl")
+            return CrawlCheckpoint(FileCheckpointStore(path), interval)
+        return None
+
     def get_website_name(self):
         """Extracts the name of the website from the domain and formats it."""
         return self.domain.replace("https://", "").replace("http://", "").split(".")[0]
@@ -34,27 +69,61 @@ class WebScraper:
     def fetch_sitemap_urls(self):
         """Fetches URLs from the sitemap."""
         sitemap_url = f"{self.domain}/sitemap.xml"
-        print("📌 Fetching sitemap URLs...")
+        logger.info("📌 Fetching sitemap URLs...")
         return self.sitemap_scraper.get_sitemap_urls(sitemap_url)
 
-    def crawl_internal_links(self, max_pages=200):
-        """Crawls internal links to find more pages."""
-        print("🚀 Crawling internal links...")
-        return self.link_crawler.crawl_internal_links(max_pages=max_pages)
-
-    def process_website(self):
-        """Orchestrates the full scraping process."""
-        sitemap_urls = self.fetch_sitemap_urls()
-        print(f"✅ Sitemap URLs Found: {len(sitemap_urls)}")
-
-        crawled_urls = self.crawl_internal_links()
-        print(f"✅ Crawled URLs Found: {len(crawled_urls)}")
+    def crawl_internal_links(self, max_pages=200, resume=False, progress=None, seeds=None):
+        """Crawls internal links to find more pages, starting from the homepage and `seeds`."""
+        logger.info("🚀 Crawling internal links...")
+        return self.link_crawler.crawl_internal_links(max_pages=max_pages, resume=resume, progress=progress,
+                                                      seeds=seeds)
+
+    def process_website(self, resume=False, progress=None):
+        """
+        Orchestrates the full scraping process.
+        With resume=True an interrupted crawl continues from its last checkpoint instead of starting over.
+        progress(pages_done, pages_total) is called as the crawl advances.
+        """
+        self.apply_crawl_delay()
+        # Sitemap results are saved before the crawl, so they survive if the crawl gets killed
+        sitemap_urls, lastmods = self.save_sitemap_urls()
+
+        # Sitemap URLs seed the crawl, so its budget goes to the pages the sitemap misses
+        crawled_urls = self.crawl_internal_links(resume=resume, progress=progress, seeds=sitemap_urls)
+        logger.info("✅ Crawled URLs Found: %d", len(crawled_urls))
         all_urls = self.get_all_urls_dict(sitemap_urls,crawled_urls)
-        print(f"✅ Total URLs Found: {len(all_urls)}")
+        logger.info("✅ Total URLs Found: %d", len(all_urls))
         self.scraped_urls = all_urls
-        self.db_handler.save_urls(self.scraped_urls)
+        self.db_handler.save_urls(self.scraped_urls, lastmods=lastmods)
+        unverified = {url: reason for url, reason in self.link_crawler.unverified.items() if url not in all_urls}
+        self.db_handler.save_unverified_urls(unverified)
+
+        stats = self.get_transport_stats()
+        logger.info("🔌 %d requests over %d connections (%d reused, %d not modified)",
+                    stats["requests"], stats["connections_opened"], stats["connections_reused"], stats["not_modified"])
+        for host, host_stats in stats["hosts"].items():
+            logger.info("⏱️ %s: %s req/s, %s concurrent, %d throttled, %d retries", host, host_stats["rate"],
+                        host_stats["concurrency"], host_stats["throttled"], host_stats["retries"])
+        logger.info("🎯 URL Extraction Completed!")
+
+    def save_sitemap_urls(self):
+        """Fetches the sitemap and stores its URLs with their indexing status; returns (urls, lastmods)."""
+        sitemap_urls = self.fetch_sitemap_urls()
+        logger.info("✅ Sitemap URLs Found: %d", len(sitemap_urls))
+        lastmods = {normalize_url(url) or url: lastmod for url, lastmod in self.sitemap_scraper.lastmods.items()}
+        self.db_handler.save_urls(self.get_all_urls_dict(sitemap_urls, []), lastmods=lastmods)
+        return sitemap_urls, lastmods
+
+    def apply_crawl_delay(self):
+        """Passes the robots.txt Crawl-delay on to the transport's per-host scheduler."""
+        delay = self.robots_txt.get_crawl_delay()
+        if delay:
+            self.transport.scheduler.set_crawl_delay(urlparse(self.domain).netloc, delay)
+
+    def get_transport_stats(self):
+        """Returns connection-reuse counters and per-host scheduler rates from the shared HTTP transport."""
+        return self.transport.stats()
 
-        print("🎯 URL Extraction Completed!")
     def save_urls_to_csv(self, filename="scraped_urls.csv"):
         with open(filename, mode='w', newline='', encoding='utf-8') as file:
             writer = csv.writer(file)
@@ -63,41 +132,24 @@ class WebScraper:
                 writer.writerow([url, status])  # Write both URL and status
         return filename  # Return filename for download handling
 
-    def get_robot_paths(self):
-        """Fetches all URLs from a robot.txt"""
-        return self.robots_txt.get_robot_paths()
-    def is_disallowed(self, url, disallowed_paths):
-        """Check if a URL is disallowed based on robots.txt rules."""
-        parsed_url_path = urlparse(url).path  # Extract only the path part of the URL
-        
-        for path in disallowed_paths:
-            if parsed_url_path.startswith(path.rstrip('/')):  # Check if URL starts with disallowed path
-                return True  # URL should be excluded
-
-        return False  # URL is allowed  
-    def remove_backslash(self,url):
-        """Removes the trailing slash from a URL."""
-        return url[:-1] if url.endswith("/") else url
-    
     def get_all_urls_dict(self, sitemap_urls, internal_urls):
         """Combines sitemap and internal URLs into a single dictionary, ensuring proper indexing status."""
         all_urls = {}
 
-        # Fetch disallowed paths from robots.txt
-        exclude_paths = self.get_robot_paths()
+        # Compiled robots.txt rules, cached per domain
+        robots = self.robots_txt.rules()
 
         # Mark sitemap URLs as indexed, but verify with robots.txt
         for url in sitemap_urls:
-            url=self.remove_backslash(url)
-            if self.is_disallowed(url, exclude_paths):
-                all_urls[url] = "non-indexed"
-            else:
-                all_urls[url] = "indexed"
+            url = normalize_url(url)
+            if not url:
+                continue
+            all_urls[url] = "indexed" if robots.is_allowed(url) else "non-indexed"
 
         # Mark internal URLs as non-indexed only if they are not already indexed
         for url in internal_urls:
-            url=self.remove_backslash(url)
-            if url not in all_urls:
+            url = normalize_url(url)
+            if url and url not in all_urls:
                 all_urls[url] = "non-indexed"
 
         return all_urls
@@ -0,0 +1,15 @@
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+
+
+def bulk_update(collection, updates, ordered=True):
+    """
+    Applies (filter, update, upsert) tuples to a MongoDB collection as one bulk write and returns its result.
+    Collections that are not pymongo collections, like the benchmarks' mongomock stand-in, apply the
+    tuples themselves through their own bulk_update(updates, ordered).
+    """
+    if not isinstance(collection, Collection):
+        return collection.bulk_update(updates, ordered=ordered)
+    return collection.bulk_write(
+        [UpdateOne(query, update, upsert=upsert) for query, update, upsert in updates], ordered=ordered
+    )
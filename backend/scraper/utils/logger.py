@@ -0,0 +1,33 @@
+import logging
+import os
+import sys
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+_configured = False
+
+
+def configure_logging(level=None):
+    """
+    Sets the level of every scraper logger from `level` or SCRAPER_LOG_LEVEL (default INFO).
+    DEBUG adds a line per page, INFO keeps run summaries, and WARNING (or "quiet") only reports problems.
+    Messages are formatted lazily, so a suppressed per-page line costs one level check.
+    """
+    global _configured
+    level = (level or os.getenv("SCRAPER_LOG_LEVEL", "INFO")).upper()
+    if level == "QUIET":
+        level = "WARNING"
+    root = logging.getLogger("scraper")
+    if not root.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+        root.propagate = False
+    root.setLevel(level)
+    _configured = True
+
+
+def get_logger(name):
+    """Logger for a scraper module (pass __name__), configured from the environment on first use."""
+    if not _configured:
+        configure_logging()
+    return logging.getLogger(name)
@@ -0,0 +1,76 @@
+import time
+from contextlib import contextmanager
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class _NoOpMetric:
+    """Stands in for every metric when prometheus_client is not installed."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+def _metric(kind, name, documentation, labels=(), **kwargs):
+    if not PROMETHEUS_AVAILABLE:
+        return _NoOpMetric()
+    return {"counter": Counter, "gauge": Gauge, "histogram": Histogram}[kind](name, documentation, labels, **kwargs)
+
+
+FETCH_SECONDS = _metric("histogram", "scraper_fetch_seconds", "HTTP request time until the response headers",
+                        ["outcome"], buckets=LATENCY_BUCKETS)
+CONNECT_SECONDS = _metric("histogram", "scraper_connect_seconds",
+                          "New connection setup time; phase tcp includes the DNS lookup", ["phase"],
+                          buckets=LATENCY_BUCKETS)
+RETRIES = _metric("counter", "scraper_retries_total", "HTTP requests retried after a throttle or error")
+PARSE_SECONDS = _metric("histogram", "scraper_parse_seconds", "HTML parse and extraction time", ["stage"],
+                        buckets=LATENCY_BUCKETS)
+RENDER_SECONDS = _metric("histogram", "scraper_render_seconds", "Playwright page render time",
+                         buckets=LATENCY_BUCKETS)
+DB_WRITE_SECONDS = _metric("histogram", "scraper_db_write_seconds", "MongoDB write time", ["operation"],
+                           buckets=LATENCY_BUCKETS)
+BODY_BYTES = _metric("counter", "scraper_body_bytes_total",
+                     "Response body bytes downloaded, and bytes avoided by skipping or truncating bodies", ["outcome"])
+QUEUE_DEPTH = _metric("gauge", "scraper_queue_depth", "URLs waiting to be fetched", ["stage"])
+IN_FLIGHT = _metric("gauge", "scraper_in_flight_pages", "Pages being fetched or rendered right now", ["stage"])
+PAGES = _metric("counter", "scraper_pages_total", "Pages processed", ["stage", "outcome"])
+
+
+def status_outcome(status_code):
+    """Label for a response status: 2xx, 3xx, 4xx or 5xx."""
+    return f"{status_code // 100}xx"
+
+
+@contextmanager
+def timed(metric):
+    """Observes the time spent in the block on a histogram (or one of its label children)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric.observe(time.perf_counter() - start)
+
+
+def render_metrics():
+    """Returns (body, content type) of the Prometheus text exposition, or None without prometheus_client."""
+    if not PROMETHEUS_AVAILABLE:
+        return None
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,81 @@
+import re
+from urllib.parse import quote, urljoin, urlsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = frozenset({
+    "gclid", "dclid", "gbraid", "wbraid", "fbclid", "msclkid", "yclid", "twclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok", "oly_anon_id", "oly_enc_id",
+})
+TRACKING_PREFIXES = ("utm_",)
+
+_UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+_PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+_PATH_SAFE = "/:@!$&'()*+,;=%"
+_QUERY_SAFE = "/?:@!$'()*+,;%"
+
+
+def _normalize_escapes(component, safe):
+    """Decodes escaped unreserved characters, upper-cases the remaining escapes and escapes raw unsafe characters."""
+    def fix(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in _UNRESERVED else "%" + match.group(1).upper()
+    return quote(_PERCENT_ESCAPE.sub(fix, component), safe=safe)
+
+
+def _remove_dot_segments(path):
+    segments = []
+    for segment in path.split("/"):
+        if segment == "..":
+            if len(segments) > 1:
+                segments.pop()
+        elif segment != ".":
+            segments.append(segment)
+    return "/".join(segments)
+
+
+def _is_tracking(key):
+    key = key.lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url, base=None):
+    """
+    Returns the canonical form of an http(s) URL, or None for anything else (mailto:, javascript:, bad ports...).
+    Resolves it against `base`, lower-cases scheme and host, drops default ports, fragments and
+    tracking parameters, normalizes percent-escapes and dot segments, sorts the query and removes
+    trailing slashes, so every variant of a page maps to one key.
+    """
+    if base is not None:
+        url = urljoin(base, url.strip())
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.rstrip(".")
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+
+    path = _remove_dot_segments(_normalize_escapes(parts.path, _PATH_SAFE)).rstrip("/")
+
+    params = []
+    for param in parts.query.split("&"):
+        if not param:
+            continue
+        key, sep, value = param.partition("=")
+        if _is_tracking(key):
+            continue
+        params.append(_normalize_escapes(key, _QUERY_SAFE) + sep + _normalize_escapes(value, _QUERY_SAFE))
+
+    if params:
+        return f"{scheme}://{host}{path or '/'}?{'&'.join(sorted(params))}"
+    return f"{scheme}://{host}{path}"
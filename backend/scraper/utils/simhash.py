@@ -0,0 +1,29 @@
+import hashlib
+import re
+import numpy as np
+
+WORD = re.compile(r"\w+")
+
+
+def simhash(text, shingle_size=3):
+    """
+    64-bit SimHash of a text over its word shingles: pages that share most of their
+    text get fingerprints that differ in only a few bits. Returns None for empty text.
+    """
+    words = WORD.findall(text.lower())
+    if not words:
+        return None
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    digests = b"".join(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest() for shingle in shingles)
+    # One row of 64 bits per shingle; a bit is set when most shingles set it
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    majority = bits.sum(axis=0, dtype=np.int64) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(majority, bitorder="little").tobytes(), "little")
+
+
+def hamming_distance(a, b):
+    return (a ^ b).bit_count()
@@ -0,0 +1,21 @@
+import os
+from contextlib import nullcontext
+
+try:
+    from opentelemetry import trace
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+# Spans are only created when SCRAPER_TRACING=1 and opentelemetry-api is installed; the exporter is
+# whatever SDK the process configures (for example through opentelemetry-instrument)
+TRACING_ENABLED = OTEL_AVAILABLE and os.getenv("SCRAPER_TRACING", "0") == "1"
+_tracer = trace.get_tracer("scraper") if TRACING_ENABLED else None
+
+
+def span(name, **attributes):
+    """Context manager for an OpenTelemetry span, nested under the current one; a no-op when tracing is off."""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes={key: value for key, value in attributes.items()
+                                                            if value is not None})
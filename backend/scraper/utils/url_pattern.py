@@ -0,0 +1,38 @@
+import re
+from urllib.parse import urlsplit
+
+_NUMBER = re.compile(r"^\d+$")
+_DATE = re.compile(r"^\d{4}-\d{1,2}(-\d{1,2})?$")
+_HEX_ID = re.compile(r"^(?=.*\d)[0-9a-fA-F-]{8,}$")  # Hex ids and UUIDs
+_DIGITS = re.compile(r"\d+")
+
+
+def param_names(query):
+    """Names of the parameters in a query string."""
+    return frozenset(param.partition("=")[0] for param in query.split("&") if param) if query else frozenset()
+
+
+def url_pattern(url):
+    """
+    URL with its variable parts replaced by placeholders ({n}, {date}, {id}) and only the sorted names
+    of its query parameters kept, so /news/2024/05?page=3&tag=a and /news/2023/11?tag=b&page=7 share
+    one pattern. The crawl frontier and duplicate detection both group pages by it.
+    """
+    parts = urlsplit(url)
+    segments = []
+    for segment in parts.path.split("/"):
+        if not segment:
+            continue
+        if _NUMBER.match(segment):
+            segments.append("{n}")
+        elif _DATE.match(segment):
+            segments.append("{date}")
+        elif _HEX_ID.match(segment):
+            segments.append("{id}")
+        else:
+            segments.append(_DIGITS.sub("{n}", segment))
+    pattern = "/" + "/".join(segments)
+    names = param_names(parts.query)
+    if names:
+        pattern += "?" + "&".join(sorted(names))
+    return pattern
@@ -0,0 +1,38 @@
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+
+from benchmarks.mongo_stand_in import STAND_IN_URI, bench_db_handler
+from scraper.HostScheduler import HostScheduler
+from scraper.HttpTransport import AsyncHttpSession, HttpTransport
+
+
+class MockHttpTransport(HttpTransport):
+    """HttpTransport whose sync and async requests are answered by `handler` (see httpx.MockTransport)."""
+
+    def __init__(self, handler, **options):
+        options.setdefault("scheduler", HostScheduler(initial_rate=1000, max_rate=1000, min_rate=1000,
+                                                      backoff_base=0.001))
+        super().__init__(**options)
+        self.handler = handler
+        self._client = httpx.Client(transport=httpx.MockTransport(handler), follow_redirects=True)
+
+    @asynccontextmanager
+    async def async_session(self):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(self.handler), follow_redirects=True) as client:
+            yield AsyncHttpSession(self, client)
+
+
+@pytest.fixture
+def mock_transport():
+    """Builds a MockHttpTransport for a request handler, paced fast enough that tests never wait on it."""
+    return MockHttpTransport
+
+
+@pytest.fixture
+def db_handler(monkeypatch):
+    """A MongoDBHandler on an empty in-memory mongomock database."""
+    monkeypatch.delenv("BENCH_MONGO_URI", raising=False)
+    monkeypatch.setenv("MONGO_URI", STAND_IN_URI)
+    return bench_db_handler("site")
@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+
+import httpx
+
+from scraper.ContentScraper import ScrapeRunner
+from scraper.HostScheduler import HostScheduler
+from scraper.HttpTransport import AsyncHttpSession, HttpTransport
+from scraper.MetadataScraper import MetadataScraper
+
+URL = "https://site.test/page"
+PAGE = ("<html><head><title>Page</title></head><body><h1>Page</h1><p>"
+        + "Enough visible text to be used without rendering. " * 10 + "</p></body></html>").encode()
+
+
+class Server:
+    def __init__(self, body=PAGE, etag='"v2"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304, headers={"etag": self.etag})
+        return httpx.Response(200, headers={"content-type": "text/html", "etag": self.etag}, content=self.body)
+
+
+def make_runner(db_handler, urls=(URL,)):
+    db_handler.save_urls({url: "indexed" for url in urls})
+    scheduler = HostScheduler(initial_rate=1000, max_rate=1000, min_rate=1000)
+    runner = ScrapeRunner("https://site.test", incremental=True, transport=HttpTransport(scheduler=scheduler),
+                          db_handler=db_handler, extract_workers=0)
+    runner.scraper = MetadataScraper(runner.domain, runner.nav_filter)
+    return runner
+
+
+def check_and_scrape(runner, server, state):
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(server)) as client:
+            session = AsyncHttpSession(runner.transport, client)
+            changed, fingerprint, response = await runner._check_changed(session, URL, state)
+            data = await runner._scrape_static(session, URL, response) if changed else None
+            return changed, fingerprint, data
+    return asyncio.run(main())
+
+
+def test_changed_pages_are_downloaded_once(db_handler):
+    server = Server()
+    runner = make_runner(db_handler)
+    changed, fingerprint, data = check_and_scrape(runner, server, {"content_hash": "old", "etag": '"v1"'})
+    assert changed
+    assert fingerprint["content_hash"] == hashlib.sha256(PAGE).hexdigest()
+    assert fingerprint["etag"] == '"v2"'
+    assert data["title"] == "Page"
+    assert len(server.requests) == 1
+    assert server.requests[0].headers["if-none-match"] == '"v1"'
+
+
+def test_unchanged_pages_are_not_scraped(db_handler):
+    runner = make_runner(db_handler)
+    same_hash = {"content_hash": hashlib.sha256(PAGE).hexdigest()}
+    assert not check_and_scrape(runner, Server(), {**same_hash, "etag": '"v2"'})[0]  # 304
+    assert not check_and_scrape(runner, Server(etag='"v3"'), {**same_hash, "etag": '"v2"'})[0]  # Same body
+
+
+def test_a_changed_lastmod_with_a_304_is_fetched_again(db_handler):
+    server = Server()
+    runner = make_runner(db_handler)
+    state = {"content_hash": "stored", "etag": '"v2"', "lastmod": "2026-10-01", "scraped_lastmod": "2026-09-01"}
+    changed, fingerprint, data = check_and_scrape(runner, server, state)
+    assert changed and fingerprint["scraped_lastmod"] == "2026-10-01"
+    assert data["title"] == "Page"
+    assert [request.headers.get("if-none-match") for request in server.requests] == ['"v2"', None]
+
+
+def test_pages_with_a_matching_lastmod_are_carried(db_handler):
+    urls = ["https://site.test/a", "https://site.test/b"]
+    runner = make_runner(db_handler, urls)
+    change_state = {"https://site.test/a": {"lastmod": "2026-10-01", "scraped_lastmod": "2026-10-01"},
+                    "https://site.test/b": {"lastmod": "2026-10-02", "scraped_lastmod": "2026-10-01"}}
+    assert runner._select_candidate_urls(change_state) == ["https://site.test/b"]
+    assert runner.carried == 1
@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+import pytest
+
+from scraper.CrawlCheckpoint import (
+    DONE, FAILED, IN_PROGRESS, QUEUED, CrawlCheckpoint, FileCheckpointStore, MongoCheckpointStore,
+)
+from scraper.InternalLinkCrawler import InternalLinkCrawler
+
+SITE = "https://site.test"
+
+
+class Site:
+    """/ links to /a, /b, /missing and /slow; /b can fail and /slow can hang, to interrupt a crawl."""
+
+    def __init__(self, fail=False, hang=False):
+        self.fail = fail
+        self.hang = hang
+        self.fetched = []
+
+    async def __call__(self, request):
+        path = request.url.path
+        self.fetched.append(path)
+        if path == "/b" and self.fail:
+            raise httpx.ConnectError("refused", request=request)
+        if path == "/slow" and self.hang:
+            await asyncio.sleep(60)
+        if path == "/missing":
+            return httpx.Response(404)
+        links = ("/a", "/b", "/missing", "/slow") if path == "/" else ()
+        html = "<html><body>" + "".join(f'<a href="{link}">{link}</a>' for link in links) + "</body></html>"
+        return httpx.Response(200, headers={"content-type": "text/html"}, html=html)
+
+
+@pytest.fixture(params=["file", "mongo"])
+def checkpoint(request, tmp_path):
+    if request.param == "file":
+        store = FileCheckpointStore(str(tmp_path / "crawl" / "checkpoint.jsonl"))
+    else:
+        store = MongoCheckpointStore(request.getfixturevalue("db_handler").crawl_state_collection)
+    return CrawlCheckpoint(store, interval=0.01)
+
+
+def crawl(mock_transport, checkpoint, site, resume=False, kill_after=None):
+    """Crawls `site`; with kill_after, the crawl is cancelled after that many seconds, like a killed process."""
+    crawler = InternalLinkCrawler(SITE, concurrency=4, transport=mock_transport(site, max_retries=0),
+                                  checkpoint=checkpoint)
+
+    async def main():
+        coroutine = crawler.crawl_internal_links_async(max_pages=100, resume=resume)
+        if kill_after is None:
+            return await coroutine
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(coroutine, kill_after)
+
+    return asyncio.run(main())
+
+
+def test_store_round_trip(checkpoint):
+    checkpoint.mark("https://site.test/a", QUEUED)
+    checkpoint.mark("https://site.test/b", IN_PROGRESS)
+    checkpoint.flush()
+    checkpoint.mark("https://site.test/a", DONE)
+    checkpoint.flush()
+    assert checkpoint.load() == {"https://site.test/a": DONE, "https://site.test/b": IN_PROGRESS}
+    checkpoint.clear()
+    assert checkpoint.load() == {}
+
+
+def test_file_store_ignores_a_torn_last_line(tmp_path):
+    store = FileCheckpointStore(str(tmp_path / "checkpoint.jsonl"))
+    store.save({"https://site.test/a": DONE})
+    with open(store.path, "a", encoding="utf-8") as f:
+        f.write('{"url": "https://site.test/b", "sta')
+    assert store.load() == {"https://site.test/a": DONE}
+
+
+def test_finished_crawl_leaves_nothing_to_resume(mock_transport, checkpoint):
+    site = Site()
+    found = crawl(mock_transport, checkpoint, site)
+    assert sorted(found) == [SITE, f"{SITE}/a", f"{SITE}/b", f"{SITE}/slow"]
+    assert checkpoint.load() == {}
+
+
+def test_killed_crawl_resumes_unfinished_and_failed_fetches(mock_transport, checkpoint):
+    crawl(mock_transport, checkpoint, Site(fail=True, hang=True), kill_after=0.5)
+    assert checkpoint.load() == {
+        SITE: DONE, f"{SITE}/a": DONE, f"{SITE}/missing": FAILED,
+        f"{SITE}/b": QUEUED,  # The fetch raised, so it is tried again
+        f"{SITE}/slow": IN_PROGRESS,
+    }
+
+    site = Site()
+    found = crawl(mock_transport, checkpoint, site, resume=True)
+    assert sorted(site.fetched) == ["/b", "/slow"]
+    # A 404 is neither fetched again nor reported as a page
+    assert sorted(found) == [SITE, f"{SITE}/a", f"{SITE}/b", f"{SITE}/slow"]
+
+
+def test_fresh_crawl_clears_an_earlier_checkpoint(mock_transport, checkpoint):
+    checkpoint.store.save({f"{SITE}/old-gone": QUEUED, f"{SITE}/old-done": DONE})
+    crawl(mock_transport, checkpoint, Site(hang=True), kill_after=0.5)
+    assert not {f"{SITE}/old-gone", f"{SITE}/old-done"} & set(checkpoint.load())
+
+    site = Site()
+    found = crawl(mock_transport, checkpoint, site, resume=True)
+    assert site.fetched == ["/slow"]
+    assert f"{SITE}/old-gone" not in found and f"{SITE}/old-done" not in found
@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+
+import pytest
+
+from scraper.DataExporter import DataExporter
+
+PAGES = [
+    {"url": f"https://site.test/{n:02d}", "status": "indexed", "title": f"Page {n}",
+     "headings": {f"h{i}": i % 2 for i in range(1, 7)}, "links_to": [f"https://site.test/{n + 1:02d}"],
+     "pagerank": n / 100, "is_orphan": n == 0}
+    for n in range(25)
+]
+
+
+@pytest.fixture
+def exporter(db_handler):
+    db_handler.update_metadata(list(reversed([dict(page) for page in PAGES])))
+    db_handler.update_metadata([{"url": "https://site.test/99", "headings": {}, "title": None}])
+    return DataExporter(db_handler, batch_size=10)
+
+
+def test_csv_streams_one_chunk_per_batch(exporter):
+    chunks = list(exporter.export("csv", fields=["title", "headings", "links_to"]))
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert rows[0] == ["url", "title", "headings", "links_to"]
+    assert [row[0] for row in rows[1:]] == [page["url"] for page in PAGES] + ["https://site.test/99"]
+    assert rows[1][1] == "Page 0"
+    assert json.loads(rows[1][2]) == PAGES[0]["headings"]
+    assert json.loads(rows[1][3]) == PAGES[0]["links_to"]
+    assert rows[-1] == ["https://site.test/99", "", "{}", ""]
+
+
+def test_ndjson_pages_through_the_collection(exporter):
+    def export(after=None):
+        body = b"".join(exporter.export("ndjson", fields=["url", "pagerank"], after=after, limit=10))
+        return [json.loads(line) for line in body.decode("utf-8").splitlines()]
+
+    first = export()
+    assert first[0] == {"url": "https://site.test/00", "pagerank": 0.0}
+    second = export(after=first[-1]["url"])
+    assert [page["url"] for page in first + second] == [page["url"] for page in PAGES[:20]]
+
+
+def test_empty_export_still_has_a_header(db_handler):
+    assert b"".join(DataExporter(db_handler).export("csv", fields=["title"])) == b"url,title\r\n"
+    assert b"".join(DataExporter(db_handler).export("ndjson")) == b""
+
+
+def test_unknown_format(exporter):
+    with pytest.raises(ValueError):
+        exporter.export("xml")
+
+
+def test_parquet(exporter):
+    pq = pytest.importorskip("pyarrow.parquet")
+    chunks = list(exporter.export("parquet", fields=["headings", "links_to", "pagerank", "is_orphan", "status"]))
+    assert len(chunks) == 4  # One row group per batch, then the footer
+    table = pq.read_table(io.BytesIO(b"".join(chunks)))
+    assert table.num_rows == 26
+    assert table.schema.field("pagerank").type == "double"
+    rows = table.to_pylist()
+    assert rows[1] == {"url": "https://site.test/01", "headings": PAGES[1]["headings"],
+                       "links_to": PAGES[1]["links_to"], "pagerank": 0.01, "is_orphan": False, "status": "indexed"}
+    assert rows[-1]["headings"] is None  # A page that failed to load
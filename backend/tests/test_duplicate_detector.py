@@ -0,0 +1,73 @@
+import random
+
+from scraper.DuplicateDetector import DuplicateDetector, SimHashIndex
+from scraper.utils.simhash import hamming_distance, simhash
+
+ARTICLE = " ".join(f"word{n % 97} topic{n % 13} detail{n}" for n in range(300))
+
+
+def flip(value, *bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def test_simhash_is_close_for_near_duplicates_and_far_otherwise():
+    base = simhash(ARTICLE)
+    assert base == simhash(ARTICLE.upper())  # Case does not matter
+    assert hamming_distance(base, simhash(ARTICLE + " posted today by the editor")) <= 3
+    assert hamming_distance(base, simhash(" ".join(f"other{n} text{n % 5}" for n in range(300)))) > 10
+    assert simhash("") is None and simhash("  ...  ") is None
+    assert simhash("two words") is not None
+
+
+def test_index_finds_every_hash_within_max_distance():
+    rng = random.Random(7)
+    index = SimHashIndex(max_distance=3)
+    value = rng.getrandbits(64)
+    index.add("https://site.test/original", value)
+    for _ in range(200):
+        # Up to max_distance bits, anywhere: at least one of the bands is untouched
+        near = flip(value, *rng.sample(range(64), rng.randint(1, 3)))
+        assert index.near(near) == ["https://site.test/original"]
+    # One bit in every band is further than max_distance
+    assert index.near(flip(value, 0, 16, 32, 48)) == []
+
+
+def test_clusters_join_chains_of_near_duplicates():
+    index = SimHashIndex(max_distance=3)
+    value = 0x0123456789ABCDEF
+    assert index.add("https://site.test/a", value) == []
+    assert index.add("https://site.test/b", flip(value, 1, 2)) == ["https://site.test/a"]
+    # Too far from /a, close to /b: one cluster through /b
+    assert index.add("https://site.test/c", flip(value, 1, 2, 20, 40, 60)) == ["https://site.test/b"]
+    assert index.add("https://site.test/d", ~value & (2 ** 64 - 1)) == []
+    assert index.add("https://site.test/a", value) == []  # Already indexed
+
+    clusters = index.clusters()
+    assert list(clusters) == ["https://site.test/a"]
+    assert sorted(clusters["https://site.test/a"]) == ["https://site.test/a", "https://site.test/b",
+                                                      "https://site.test/c"]
+
+
+def test_detector_skips_patterns_that_keep_producing_duplicates():
+    detector = DuplicateDetector(skip_patterns=True, min_samples=10)
+    template = simhash(ARTICLE)
+    detector.add("https://site.test/article", simhash_hex(simhash("a genuinely different page " * 20)))
+    for n in range(10):
+        detector.add(f"https://site.test/list?page={n}", simhash_hex(flip(template, n % 3)))
+    assert detector.should_skip("https://site.test/list?page=99")
+    assert not detector.should_skip("https://site.test/article")
+    assert detector.skipped == 1
+    assert detector.duplicate_patterns() == ["/list?page"]
+    assert not DuplicateDetector().should_skip("https://site.test/list?page=99")  # Only with skip_patterns
+
+
+def test_pages_without_text_are_ignored():
+    detector = DuplicateDetector()
+    assert detector.add("https://site.test/empty", None) is False
+    assert detector.index.hashes == {}
+
+
+def simhash_hex(value):
+    return f"{value:016x}"
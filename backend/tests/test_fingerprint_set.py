@@ -0,0 +1,58 @@
+import pytest
+
+from scraper.FingerprintSet import BloomFilter, FingerprintSet, url_fingerprint
+
+URLS = [f"https://site.test/page/{n}?q={n % 7}" for n in range(20000)]
+
+
+def test_fingerprints_are_stable_and_never_zero():
+    assert url_fingerprint("https://site.test/") == url_fingerprint("https://site.test/")
+    assert url_fingerprint("https://site.test/a") != url_fingerprint("https://site.test/b")
+    assert all(url_fingerprint(url) for url in URLS[:1000])
+
+
+def test_fingerprint_set_is_exact_across_growth():
+    seen = FingerprintSet(capacity=8)
+    assert all(seen.add(url) for url in URLS)
+    assert not any(seen.add(url) for url in URLS)
+    assert len(seen) == len(URLS)
+    assert all(url in seen for url in URLS)
+    assert not any(f"https://site.test/other/{n}" in seen for n in range(20000))
+
+
+def test_fingerprint_set_stays_half_full():
+    seen = FingerprintSet(capacity=len(URLS))
+    size = seen.memory_bytes()
+    for url in URLS:
+        seen.add(url)
+    assert seen.memory_bytes() == size  # Sized up front, never grew
+    assert 16 <= seen.memory_bytes() / len(URLS) <= 32
+
+
+def test_colliding_slots_probe_to_the_next_one():
+    seen = FingerprintSet(capacity=4)
+    mask = seen._mask
+    # Fingerprints that all map to slot 3
+    fingerprints = [3 + (mask + 1) * n for n in range(1, 4)]
+    assert all(seen.add_fingerprint(fingerprint) for fingerprint in fingerprints)
+    assert not any(seen.add_fingerprint(fingerprint) for fingerprint in fingerprints)
+
+
+@pytest.mark.parametrize("error_rate", [0.01, 0.001])
+def test_bloom_filter_never_forgets_and_keeps_its_error_rate(error_rate):
+    bloom = BloomFilter(capacity=len(URLS), error_rate=error_rate)
+    added = sum(bloom.add(url) for url in URLS)
+    assert all(url in bloom for url in URLS)
+    assert not any(bloom.add(url) for url in URLS)
+    # A false positive makes a new URL look seen, so a few adds report nothing new
+    assert added >= len(URLS) * (1 - 2 * error_rate)
+
+    others = [f"https://site.test/other/{n}" for n in range(20000)]
+    false_positives = sum(url in bloom for url in others)
+    assert false_positives / len(others) <= 2 * error_rate
+
+
+def test_bloom_filter_is_smaller_than_the_exact_set():
+    bloom = BloomFilter(capacity=len(URLS), error_rate=0.01)
+    assert bloom.memory_bytes() / len(URLS) < 1.3
+    assert bloom.memory_bytes() < FingerprintSet(capacity=len(URLS)).memory_bytes() / 10
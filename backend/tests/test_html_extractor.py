@@ -0,0 +1,77 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from scraper.HtmlExtractor import LXML_AVAILABLE, HtmlExtractor
+
+DOCUMENTS = [
+    """<!DOCTYPE html><html><head><title>  Home  </title>
+    <meta name="description" content=" A site &amp; more "><link rel="canonical" href="/home"></head>
+    <body><header><nav><ul><li><a href="/">Home</a></li><li><a href="/about">About</a></li></ul></nav></header>
+    <main><h1>Welcome</h1><h2>One</h2><h2>Two</h2><p>Text with <a href="/post?id=1#top">a link</a>.</p>
+    <a name="anchor-without-href">no href</a><a href="">empty</a></main>
+    <footer><a href="https://other.test/">elsewhere</a><h6>Fine print</h6></footer></body></html>""",
+    # A title BeautifulSoup's .string rejects, a meta description without content, no headings
+    """<html><head><title>Part <b>bold</b></title><meta name="description"></head>
+    <body><div><a href="/x">x</a></div></body></html>""",
+    # No head at all, second title and description ignored
+    """<html><body><h3>Only</h3><title>Late</title><title>Later</title>
+    <meta name="description" content="first"><meta name="description" content="second">
+    <table><tr><td><a href="/cell">cell</a></td></tr></table></body></html>""",
+    # Comments, scripts and entities
+    """<html><head><title>A &lt;b&gt; title</title><script>var a = "<a href='/fake'>";</script></head>
+    <body><!-- <a href="/commented">x</a> --><section><article><h1>Post</h1>
+    <a href="/tag?x=1&amp;y=2">tag</a></article></section></body></html>""",
+    "<html><head></head><body></body></html>",
+]
+
+
+def old_extract(html):
+    """The extraction MetadataScraper and NavigationLinkFilter did with BeautifulSoup before the extractor."""
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.string.strip() if soup.title and soup.title.string else None
+    meta_desc = soup.find("meta", attrs={"name": "description"})
+    meta_description = meta_desc["content"].strip() if meta_desc and meta_desc.has_attr("content") else None
+    headings = {f"h{i}": len(soup.find_all(f"h{i}")) for i in range(1, 7)}
+
+    anchors = []
+    for a in soup.find_all("a", href=True):
+        path, element = [], a
+        while element and element.name:
+            path.insert(0, element.name)
+            element = element.parent
+        anchors.append((a["href"], " > ".join(path)))
+    return {"title": title, "meta_description": meta_description, "headings": headings, "anchors": anchors}
+
+
+BACKENDS = ["bs4", pytest.param("lxml", marks=pytest.mark.skipif(not LXML_AVAILABLE, reason="lxml not installed"))]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("html", DOCUMENTS)
+def test_matches_the_old_beautifulsoup_output(backend, html):
+    facts = HtmlExtractor(backend).extract(html)
+    assert {key: facts[key] for key in ("title", "meta_description", "headings", "anchors")} == old_extract(html)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_canonical_and_text(backend):
+    facts = HtmlExtractor(backend, collect_text=True).extract(DOCUMENTS[0])
+    assert facts["canonical"] == "/home"
+    assert facts["text"] == "Home About Welcome One Two Text with a link . no href empty elsewhere Fine print"
+    assert "var a" not in HtmlExtractor(backend, collect_text=True).extract(DOCUMENTS[3])["text"]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_structural_paths_are_signatures_shared_by_backends(backend):
+    html = '<html><body><nav id="menu-3" class="main nav-12"><a href="/a">a</a></nav></body></html>'
+    expected = HtmlExtractor("bs4", structural_paths=True).extract(html)["anchors"]
+    (href, signature), = HtmlExtractor(backend, structural_paths=True).extract(html)["anchors"]
+    assert (href, signature) == expected[0]
+    assert isinstance(signature, int)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("html", ["", "   ", "not html at all"])
+def test_degenerate_documents(backend, html):
+    facts = HtmlExtractor(backend).extract(html)
+    assert facts["title"] is None and facts["anchors"] == []
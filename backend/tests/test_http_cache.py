@@ -0,0 +1,130 @@
+import asyncio
+import os
+import time
+
+import httpx
+
+from scraper.HostScheduler import HostScheduler
+from scraper.HttpCache import HttpCache
+from scraper.HttpTransport import AsyncHttpSession, HttpTransport
+
+PAGE = b"<html><title>Page</title></html>"
+
+
+class Server:
+    """Serves PAGE with an ETag, answering 304 to a matching If-None-Match."""
+
+    def __init__(self, etag='"v1"'):
+        self.etag = etag
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if self.etag and request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304, headers={"etag": self.etag})
+        headers = {"content-type": "text/html", "etag": self.etag} if self.etag else {"content-type": "text/html"}
+        return httpx.Response(200, headers=headers, content=PAGE)
+
+
+def make_transport(tmp_path, server, **cache_options):
+    scheduler = HostScheduler(initial_rate=1000, max_rate=1000, min_rate=1000, backoff_base=0.001)
+    transport = HttpTransport(scheduler=scheduler, cache=HttpCache(str(tmp_path), **cache_options))
+    transport._client = httpx.Client(transport=httpx.MockTransport(server))
+    return transport
+
+
+def get_parsed(transport, server, url, parse, **options):
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(server)) as client:
+            return await AsyncHttpSession(transport, client).get_parsed(url, parse, **options)
+    return asyncio.run(main())
+
+
+def title(response):
+    return response.text[response.text.index("<title>") + 7:response.text.index("</title>")]
+
+
+def test_conditional_get_reuses_the_parsed_result(tmp_path):
+    server = Server()
+    transport = make_transport(tmp_path, server)
+    assert get_parsed(transport, server, "http://site.test/", title) == (200, "Page")
+
+    def never(response):
+        raise AssertionError("an unchanged page is not parsed again")
+
+    assert get_parsed(transport, server, "http://site.test/", never) == (304, "Page")
+    assert server.requests[1].headers["if-none-match"] == '"v1"'
+    assert transport.stats()["not_modified"] == 1
+
+
+def test_changed_pages_are_parsed_and_stored_again(tmp_path):
+    server = Server()
+    transport = make_transport(tmp_path, server)
+    get_parsed(transport, server, "http://site.test/", title)
+    server.etag = '"v2"'
+    assert get_parsed(transport, server, "http://site.test/", lambda response: "new") == (200, "new")
+    assert transport.cache.lookup("http://site.test/")["etag"] == '"v2"'
+
+
+def test_responses_without_validators_are_not_cached(tmp_path):
+    server = Server(etag=None)
+    transport = make_transport(tmp_path, server)
+    get_parsed(transport, server, "http://site.test/", title)
+    assert transport.cache.lookup("http://site.test/") is None
+    assert "if-none-match" not in server.requests[-1].headers
+
+
+def test_limited_bodies_are_never_cached(tmp_path):
+    server = Server()
+    transport = make_transport(tmp_path, server)
+    status, result = get_parsed(transport, server, "http://site.test/", lambda response: len(response.content),
+                                max_bytes=10)
+    assert (status, result) == (200, 10)
+    assert transport.cache.lookup("http://site.test/") is None
+    # The next full fetch is stored, and the one after it revalidates
+    get_parsed(transport, server, "http://site.test/", title)
+    assert get_parsed(transport, server, "http://site.test/", title) == (304, "Page")
+
+
+def test_stream_body_replays_the_stored_body(tmp_path):
+    server = Server()
+    transport = make_transport(tmp_path, server)
+    with transport.stream_body("http://site.test/sitemap.xml", chunk_size=8) as (status, chunks):
+        assert status == 200
+        assert b"".join(chunks) == PAGE
+    with transport.stream_body("http://site.test/sitemap.xml", chunk_size=8) as (status, chunks):
+        assert status == 304
+        assert b"".join(chunks) == PAGE
+
+
+def test_partly_read_streams_are_not_cached(tmp_path):
+    server = Server()
+    transport = make_transport(tmp_path, server)
+    with transport.stream_body("http://site.test/sitemap.xml", chunk_size=8) as (status, chunks):
+        next(chunks)
+    assert transport.cache.lookup("http://site.test/sitemap.xml") is None
+    assert os.listdir(transport.cache.body_dir) == []
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = HttpCache(str(tmp_path), max_bytes=3 * len(PAGE))
+    response = httpx.Response(200, headers={"etag": '"v1"'}, content=PAGE)
+    for n in range(3):
+        cache.store(f"http://site.test/{n}", response)
+        time.sleep(0.001)
+    cache.revalidated("http://site.test/0")  # Used again, so /1 is now the oldest
+    cache.store("http://site.test/3", response)
+
+    # Over max_bytes, the oldest entries go until the cache is under 90% of it
+    assert [n for n in range(4) if cache.lookup(f"http://site.test/{n}")] == [0, 3]
+    assert cache.total_bytes == 2 * len(PAGE)
+    assert len(os.listdir(cache.body_dir)) == 2
+
+
+def test_expired_entries_are_ignored_and_evicted(tmp_path):
+    cache = HttpCache(str(tmp_path), max_age=-1)
+    cache.store("http://site.test/", httpx.Response(200, headers={"etag": '"v1"'}, content=PAGE))
+    assert cache.lookup("http://site.test/") is None
+    # Reopening the cache evicts what expired
+    assert HttpCache(str(tmp_path), max_age=-1).total_bytes == 0
+    assert os.listdir(cache.body_dir) == []
@@ -0,0 +1,147 @@
+import asyncio
+
+import httpx
+import pytest
+
+from scraper.HostScheduler import HostScheduler
+from scraper.HttpTransport import AsyncHttpSession, HttpTransport, is_html
+
+
+def make_transport(handler, max_retries=3):
+    """HttpTransport answering from `handler`, with a scheduler fast enough that retries do not wait."""
+    scheduler = HostScheduler(initial_rate=1000, max_rate=1000, min_rate=1000, backoff_base=0.001)
+    transport = HttpTransport(scheduler=scheduler, max_retries=max_retries)
+    transport._client = httpx.Client(transport=httpx.MockTransport(handler), follow_redirects=True)
+    return transport
+
+
+def run_session(transport, handler, fetch):
+    """Runs fetch(session) on an AsyncHttpSession answering from `handler`."""
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True) as client:
+            return await fetch(AsyncHttpSession(transport, client))
+    return asyncio.run(main())
+
+
+def in_flight(transport, host="site.test"):
+    return transport.scheduler.stats()[host]["in_flight"]
+
+
+def test_retries_throttled_responses():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(503 if len(calls) < 3 else 200, text="ok")
+
+    transport = make_transport(handler)
+    response = transport.get("http://site.test/")
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert in_flight(transport) == 0
+
+
+def test_gives_up_after_max_retries():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(429)
+
+    transport = make_transport(handler, max_retries=2)
+    assert transport.get("http://site.test/").status_code == 429
+    assert len(calls) == 3
+
+
+def test_client_errors_are_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(404)
+
+    transport = make_transport(handler)
+    assert transport.get("http://site.test/missing").status_code == 404
+    assert len(calls) == 1
+
+
+def test_network_errors_are_retried_then_raised():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        raise httpx.ConnectError("refused", request=request)
+
+    transport = make_transport(handler, max_retries=2)
+    with pytest.raises(httpx.ConnectError):
+        transport.get("http://site.test/")
+    assert len(calls) == 3
+    assert in_flight(transport) == 0
+
+
+def test_redirect_loops_release_the_host_slot():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(302, headers={"location": str(request.url)})
+
+    transport = make_transport(handler)
+    for _ in range(transport.scheduler.max_concurrency + 1):
+        with pytest.raises(httpx.TooManyRedirects):
+            transport.get("http://site.test/loop")
+    # A redirect loop is final, and its slot is free for the next request
+    assert len(calls) == (transport.scheduler.max_concurrency + 1) * 21
+    assert in_flight(transport) == 0
+
+
+def test_async_retries_and_releases_slots():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        if request.url.path == "/loop":
+            return httpx.Response(302, headers={"location": str(request.url)})
+        return httpx.Response(500 if len(calls) == 1 else 200, text="ok")
+
+    async def fetch(session):
+        response = await session.get("http://site.test/")
+        with pytest.raises(httpx.TooManyRedirects):
+            await session.get("http://site.test/loop")
+        return response
+
+    transport = make_transport(handler)
+    assert run_session(transport, handler, fetch).status_code == 200
+    assert in_flight(transport) == 0
+
+
+def test_cancelled_requests_release_the_host_slot():
+    async def handler(request):
+        await asyncio.sleep(10)
+        return httpx.Response(200)
+
+    async def fetch(session):
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(session.get("http://site.test/slow"), 0.05)
+
+    transport = make_transport(handler)
+    run_session(transport, handler, fetch)
+    assert in_flight(transport) == 0
+
+
+def test_limited_reads():
+    def handler(request):
+        if request.url.path == "/file.pdf":
+            return httpx.Response(200, headers={"content-type": "application/pdf"}, content=b"%PDF" * 1000)
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=b"<p>" * 1000)
+
+    async def fetch(session):
+        pdf = await session.get("http://site.test/file.pdf", accept=is_html)
+        page = await session.get("http://site.test/", accept=is_html, max_bytes=100)
+        return pdf, page
+
+    transport = make_transport(handler)
+    pdf, page = run_session(transport, handler, fetch)
+    assert pdf.extensions["skipped"] and pdf.content == b""
+    assert page.extensions["truncated"] and len(page.content) == 100
+    assert transport.stats()["bodies_skipped"] == 1
@@ -0,0 +1,48 @@
+import asyncio
+
+import httpx
+
+from scraper.ContentScraper import ScrapeRunner
+from scraper.InternalLinkCrawler import InternalLinkCrawler
+from scraper.RobotsTxt import RobotsTxt
+
+SITE = "https://site.test"
+ROBOTS = "User-agent: *\nDisallow: /private\n"
+
+
+def site(request):
+    path = request.url.path
+    if path == "/robots.txt":
+        return httpx.Response(200, text=ROBOTS)
+    if path.startswith("/private"):
+        raise AssertionError(f"{path} is disallowed and must not be fetched")
+    links = {"/": ["/a", "/private/x"], "/a": ["/private/y", "/a"]}.get(path, [])
+    canonical = '<link rel="canonical" href="/private/canonical">' if path == "/a" else ""
+    html = f"<html><head>{canonical}</head><body>" + "".join(f'<a href="{link}">x</a>' for link in links) + "</body></html>"
+    return httpx.Response(200, headers={"content-type": "text/html"}, html=html)
+
+
+def crawl(mock_transport):
+    transport = mock_transport(site, max_retries=0)
+    RobotsTxt._cache.clear()
+    crawler = InternalLinkCrawler(SITE, transport=transport, robots=RobotsTxt(SITE, transport=transport))
+    found = asyncio.run(crawler.crawl_internal_links_async(max_pages=10))
+    return crawler, found
+
+
+def test_disallowed_links_are_never_fetched_nor_found(mock_transport):
+    crawler, found = crawl(mock_transport)
+    assert sorted(found) == [SITE, f"{SITE}/a"]
+    assert crawler.unverified == {f"{SITE}/private/x": "disallowed", f"{SITE}/private/y": "disallowed",
+                                  f"{SITE}/private/canonical": "disallowed"}
+
+
+def test_disallowed_links_are_not_scraped_for_content(mock_transport, db_handler):
+    crawler, found = crawl(mock_transport)
+    db_handler.save_urls({url: "non-indexed" for url in found})
+    # Stored as a page by an earlier crawl, before robots.txt disallowed it
+    db_handler.save_urls({f"{SITE}/private/y": "non-indexed"})
+    db_handler.save_unverified_urls(crawler.unverified)
+
+    runner = ScrapeRunner(SITE, db_handler=db_handler, extract_workers=0)
+    assert sorted(runner.scraped_urls) == [SITE, f"{SITE}/a"]
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from scraper.JobManager import DONE, FAILED, QUEUED, RUNNING, JobManager
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=4)
+    yield manager
+    manager.shutdown()
+
+
+def blocking_target(started, release, order=None):
+    def target(job):
+        if order is not None:
+            order.append(job.id)
+        started.set()
+        assert release.wait(5)
+    return target
+
+
+def test_job_runs_and_reports_progress(manager):
+    def target(job):
+        for done in range(1, 11):
+            job.progress(done, 10)
+
+    job = manager.submit("scrape", "https://a.test", target)
+    wait_for(lambda: job.status == DONE)
+    snapshot = job.snapshot()
+    assert snapshot["pages_done"] == 10 and snapshot["pages_total"] == 10
+    assert snapshot["eta_seconds"] is None  # Finished
+    assert manager.get(job.id) is job
+
+
+def test_failures_are_recorded(manager):
+    def target(job):
+        raise RuntimeError("boom")
+
+    job = manager.submit("scrape", "https://a.test", target)
+    wait_for(lambda: job.status == FAILED)
+    assert job.error == "boom"
+    # A failed job does not block the next one for its domain
+    again = manager.submit("scrape", "https://a.test", lambda job: None)
+    assert again is not job
+    wait_for(lambda: again.status == DONE)
+
+
+def test_active_job_of_the_same_kind_is_returned(manager):
+    started, release = threading.Event(), threading.Event()
+    job = manager.submit("scrape", "https://a.test", blocking_target(started, release))
+    assert started.wait(5)
+    assert manager.submit("scrape", "https://a.test", lambda job: None) is job
+    release.set()
+    wait_for(lambda: job.status == DONE)
+
+
+def test_jobs_of_one_domain_run_one_after_another(manager):
+    started, release = threading.Event(), threading.Event()
+    order = []
+    first = manager.submit("scrape", "https://a.test", blocking_target(started, release, order))
+    assert started.wait(5)
+    second = manager.submit("scrape-content", "https://a.test", lambda job: order.append(job.id))
+    other = manager.submit("scrape", "https://b.test", lambda job: order.append(job.id))
+
+    wait_for(lambda: other.status == DONE)
+    assert (first.status, second.status) == (RUNNING, QUEUED)
+    release.set()
+    wait_for(lambda: second.status == DONE)
+    assert order == [first.id, other.id, second.id]
+
+
+def test_eta_while_running(manager):
+    started, release = threading.Event(), threading.Event()
+
+    def target(job):
+        job.progress(5, 20)
+        started.set()
+        assert release.wait(5)
+
+    job = manager.submit("scrape", "https://a.test", target)
+    assert started.wait(5)
+    time.sleep(0.05)
+    snapshot = job.snapshot()
+    assert snapshot["status"] == RUNNING
+    assert snapshot["pages_per_sec"] > 0 and snapshot["eta_seconds"] > 0
+    release.set()
+
+
+def test_history_keeps_active_jobs():
+    manager = JobManager(max_workers=2, max_history=3)
+    started, release = threading.Event(), threading.Event()
+    active = manager.submit("scrape", "https://active.test", blocking_target(started, release))
+    assert started.wait(5)
+    finished = []
+    for n in range(5):
+        job = manager.submit("scrape", f"https://{n}.test", lambda job: None)
+        wait_for(lambda: job.status == DONE)
+        finished.append(job)
+
+    jobs = manager.list_jobs()
+    assert len(jobs) == 3
+    assert active in jobs and finished[-1] in jobs and finished[0] not in jobs
+    assert manager.list_jobs("https://active.test") == [active]
+    release.set()
+    manager.shutdown()
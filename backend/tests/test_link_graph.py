@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from scraper.ContentScraper import ScrapeRunner
+from scraper.InternalLinkGraphBuilder import InternalLinkGraphBuilder
+from scraper.LinkGraph import LinkGraph
+
+#  0 home -> 1 about, 2 blog
+#  1 about -> 0 home
+#  2 blog -> 3 post
+#  3 post -> 2 blog
+#  4 orphan (in the sitemap, nothing links to it) -> 0 home
+#  5 island <-> 6 island, reachable from nothing
+URLS = ["/", "/about", "/blog", "/post", "/orphan", "/island-a", "/island-b"]
+EDGES = [(0, 1), (0, 2), (1, 0), (2, 3), (3, 2), (4, 0), (5, 6), (6, 5)]
+
+
+def graph(edges=EDGES, nav=None, sitemap_ids=(0, 1, 2, 3, 4)):
+    sources, targets = zip(*edges)
+    return LinkGraph(URLS, sources, targets, homepage=0, sitemap_ids=list(sitemap_ids), nav=nav)
+
+
+def test_click_depth():
+    assert graph().click_depth().tolist() == [0, 1, 1, 2, -1, -1, -1]
+
+
+def test_click_depth_takes_the_shortest_path():
+    # A long way round to /post and a direct link to it
+    edges = EDGES + [(1, 3)]
+    assert graph(edges).click_depth()[3] == 2
+    edges = EDGES + [(0, 3)]
+    assert graph(edges).click_depth()[3] == 1
+
+
+def test_without_homepage_nothing_is_reachable():
+    sources, targets = zip(*EDGES)
+    assert LinkGraph(URLS, sources, targets).click_depth().tolist() == [-1] * len(URLS)
+
+
+def test_pagerank():
+    rank = graph().pagerank()
+    assert rank.sum() == pytest.approx(1.0)
+    assert (rank > 0).all()
+    # Pages nothing links to keep only the teleport share
+    assert rank[4] == pytest.approx(rank.min())
+    assert rank[0] > rank[1] > rank[4]
+    assert rank[5] == pytest.approx(rank[6])
+
+
+def test_pagerank_spreads_dangling_pages():
+    # /post links nowhere; its rank is spread over every page instead of lost
+    edges = [(0, 1), (0, 2), (1, 0), (2, 3)]
+    rank = graph(edges).pagerank()
+    assert rank.sum() == pytest.approx(1.0)
+    assert rank[3] > rank[2]
+
+
+def test_pagerank_matches_the_dense_formula():
+    g = graph()
+    n = len(URLS)
+    matrix = np.zeros((n, n))
+    for source, target in EDGES:
+        matrix[target, source] = 1 / g.out_degree[source]
+    rank = np.full(n, 1 / n)
+    for _ in range(200):
+        rank = 0.15 / n + 0.85 * matrix @ rank
+    assert g.pagerank() == pytest.approx(rank, abs=1e-8)
+
+
+def test_orphans():
+    assert graph().orphans().tolist() == [4]
+    # The homepage is never an orphan, even when nothing links back to it
+    edges = [(0, 1), (0, 2), (2, 3), (3, 2)]
+    assert graph(edges).orphans().tolist() == [4]
+
+
+def test_nav_links_count_for_depth_but_not_internal_links():
+    nav = [True, True, False, False, False, False, False, False]
+    metrics = {page["url"]: page for page in graph(nav=nav).page_metrics()}
+    assert metrics["/about"]["click_depth"] == 1
+    assert metrics["/about"]["internal_link_count"] == 0
+    assert metrics["/blog"]["internal_link_count"] == 1
+    assert metrics["/"]["internal_link_count"] == 2
+    assert metrics["/"]["outlink_count"] == 2
+    assert metrics["/orphan"]["is_orphan"]
+    assert metrics["/island-a"]["click_depth"] is None
+
+
+def test_builder_reads_pages_in_one_pass():
+    pages = [
+        {"url": "/", "links_to": ["/a", "/b", "/"], "nav_links": ["/a", "/about"]},
+        {"url": "/a", "links_to": ["/b"]},
+        {"url": "/b", "links_to": None, "nav_links": ["/"]},
+    ]
+    graph = InternalLinkGraphBuilder(iter(pages), homepage="/", sitemap_urls=["/", "/b", "/lonely"]).build()
+    metrics = {page["url"]: page for page in graph.page_metrics()}
+    assert graph.urls == ["/", "/a", "/b", "/about", "/lonely"]
+    # Self-links are dropped; a link in both content and navigation is one content link
+    assert graph.edge_count == 5
+    assert {url: page["internal_link_count"] for url, page in metrics.items()} == {
+        "/": 0, "/a": 1, "/b": 2, "/about": 0, "/lonely": 0}
+    assert metrics["/about"]["click_depth"] == 1
+    assert metrics["/lonely"]["is_orphan"] and metrics["/lonely"]["click_depth"] is None
+
+
+def test_link_metrics_are_stored_from_the_database(db_handler):
+    db_handler.save_urls({"https://site.test": "indexed", "https://site.test/a": "indexed",
+                          "https://site.test/b": "non-indexed", "https://site.test/orphan": "indexed"})
+    db_handler.update_metadata([
+        {"url": "https://site.test", "links_to": ["https://site.test/a"], "nav_links": ["https://site.test/b"]},
+        {"url": "https://site.test/a", "links_to": ["https://site.test/b"], "nav_links": []},
+    ])
+    runner = ScrapeRunner("https://site.test", db_handler=db_handler, extract_workers=0)
+    summary = runner.analyze_link_graph()
+    assert summary["orphans"] == 1
+
+    stored = db_handler.fetch_scraped_urls(fields=["internal_link_count", "click_depth", "is_orphan"])
+    assert stored["https://site.test/b"] == {"internal_link_count": 1, "click_depth": 1, "is_orphan": False}
+    assert stored["https://site.test/orphan"]["is_orphan"]
@@ -0,0 +1,48 @@
+import time
+
+from scraper.NavigationLinkFilter import NavigationLinkFilter, SIGNATURE_VERSION
+
+
+def page(n):
+    return (f'<html><body><header><nav><a href="/">Home</a><a href="/about">About</a></nav></header>'
+            f'<main><div class="post"><a href="/posts/{n}">Post {n}</a></div>'
+            f'<p><a href="https://elsewhere.test/">Elsewhere</a></p></main></body></html>')
+
+
+def build(nav_filter, pages=5):
+    for n in range(pages):
+        nav_filter.analyze_page(page(n))
+    nav_filter.finalize()
+    return nav_filter
+
+
+def test_navigation_positions():
+    nav_filter = build(NavigationLinkFilter("https://site.test"))
+    assert nav_filter.page_count == 5
+    assert len(nav_filter.nav_paths) == 2
+    assert nav_filter.is_fresh()
+
+
+def test_state_round_trip():
+    nav_filter = build(NavigationLinkFilter("https://site.test"))
+    loaded = NavigationLinkFilter("https://site.test", state=nav_filter.state())
+    assert loaded.nav_paths == nav_filter.nav_paths
+    assert loaded.is_fresh()
+    assert not NavigationLinkFilter("https://site.test", state=dict(nav_filter.state(), version=SIGNATURE_VERSION - 1)).nav_paths
+
+
+def test_stale_model_is_rebuilt_from_scratch():
+    cold = build(NavigationLinkFilter("https://site.test"))
+    stale_state = dict(cold.state(), pages=20, built_at=time.time() - 30 * 24 * 3600)
+    stale = NavigationLinkFilter("https://site.test", state=stale_state)
+    assert not stale.is_fresh()
+
+    build(stale)
+    assert stale.page_count == 5
+    assert stale.nav_paths == cold.nav_paths
+    assert stale.is_fresh()
+
+    # A second rebuild of the same filter doesn't add to the first one's counts
+    build(stale, pages=2)
+    assert stale.page_count == 2
+    assert stale.nav_paths == cold.nav_paths
@@ -0,0 +1,50 @@
+import pytest
+
+from scraper.utils.normalize_url import normalize_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTP://Example.COM/Page", "http://example.com/Page"),
+    ("https://example.com:443/a", "https://example.com/a"),
+    ("http://example.com:80/a", "http://example.com/a"),
+    ("http://example.com:8080/a", "http://example.com:8080/a"),
+    ("https://example.com/a/#section", "https://example.com/a"),
+    ("https://example.com/", "https://example.com"),
+    ("https://example.com/a/b/../c/./d", "https://example.com/a/c/d"),
+    ("https://example.com/?b=2&a=1", "https://example.com/?a=1&b=2"),
+    ("https://example.com/a?utm_source=x&id=3&gclid=y&fbclid=z", "https://example.com/a?id=3"),
+    ("https://example.com/a?utm_source=x", "https://example.com/a"),
+    ("https://example.com/%7euser/%2f", "https://example.com/~user/%2F"),
+    ("https://example.com/a b", "https://example.com/a%20b"),
+    ("https://example.com./a", "https://example.com/a"),
+])
+def test_normalize(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_variants_share_one_key():
+    variants = [
+        "https://Example.com/a/?y=2&x=1",
+        "https://example.com:443/a?x=1&y=2#top",
+        "https://example.com/b/../a?x=1&utm_medium=mail&y=2",
+    ]
+    assert len({normalize_url(url) for url in variants}) == 1
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("../other", "https://example.com/other"),
+    ("child", "https://example.com/dir/child"),
+    ("/root", "https://example.com/root"),
+    ("//cdn.example.com/x", "https://cdn.example.com/x"),
+    ("?page=2", "https://example.com/dir/page?page=2"),
+])
+def test_resolves_against_base(url, expected):
+    assert normalize_url(url, base="https://example.com/dir/page") == expected
+
+
+@pytest.mark.parametrize("url", [
+    "mailto:someone@example.com", "javascript:void(0)", "tel:+123", "ftp://example.com/file",
+    "https://example.com:99999/", "not a url",
+])
+def test_rejects_non_http_urls(url):
+    assert normalize_url(url) is None
@@ -0,0 +1,104 @@
+import itertools
+
+from scraper.PriorityFrontier import PriorityFrontier
+
+SITE = "https://shop.test"
+
+
+def crawl_calendar(frontier, months):
+    """Follows a calendar's "next month" links from page to page; returns how many were queued."""
+    frontier.add(f"{SITE}/calendar/2000-01", depth=1)
+    queued = 1
+    for month in range(1, months):
+        url = frontier.get_nowait()
+        next_url = f"{SITE}/calendar/{2000 + month // 12}-{month % 12 + 1:02d}"
+        added = frontier.add(next_url, parent=url)
+        frontier.finish(url)
+        if not added:
+            break
+        queued += 1
+    return queued
+
+
+def test_shallow_and_linked_urls_come_first():
+    frontier = PriorityFrontier()
+    frontier.add(f"{SITE}/a/b/c/deep", depth=3)
+    frontier.add(f"{SITE}/popular", depth=2)
+    frontier.add(f"{SITE}/shallow", depth=1)
+    for _ in range(20):
+        frontier.add_inlink(f"{SITE}/popular")
+    assert [frontier.get_nowait() for _ in range(3)] == [f"{SITE}/popular", f"{SITE}/shallow", f"{SITE}/a/b/c/deep"]
+
+
+def test_pagination_and_ids_are_kept():
+    frontier = PriorityFrontier()
+    urls = [f"{SITE}/blog?page={n}" for n in range(100)] + [f"{SITE}/product.php?id={n}" for n in range(100)]
+    assert all(frontier.add(url, depth=1) for url in urls)
+    assert frontier.qsize() == 200
+    assert frontier.trapped == 0
+
+
+def test_facet_combinations_are_trapped():
+    frontier = PriorityFrontier(facet_limit=4)
+    facets = ["color=red", "size=m", "sort=new", "brand=x", "page=2"]
+    added = {}
+    for count in range(1, len(facets) + 1):
+        for combo in itertools.combinations(facets, count):
+            url = f"{SITE}/search?" + "&".join(combo)
+            added[url] = frontier.add(url, depth=1)
+
+    # Single filters are kept; only the first facet_limit combinations got in, and were dropped again
+    assert all(added[f"{SITE}/search?{facet}"] for facet in facets)
+    assert sum(added.values()) == len(facets) + 4
+    assert frontier.qsize() == len(facets)
+    assert frontier.traps == {f"{SITE}/search": "faceted"}
+    assert frontier.trapped == len(added) - len(facets)
+    assert sorted(frontier.trapped_urls) == sorted(url for url in added if url.count("=") > 1)
+    # Other paths are not affected
+    assert frontier.add(f"{SITE}/catalog?color=red&size=m", depth=1)
+
+
+def test_self_generating_chain_is_trapped():
+    frontier = PriorityFrontier(trap_chain=10)
+    assert crawl_calendar(frontier, 100) == 10
+    assert frontier.traps == {"/calendar/{date}": "self-generating"}
+    assert frontier.trapped == 1
+    assert frontier.qsize() == 0
+    # Once a pattern is a trap, its URLs are turned away wherever they are found
+    assert not frontier.add(f"{SITE}/calendar/1999-05", depth=1)
+
+
+def test_short_chains_are_kept():
+    frontier = PriorityFrontier(trap_chain=10)
+    assert crawl_calendar(frontier, 8) == 8
+    assert frontier.traps == {}
+
+
+def test_session_ids_are_stripped_and_learned():
+    frontier = PriorityFrontier(session_values=3)
+    assert frontier.clean(f"{SITE}/cart;jsessionid=ABC123?sid=42&item=7") == f"{SITE}/cart?item=7"
+
+    tokens = ["f3a9c1d07b2e4a5b", "9b0e7d2c4f1a3e6d", "2c5d8a1f0e7b9c3a", "7e1b3d9f5a2c0e8b"]
+    cleaned = [frontier.clean(f"{SITE}/page?token={token}&id=1") for token in tokens]
+    # The first values could be real pages; after session_values of them the parameter is a session
+    assert cleaned[:2] == [f"{SITE}/page?token={tokens[0]}&id=1", f"{SITE}/page?token={tokens[1]}&id=1"]
+    assert cleaned[2:] == [f"{SITE}/page?id=1", f"{SITE}/page?id=1"]
+    assert frontier.traps == {"token": "session id"}
+
+
+def test_cleaned_urls_are_normalized():
+    frontier = PriorityFrontier()
+    # Dropping the only parameter leaves a trailing slash that normalize_url would have removed
+    assert frontier.clean("https://site.test/?sid=abc") == "https://site.test"
+    assert frontier.clean(f"{SITE}/shop/;jsessionid=ABC123") == f"{SITE}/shop"
+    assert frontier.clean(f"{SITE}/list?page=2&sid=abc&a=1") == f"{SITE}/list?a=1&page=2"
+
+
+def test_close_keeps_remaining_urls():
+    frontier = PriorityFrontier()
+    frontier.add(f"{SITE}/", depth=0, known=True)
+    frontier.add(f"{SITE}/a", depth=1)
+    url = frontier.get_nowait()
+    frontier.close()
+    frontier.add(f"{SITE}/b", parent=url)
+    assert sorted(frontier.remaining()) == [f"{SITE}/a", f"{SITE}/b"]
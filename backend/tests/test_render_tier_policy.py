@@ -0,0 +1,31 @@
+from scraper.MetadataScraper import MetadataScraper
+from scraper.RenderTierPolicy import RenderTierPolicy
+
+TEXT = "Enough visible text to use the page without rendering it. " * 5
+SCRIPT = "<script>" + "var filler = 'script text is not visible text';" * 20 + "</script>"
+
+
+def needs_render(html):
+    data = MetadataScraper("https://site.test").extract(html, "https://site.test/")
+    return RenderTierPolicy().needs_render(html, data)
+
+
+def test_pages_with_text_are_used_as_fetched():
+    assert needs_render(f"<html><head><title>T</title></head><body><p>{TEXT}</p></body></html>") is None
+
+
+def test_pages_without_content_need_rendering():
+    assert needs_render("") == "empty response"
+    assert needs_render("  \n ") == "empty response"
+    assert needs_render(f"<html><body><p>{TEXT}</p></body></html>") == "missing title"
+    # Script and style text does not count as visible text
+    assert needs_render(f"<html><head><title>T</title>{SCRIPT}</head><body><p>Hi</p></body></html>") == "empty body"
+    assert needs_render(f'<html><head><title>T</title></head><body><div id="root"></div>{SCRIPT}</body></html>') == "SPA root"
+
+
+def test_verdict_follows_the_pages_seen():
+    policy = RenderTierPolicy(learn_after=10)
+    for _ in range(10):
+        policy.record(True)
+    assert policy.verdict == "render"
+    assert RenderTierPolicy(policy.state(), learn_after=10).verdict == "render"
@@ -0,0 +1,65 @@
+from scraper.ResourcePolicy import ResourcePolicy
+
+SITE = "https://www.site.test"
+
+
+def renders(policy, count, ok):
+    for _ in range(count):
+        policy.record(ok)
+
+
+def test_only_third_party_scripts_are_blocked():
+    policy = ResourcePolicy(SITE)
+    assert policy.should_block("https://cdn.site.test/app.js", "script") is False
+    assert policy.should_block("https://tracker.test/t.js", "script") is True
+    assert policy.should_block("https://site.test/logo.png", "image") is True
+    assert policy.should_block("https://site.test/", "document") is False
+
+
+def test_scripts_load_once_pages_fail_without_them():
+    policy = ResourcePolicy(SITE, learn_after=10)
+    renders(policy, 9, ok=False)
+    assert policy.block_third_party_scripts
+    policy.record(False)
+    assert not policy.block_third_party_scripts
+
+
+def test_scripts_are_blocked_again_when_they_do_not_help():
+    policy = ResourcePolicy(SITE, learn_after=10)
+    renders(policy, 10, ok=False)
+    renders(policy, 10, ok=False)
+    assert policy.block_third_party_scripts
+    assert policy.state()["failed_with_scripts"] == 10
+    # Still failing without them, but they didn't help: no flapping
+    renders(policy, 10, ok=False)
+    assert policy.block_third_party_scripts
+
+
+def test_loaded_scripts_are_probed_again():
+    # A stored decision from an early sample where pages failed without the scripts
+    state = ResourcePolicy(SITE, learn_after=10).state()
+    state.update(block_third_party_scripts=False, rendered=10, failed=10)
+    policy = ResourcePolicy(SITE, state=state, learn_after=10, probe_every=50)
+    renders(policy, 50, ok=True)
+    assert policy.block_third_party_scripts
+    assert policy.failure_share(True) is None  # The old sample is dropped
+    # Pages render fine without them now, so they stay blocked
+    renders(policy, 300, ok=True)
+    assert policy.block_third_party_scripts
+
+
+def test_renders_count_under_the_setting_they_ran_with():
+    policy = ResourcePolicy(SITE, learn_after=10)
+    renders(policy, 10, ok=False)
+    policy.record(True, scripts_blocked=True)  # Started before the switch
+    assert policy.state()["rendered"] == 11
+    assert policy.state()["rendered_with_scripts"] == 0
+    assert not policy.block_third_party_scripts
+
+
+def test_state_round_trip():
+    policy = ResourcePolicy(SITE, learn_after=10)
+    renders(policy, 10, ok=False)
+    loaded = ResourcePolicy(SITE, state=policy.state())
+    assert loaded.state() == policy.state()
+    assert ResourcePolicy(SITE, state=policy.state(), block_third_party_scripts=True).block_third_party_scripts
@@ -0,0 +1,96 @@
+import httpx
+import pytest
+
+from scraper.HostScheduler import HostScheduler
+from scraper.HttpTransport import HttpTransport
+from scraper.RobotsTxt import RobotsRules, RobotsTxt, parse_groups
+
+ROBOTS = """
+User-agent: *
+Disallow: /private
+Allow: /private/public
+Disallow: /*.pdf$
+Disallow: /search?*sort=
+Crawl-delay: 2
+
+User-agent: BotA
+User-agent: botb
+Disallow: /
+
+# Groups naming the same agent are merged
+User-agent: bota
+Allow: /open
+"""
+
+
+def robots(user_agent, text=ROBOTS, status=200):
+    def handler(request):
+        assert request.url.path == "/robots.txt"
+        return httpx.Response(status, text=text)
+
+    transport = HttpTransport(scheduler=HostScheduler(initial_rate=1000, max_rate=1000, min_rate=1000), max_retries=0)
+    transport._client = httpx.Client(transport=httpx.MockTransport(handler))
+    RobotsTxt._cache.clear()
+    return RobotsTxt("https://site.test", transport=transport, user_agent=user_agent)
+
+
+def rules(*rules):
+    return RobotsRules(list(rules))
+
+
+@pytest.mark.parametrize("path, allowed", [
+    ("/", True),
+    ("/private", False),
+    ("/private/page", False),
+    ("/private/public", True),
+    ("/private/public/page", True),
+    ("/files/report.pdf", False),
+    ("/files/report.pdf?download=1", True),
+    ("/search?q=x&sort=new", False),
+    ("/search?q=x", True),
+    ("/robots.txt", True),
+])
+def test_default_group(path, allowed):
+    assert robots("MyCrawler/1.0").is_allowed("https://site.test" + path) is allowed
+
+
+def test_most_specific_agent_wins_and_groups_merge():
+    for agent in ("BotA/2.1", "botb"):
+        robot = robots(agent)
+        assert not robot.is_allowed("https://site.test/page")
+        assert robot.get_crawl_delay() is None
+    assert robots("bota").is_allowed("https://site.test/open/page")
+
+
+def test_crawl_delay():
+    assert robots("MyCrawler").get_crawl_delay() == 2
+
+
+def test_longest_match_wins():
+    matcher = rules((False, "/a"), (True, "/a/b"), (False, "/a/b/c"))
+    assert not matcher.is_allowed("https://site.test/a/x")
+    assert matcher.is_allowed("https://site.test/a/b/x")
+    assert not matcher.is_allowed("https://site.test/a/b/c")
+
+
+def test_allow_wins_a_tie():
+    assert rules((False, "/page"), (True, "/page")).is_allowed("https://site.test/page")
+    assert rules((True, "/*.html"), (False, "/page")).is_allowed("https://site.test/page.html")
+
+
+def test_wildcards():
+    matcher = rules((False, "/*/edit"), (False, "/exact$"), (True, "/*/edit/help$"))
+    assert not matcher.is_allowed("https://site.test/post/1/edit")
+    assert matcher.is_allowed("https://site.test/post/1/edit/help")
+    assert not matcher.is_allowed("https://site.test/exact")
+    assert matcher.is_allowed("https://site.test/exact/more")
+
+
+def test_empty_disallow_allows_everything():
+    groups = parse_groups("User-agent: *\nDisallow:\n")
+    assert RobotsRules(*robots("*").select_group(groups)).is_allowed("https://site.test/anything")
+
+
+@pytest.mark.parametrize("status", [404, 500])
+def test_missing_robots_txt_allows_everything(status):
+    assert robots("*", status=status).is_allowed("https://site.test/private")
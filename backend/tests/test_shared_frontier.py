@@ -0,0 +1,90 @@
+import httpx
+
+from scraper.CrawlWorker import CrawlWorker
+from scraper.SharedFrontier import DONE, FAILED, LEASED, QUEUED, SharedFrontier
+
+SITE = "https://site.test"
+
+
+def make_frontier(db_handler, **options):
+    return SharedFrontier(db_handler.frontier_collection, **options)
+
+
+def states(frontier):
+    return {entry["_id"]: entry["state"] for entry in frontier.collection.find({}, {"state": 1})}
+
+
+def test_add_dedupes_and_keeps_to_max_pages(db_handler):
+    frontier = make_frontier(db_handler, max_pages=3)
+    assert frontier.add(["/a", "/b"]) == 2
+    assert frontier.add(["/b"]) == 0
+    assert frontier.add(["/c", "/d"]) == 1
+    assert frontier.fit(["/e"]) == []
+    assert frontier.stats() == {QUEUED: 3, LEASED: 0, DONE: 0, FAILED: 0, "total": 3}
+
+
+def test_lease_heartbeat_and_complete(db_handler):
+    frontier = make_frontier(db_handler)
+    frontier.add([f"/{n}" for n in range(5)])
+    first = frontier.lease("w1", batch_size=3)
+    second = frontier.lease("w2", batch_size=3)
+    assert len(first.urls) == 3 and len(second.urls) == 2
+    assert not set(first.urls) & set(second.urls)
+    assert frontier.lease("w3").urls == []
+    assert frontier.heartbeat(first) == 3
+
+    frontier.complete(first, first.urls[:1])
+    assert frontier.heartbeat(first) == 2
+    frontier.complete(first)
+    frontier.complete(second)
+    assert set(states(frontier).values()) == {DONE}
+    assert frontier.is_drained()
+
+
+def test_expired_leases_are_reclaimed_then_failed(db_handler):
+    frontier = make_frontier(db_handler, max_attempts=2)
+    frontier.add(["/a"])
+    assert frontier.lease("w1", lease_seconds=-1).urls == ["/a"]
+    # The lease of a worker that stopped heartbeating goes to the next one that asks
+    assert frontier.lease("w2", lease_seconds=-1).urls == ["/a"]
+    assert frontier.lease("w3").urls == []
+    assert states(frontier) == {"/a": FAILED}
+    assert frontier.is_drained()
+
+
+def test_released_urls_are_retried_up_to_max_attempts(db_handler):
+    frontier = make_frontier(db_handler, max_attempts=2)
+    frontier.add(["/a", "/b"])
+    lease = frontier.lease("w1")
+    assert frontier.release(lease, ["/a"]) == 1
+    frontier.complete(lease)
+    assert states(frontier) == {"/a": QUEUED, "/b": DONE}
+
+    lease = frontier.lease("w1")
+    assert lease.urls == ["/a"]
+    assert frontier.release(lease, ["/a"]) == 0
+    assert states(frontier) == {"/a": FAILED, "/b": DONE}
+
+
+def test_worker_retries_failed_fetches(mock_transport, db_handler):
+    requests = []
+
+    def site(request):
+        path = request.url.path
+        requests.append(path)
+        if path == "/flaky" and requests.count(path) == 1:
+            raise httpx.ConnectError("connection reset")
+        if path == "/gone":
+            return httpx.Response(404)
+        links = {"/": ["/flaky", "/gone"]}.get(path, [])
+        html = "<html><body>" + "".join(f'<a href="{link}">x</a>' for link in links) + "</body></html>"
+        return httpx.Response(200, headers={"content-type": "text/html"}, html=html)
+
+    frontier = make_frontier(db_handler)
+    frontier.add([SITE])
+    worker = CrawlWorker(SITE, frontier, db_handler, transport=mock_transport(site, max_retries=0), idle_wait=0)
+    stats = worker.run()
+
+    assert requests.count("/flaky") == 2
+    assert stats["retried"] == 1
+    assert states(frontier) == {SITE: DONE, f"{SITE}/flaky": DONE, f"{SITE}/gone": FAILED}
@@ -0,0 +1,103 @@
+import gzip
+import itertools
+
+import httpx
+
+from scraper.HostScheduler import HostScheduler
+from scraper.HttpTransport import HttpTransport
+from scraper.SitemapScraper import SitemapScraper
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def urlset(urls, lastmod=None):
+    entries = "".join(
+        f"<url><loc> {url} </loc>{f'<lastmod>{lastmod}</lastmod>' if lastmod else ''}</url>" for url in urls
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>{entries}</urlset>'.encode()
+
+
+def sitemap_index(urls):
+    entries = "".join(f"<sitemap><loc>{url}</loc></sitemap>" for url in urls)
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex {NS}>{entries}</sitemapindex>'.encode()
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def make_scraper(files):
+    """SitemapScraper over a site serving `files` ({path: body}), recording the paths requested."""
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.path)
+        if request.url.path not in files:
+            return httpx.Response(404)
+        return httpx.Response(200, content=files[request.url.path])
+
+    scheduler = HostScheduler(initial_rate=1000, max_rate=1000, min_rate=1000)
+    transport = HttpTransport(scheduler=scheduler, max_retries=0)
+    transport._client = httpx.Client(transport=httpx.MockTransport(handler))
+    return SitemapScraper("https://site.test", transport=transport), requested
+
+
+def test_iterparse_reads_entries_across_chunk_boundaries():
+    scraper = SitemapScraper("https://site.test")
+    data = urlset([f"https://site.test/{n}" for n in range(50)], lastmod="2026-10-01")
+    for size in (1, 7, 64, len(data)):
+        records = list(scraper.iterparse(chunked(data, size)))
+        assert records == [("url", {"url": f"https://site.test/{n}", "lastmod": "2026-10-01"}) for n in range(50)]
+
+
+def test_iterparse_tells_indexes_from_urlsets_by_element():
+    scraper = SitemapScraper("https://site.test")
+    # No .xml suffix to go by
+    records = list(scraper.iterparse([sitemap_index(["https://site.test/pages", "https://site.test/posts"])]))
+    assert [kind for kind, _ in records] == ["sitemap", "sitemap"]
+    assert records[0][1] == {"url": "https://site.test/pages", "lastmod": None}
+
+
+def test_iterparse_skips_entries_without_loc():
+    scraper = SitemapScraper("https://site.test")
+    data = f"<urlset {NS}><url><lastmod>2026-10-01</lastmod></url><url><loc>https://site.test/a</loc></url></urlset>"
+    assert [record["url"] for _, record in scraper.iterparse([data.encode()])] == ["https://site.test/a"]
+
+
+def test_iterparse_inflates_gzip_in_small_steps():
+    scraper = SitemapScraper("https://site.test")
+    urls = [f"https://site.test/page-{n}" for n in range(5000)]
+    data = gzip.compress(urlset(urls))
+    for size in (3, 1024):
+        assert [record["url"] for _, record in scraper.iterparse(chunked(data, size))] == urls
+
+
+def test_sitemap_tree_is_followed_once_per_sitemap():
+    scraper, requested = make_scraper({
+        "/sitemap.xml": sitemap_index(["https://site.test/pages.xml", "https://site.test/posts.xml.gz",
+                                       "https://site.test/missing.xml", "https://site.test/nested"]),
+        "/pages.xml": urlset(["https://site.test/a", "https://site.test/b"], lastmod="2026-10-01"),
+        "/posts.xml.gz": gzip.compress(urlset(["https://site.test/post"])),
+        # Indexes that point back at each other are only fetched once
+        "/nested": sitemap_index(["https://site.test/sitemap.xml", "https://site.test/pages.xml",
+                                  "https://site.test/deep.xml"]),
+        "/deep.xml": urlset(["https://site.test/deep"]),
+    })
+    urls = scraper.get_sitemap_urls("https://site.test/sitemap.xml")
+    assert sorted(urls) == ["https://site.test/a", "https://site.test/b", "https://site.test/deep",
+                            "https://site.test/post"]
+    assert scraper.lastmods == {"https://site.test/a": "2026-10-01", "https://site.test/b": "2026-10-01"}
+    assert sorted(requested) == ["/deep.xml", "/missing.xml", "/nested", "/pages.xml", "/posts.xml.gz",
+                                 "/sitemap.xml"]
+
+
+def test_missing_sitemap_yields_nothing():
+    scraper, _ = make_scraper({})
+    assert scraper.get_sitemap_urls("https://site.test/sitemap.xml") == []
+
+
+def test_consumer_can_stop_early():
+    scraper, _ = make_scraper({"/sitemap.xml": urlset([f"https://site.test/{n}" for n in range(10000)])})
+    scraper.queue_size = 10
+    records = list(itertools.islice(scraper.iter_sitemap_records("https://site.test/sitemap.xml"), 5))
+    assert [record["url"] for record in records] == [f"https://site.test/{n}" for n in range(5)]
@@ -10,7 +10,8 @@ const DownloadCSVButton = ({ domain }: { domain: string }) => {
   const checkCsvAvailability = async () => {
     try {
       setLoading(true);
-      const response = await fetch(`${BASE_URL}/scraped-urls/?domain=${domain}`);
+      // One stored URL is enough to know there is something to export; /download-csv/ streams them all
+      const response = await fetch(`${BASE_URL}/scraped-urls/?domain=${domain}&limit=1`);
       const data = await response.json();
 
       // ✅ Check if data.scraped_urls is a non-empty object instead of an array
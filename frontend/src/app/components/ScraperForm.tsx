@@ -11,6 +11,12 @@ interface ScrapedUrlData {
   heading_count?: number;
 }
 
+// One page of /scraped-urls/; next_after is null on the last page
+interface ScrapedUrlsPage {
+  scraped_urls?: Record<string, ScrapedUrlData>;
+  next_after: string | null;
+}
+
 interface ScraperFormProps {
   onScrapeComplete: (urls: Record<string, ScrapedUrlData>, domain: string) => void;
   onLoadingChange: (loading: boolean) => void;
@@ -22,6 +28,16 @@ export default function ScraperForm({ onScrapeComplete, onLoadingChange }: Scrap
 
   const BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
+  // Poll a background job until it finishes
+  const waitForJob = async (jobId: string) => {
+    while (true) {
+      const res = await axios.get(`${BASE_URL}/jobs/${jobId}`);
+      if (res.data.status === "done") return;
+      if (res.data.status === "failed") throw new Error(res.data.error || "Job failed");
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+    }
+  };
+
   const handleScrape = async () => {
     if (!domain.trim()) return;
 
@@ -31,22 +47,27 @@ export default function ScraperForm({ onScrapeComplete, onLoadingChange }: Scrap
 
     try {
       // Step 1: Start website scraping
-      await axios.post(`${BASE_URL}/scrape/`, null, { params: { domain } });
+      const scrapeJob = await axios.post(`${BASE_URL}/scrape/`, null, { params: { domain } });
 
       // Step 2: Wait for scraping to complete
-      await new Promise((resolve) => setTimeout(resolve, 5000));
+      await waitForJob(scrapeJob.data.job_id);
 
       // Step 3: Start content scraping
-      await axios.post(`${BASE_URL}/scrape-content/`, null, { params: { domain } });
+      const contentJob = await axios.post(`${BASE_URL}/scrape-content/`, null, { params: { domain } });
 
       // Step 4: Wait for content scraping to complete
-      await new Promise((resolve) => setTimeout(resolve, 5000));
-
-      // Step 5: Fetch the final scraped URLs
-      const res = await axios.get(`${BASE_URL}/scraped-urls/`, { params: { domain } });
-
-      // ✅ Ensure response is correctly structured as a dictionary
-      const urlsDict: Record<string, ScrapedUrlData> = res.data.scraped_urls || {};
+      await waitForJob(contentJob.data.job_id);
+
+      // Step 5: Fetch the final scraped URLs, following next_after until the last page
+      const urlsDict: Record<string, ScrapedUrlData> = {};
+      let after: string | null = null;
+      do {
+        const res = await axios.get<ScrapedUrlsPage>(`${BASE_URL}/scraped-urls/`, {
+          params: { domain, after, limit: 10000 },
+        });
+        Object.assign(urlsDict, res.data.scraped_urls || {});
+        after = res.data.next_after;
+      } while (after);
 
       onScrapeComplete(urlsDict, domain); // ✅ Pass dictionary instead of an array
     } catch (error) {